@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Anonymous Likes for AI Storytelling Platform
+Anonymous visitors' likes live in the signed session cookie, which is sent with
+every request. Instead of a JSON list that grows with every like, the liked ids
+are stored as one short string in the order they were liked: delta-encoded,
+zigzag-varint-packed and base64url-encoded. Stories liked one after another are
+usually published around the same time, so most ids take one or two bytes.
+
+At most ANONYMOUS_LIKES_MAX ids are kept, so the cookie stays the same size no
+matter how much a visitor likes. When the set is full, the id liked longest ago
+is dropped; its like stays counted, but the visitor could like that story again.
+The id just liked is never the one dropped, so repeated clicks on one story
+always toggle.
+"""
+
+import base64
+import binascii
+import logging
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Set
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _pack(ids: List[int]) -> str:
+    """Ids in order -> base64url of zigzag-varint-encoded differences"""
+    out = bytearray()
+    previous = 0
+    for story_id in ids:
+        gap = story_id - previous
+        previous = story_id
+        value = gap * 2 if gap >= 0 else -gap * 2 - 1
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return base64.urlsafe_b64encode(bytes(out)).decode('ascii').rstrip('=')
+
+
+def _unpack(data: str) -> List[int]:
+    """Inverse of _pack; raises ValueError on malformed input"""
+    try:
+        raw = base64.b64decode(data + '=' * (-len(data) % 4), altchars=b'-_', validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid packed id set: {e}")
+    ids = []
+    value, shift, previous = 0, 0, 0
+    for byte in raw:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value >> 1 if not value & 1 else -((value + 1) >> 1)
+        if previous <= 0:
+            raise ValueError("Invalid packed id set: id out of range")
+        ids.append(previous)
+        value, shift = 0, 0
+    if shift:
+        raise ValueError("Invalid packed id set: truncated varint")
+    return ids
+
+
+class PackedIdSet:
+    """Set of positive ids kept in the order they were added, with O(log n) membership and a compact string form"""
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self._order: List[int] = []
+        self._sorted: List[int] = []
+        for story_id in ids:
+            if int(story_id) > 0:
+                self.add(int(story_id))
+
+    @classmethod
+    def decode(cls, data: str) -> 'PackedIdSet':
+        """Load a set written by encode()"""
+        return cls(_unpack(data) if data else [])
+
+    def encode(self) -> str:
+        """Compact string form (delta + zigzag varint + base64url)"""
+        return _pack(self._order)
+
+    def __contains__(self, story_id: int) -> bool:
+        index = bisect_left(self._sorted, story_id)
+        return index < len(self._sorted) and self._sorted[index] == story_id
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __iter__(self) -> Iterator[int]:
+        """Ids from the least to the most recently added"""
+        return iter(self._order)
+
+    def add(self, story_id: int) -> bool:
+        """Add an id as the most recent; returns False if it was already present"""
+        index = bisect_left(self._sorted, story_id)
+        if index < len(self._sorted) and self._sorted[index] == story_id:
+            return False
+        self._sorted.insert(index, story_id)
+        self._order.append(story_id)
+        return True
+
+    def discard(self, story_id: int) -> bool:
+        """Remove an id; returns False if it was not present"""
+        index = bisect_left(self._sorted, story_id)
+        if index < len(self._sorted) and self._sorted[index] == story_id:
+            del self._sorted[index]
+            self._order.remove(story_id)
+            return True
+        return False
+
+    def trim(self, max_ids: int) -> int:
+        """Drop the least recently added ids beyond max_ids; returns how many were dropped"""
+        dropped = max(0, len(self._order) - max_ids)
+        for story_id in self._order[:dropped]:
+            del self._sorted[bisect_left(self._sorted, story_id)]
+        del self._order[:dropped]
+        return dropped
+
+    def intersection(self, story_ids: Iterable[int]) -> Set[int]:
+        """The given ids that are in the set"""
+        return {story_id for story_id in story_ids if story_id in self}
+
+
+class AnonymousLikes:
+    """Reads and writes the liked story ids of an anonymous session"""
+
+    SESSION_KEY = 'liked'
+    # Earlier sessions kept a plain list here; converted on first read
+    LEGACY_SESSION_KEY = 'liked_stories'
+
+    def __init__(self, max_ids: int = 200):
+        """
+        Initialize the store
+
+        Args:
+            max_ids (int): Most liked ids kept per session
+        """
+        self.max_ids = max_ids
+
+    def load(self, session) -> PackedIdSet:
+        """
+        Liked story ids of this session
+
+        Args:
+            session: Flask session
+
+        Returns:
+            PackedIdSet: The ids (empty when none, or when the stored value is unreadable)
+        """
+        if self.LEGACY_SESSION_KEY in session:
+            legacy = session.pop(self.LEGACY_SESSION_KEY) or []
+            liked = PackedIdSet(story_id for story_id in legacy if isinstance(story_id, int))
+            self.save(session, liked)
+            return liked
+        try:
+            return PackedIdSet.decode(session.get(self.SESSION_KEY, ''))
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Discarding unreadable anonymous likes: {e}")
+            session.pop(self.SESSION_KEY, None)
+            return PackedIdSet()
+
+    def save(self, session, liked: PackedIdSet):
+        """
+        Store the ids in the session, keeping the max_ids most recently added
+
+        Args:
+            session: Flask session
+            liked (PackedIdSet): Ids to store
+        """
+        liked.trim(self.max_ids)
+        if liked:
+            session[self.SESSION_KEY] = liked.encode()
+        else:
+            session.pop(self.SESSION_KEY, None)
+
+
+# Global instance
+anonymous_likes = AnonymousLikes(max_ids=Config.ANONYMOUS_LIKES_MAX)
@@ -1,16 +1,41 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
 import pymysql
 import bcrypt
 import os
 from datetime import datetime, timedelta
 import secrets
+import hashlib
 from functools import wraps
+import re
 import time
 import logging
 from speech_service import speech_service
 from gemini_service import gemini_service
 from image_service import image_service
+from db_pool import db_pool, replica_set
+from migrate import migration_runner
+from query_stats import query_stats, InstrumentedCursorMixin
+from story_cards import story_cards
+from tag_catalog import tag_catalog
+from story_counts import published_counts, PublishedCountsSnapshot
+from search import story_search, boolean_query
+from search_index import search_index
+from suggest import suggest_index
+from top_stories import top_stories
+from view_counter import view_counter
+from like_counter import like_counter
+from anonymous_likes import anonymous_likes
+from likes import like_store
+from featured_stories import featured_stories
+from page_cache import content_version, page_cache, fragment_cache
+from data_access import (
+    StoryCard, Story, User as UserRow, Feedback, fetch_all, fetch_one, fetch_published_cards,
+    decode_page_token, STORY_CARD_COLUMNS, STORY_COLUMNS, PENDING_LIKES_SQL, USER_COLUMNS, FEEDBACK_COLUMNS,
+    PUBLIC_STORY_CARD_FIELDS
+)
 from config import Config
 
 app = Flask(__name__)
@@ -60,8 +85,7 @@ class User(UserMixin):
 def load_user(user_id):
     """Load user from database for Flask-Login"""
     try:
-        connection = pymysql.connect(**DB_CONFIG)
-        cursor = connection.cursor()
+        cursor = get_cursor(readonly=True)
         
         cursor.execute("""
             SELECT id, username, email, phone_number, profile_picture, bio 
@@ -82,16 +106,169 @@ def load_user(user_id):
     except Exception as e:
         logger.error(f"Database error: {e}")
         return None
-    finally:
-        if 'connection' in locals() and connection.open:
-            cursor.close()
-            connection.close()
     
     return None
 
 def get_db_connection():
-    """Get database connection"""
-    return pymysql.connect(**DB_CONFIG)
+    """Get a pooled database connection (close() returns it to the pool)"""
+    return db_pool.get_connection()
+
+def get_read_connection():
+    """Pooled connection for background reads: a healthy replica when configured, else the primary"""
+    return replica_set.get_connection() or get_db_connection()
+
+WRITE_STATEMENT = re.compile(r'^\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+class _RequestCursorMixin(InstrumentedCursorMixin):
+    """Records every statement in the request's query log and notes writes"""
+    
+    read_your_writes = True
+    
+    def execute(self, query, args=None):
+        if self.read_your_writes and WRITE_STATEMENT.match(query):
+            g.db_wrote = True
+        return super().execute(query, args)
+
+class RequestCursor(_RequestCursorMixin, pymysql.cursors.Cursor):
+    pass
+
+class RequestDictCursor(_RequestCursorMixin, pymysql.cursors.DictCursor):
+    pass
+
+class RequestSSCursor(_RequestCursorMixin, pymysql.cursors.SSCursor):
+    pass
+
+def _reads_pinned_to_primary():
+    """True for a short window after this session wrote, so it reads its own writes"""
+    return session.get('db_primary_until', 0) > time.time()
+
+def get_db(readonly=False):
+    """
+    Get the request-scoped database connection (one pool checkout per request)
+    
+    readonly=True routes to a healthy read replica when one is configured, unless
+    this request already holds the primary or the session wrote recently.
+    """
+    if readonly:
+        if 'db_replica' not in g and 'db' not in g:
+            g.db_replica = None if _reads_pinned_to_primary() else replica_set.get_connection()
+        if g.get('db_replica') is not None:
+            return g.db_replica
+    
+    if 'db' not in g:
+        g.db = get_db_connection()
+    return g.db
+
+def get_cursor(dict_rows=False, readonly=False, read_your_writes=True, unbuffered=False):
+    """
+    Get a cursor on the request-scoped connection; closed automatically at teardown
+    
+    Writes through a cursor pin this session's reads to the primary for
+    DB_READ_YOUR_WRITES_WINDOW seconds; pass read_your_writes=False for writes the
+    user never reads back (e.g. view counters).
+    
+    unbuffered=True returns a server-side (SSCursor) tuple cursor for large result
+    sets; it must be read to the end before the connection runs another query.
+    """
+    connection = get_db(readonly=readonly)
+    if unbuffered:
+        cursor_class = RequestSSCursor
+    else:
+        cursor_class = RequestDictCursor if dict_rows else RequestCursor
+    cursor = connection.cursor(cursor_class)
+    cursor.read_your_writes = read_your_writes
+    g.setdefault('db_cursors', []).append(cursor)
+    return cursor
+
+def _story_type_cursor():
+    return get_cursor(dict_rows=True, readonly=True)
+
+def get_story_type_catalog():
+    """Cached story types (tags WHERE category_id = 1); queries only on a cache miss"""
+    return tag_catalog.get(_story_type_cursor)
+
+def resolve_story_type(value):
+    """Map a submitted story_type (tag id or name) to a tag id, or None if unknown"""
+    return tag_catalog.resolve(value, _story_type_cursor)
+
+def get_published_counts():
+    """Cached published story totals per story type / language group (None until the first count)"""
+    return published_counts.get()
+
+# Story changes recount the published totals and refresh the caches built from the cards
+story_cards.add_listener(published_counts.invalidate)
+story_cards.add_listener(suggest_index.mark_dirty)
+story_cards.add_listener(top_stories.discard)
+story_cards.add_listener(featured_stories.invalidate)
+story_cards.add_listener(content_version.expire)
+if Config.SEARCH_BACKEND == 'memory':
+    story_search.use_index(search_index)
+    story_cards.add_listener(search_index.mark_dirty)
+
+_background_workers_pid = None
+
+@app.before_request
+def start_background_workers():
+    """
+    Start this worker's background threads with its first request
+
+    Not at import: CLI commands and start.py import the app before the schema
+    is migrated, and a gunicorn --preload master never serves requests.
+    """
+    global _background_workers_pid
+    if _background_workers_pid == os.getpid():
+        return
+    _background_workers_pid = os.getpid()
+
+    # Published totals are counted in a background thread; story changes trigger a recount
+    published_counts.start(get_db_connection)
+    # Story views are buffered per worker and flushed to story_stats in the background (and at exit)
+    view_counter.start(get_db_connection)
+    # Likes go to story_like_shards; the rollup thread moves them into stories.like_count
+    like_counter.start(get_db_connection)
+    # Typeahead index: built now and kept current by a background thread
+    suggest_index.start(get_read_connection,
+                        lambda connection: tag_catalog.get(lambda: connection.cursor(pymysql.cursors.DictCursor)))
+    # In-memory search backend: loaded and kept in sync by a background thread
+    if Config.SEARCH_BACKEND == 'memory':
+        search_index.start(get_read_connection)
+
+@app.after_request
+def pin_reads_after_write(response):
+    """Send this session's reads to the primary while replicas catch up"""
+    if g.get('db_wrote') and replica_set.pools:
+        session['db_primary_until'] = time.time() + Config.DB_READ_YOUR_WRITES_WINDOW
+    return response
+
+@app.teardown_appcontext
+def release_db(exception):
+    """Close request cursors, return the connections to their pools and notify story_cards listeners"""
+    for cursor in g.pop('db_cursors', []):
+        try:
+            cursor.close()
+        except Exception:
+            pass
+    
+    for name in ('db', 'db_replica'):
+        connection = g.pop(name, None)
+        if connection is None:
+            continue
+        if exception is not None:
+            try:
+                connection.rollback()
+            except Exception as e:
+                logger.warning(f"Rollback on teardown failed: {e}")
+        connection.close()
+    
+    # The request's transaction is closed, so caches reloading the cards see its changes
+    story_cards.flush()
+
+@app.teardown_request
+def record_query_stats(exception):
+    """Fold this request's query log into the per-route statistics"""
+    query_log = g.pop('query_log', None)
+    if query_log:
+        query_stats.record_request(request.endpoint or request.path, query_log)
 
 # Admin authentication
 ADMIN_USERNAME = 'admin'
@@ -129,6 +306,167 @@ def get_client_ip():
     else:
         return request.remote_addr
 
+def get_viewer_key():
+    """Stable key for unique-viewer counting: the user, or the anonymous visitor's IP and browser"""
+    if current_user.is_authenticated:
+        return f"user:{current_user.id}"
+    # Only its hash reaches the sketch; the IP itself is never stored
+    return f"anon:{get_client_ip()}|{request.headers.get('User-Agent', '')}"
+
+def _page_cacheable():
+    """Anonymous reader GET with nothing session-specific to render (flash messages, admin login)"""
+    return (request.method == 'GET' and not current_user.is_authenticated
+            and not session.get('admin_logged_in') and '_flashes' not in session)
+
+def cached_page(on_hit=None):
+    """
+    Decorator: serve anonymous readers the view's rendered response from page_cache
+    
+    The key is the endpoint, its URL arguments, the query string and the content
+    version, so publishing, editing or moderating any story retires every cached
+    page. Only 200 responses that left the session untouched are stored, and not
+    pages a view marked g.page_incomplete (rendered before a cache was loaded).
+    
+    Args:
+        on_hit (callable): Called with the view's arguments when a cached page is
+            served (work that must happen per request, e.g. counting a view)
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated_function(*args, **kwargs):
+            if not page_cache.enabled or not _page_cacheable():
+                return view(*args, **kwargs)
+            version = content_version.current(lambda: get_cursor(readonly=True))
+            if version is None:
+                return view(*args, **kwargs)
+            
+            key = (request.endpoint, tuple(sorted(kwargs.items())),
+                   tuple(sorted(request.args.items(multi=True))), version)
+            cached = page_cache.get(key)
+            if cached is not None:
+                if on_hit:
+                    on_hit(*args, **kwargs)
+                body, headers = cached
+                return app.response_class(body, headers=headers)
+            
+            response = app.make_response(view(*args, **kwargs))
+            if (response.status_code == 200 and not session.modified and '_flashes' not in session
+                    and not g.get('page_incomplete')):
+                headers = [(name, value) for name, value in response.headers
+                           if name.lower() not in ('set-cookie', 'content-length')]
+                page_cache.set(key, (response.get_data(), headers))
+            return response
+        return decorated_function
+    return decorator
+
+def make_etag(*parts):
+    """Opaque validator from the values a response was built from"""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:24]
+
+def set_validators(response, etag, last_modified=None):
+    """Weak ETag / Last-Modified on a per-user response that browsers must revalidate"""
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
+
+def conditional_get(validators, on_not_modified=None):
+    """
+    Decorator: answer a revalidation with 304 before the view runs its queries
+    
+    Args:
+        validators (callable): Called with the view's arguments; returns
+            (etag, last_modified or None) from a cheap probe, or None to let the
+            view handle the request (e.g. the story does not exist)
+        on_not_modified (callable): Called with the view's arguments when a 304
+            is sent (work that must happen per request, e.g. counting a view)
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET' or '_flashes' in session:
+                return view(*args, **kwargs)
+            try:
+                result = validators(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"Validator probe for {request.endpoint} failed: {e}")
+                result = None
+            if result is None:
+                return view(*args, **kwargs)
+            
+            etag, last_modified = result
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                if on_not_modified:
+                    on_not_modified(*args, **kwargs)
+                return set_validators(app.response_class(status=304), etag, last_modified)
+            
+            response = app.make_response(view(*args, **kwargs))
+            # A page rendered before a cache was loaded must not be revalidated as current
+            if response.status_code == 200 and not g.get('page_incomplete'):
+                set_validators(response, etag, last_modified)
+            return response
+        return decorated_function
+    return decorator
+
+def _viewer_state():
+    """Who the page is rendered for (navigation differs per user); part of page ETags"""
+    return current_user.get_id() or 'anonymous'
+
+def _story_detail_validators(story_id):
+    version = content_version.current(lambda: get_cursor(readonly=True))
+    if version is None:
+        return None
+    # Card changes bump the content version, so updated_at is fixed for a given version
+    key = ('story_updated_at', story_id, version)
+    updated_at = fragment_cache.get(key)
+    if updated_at is None:
+        cursor = get_cursor(readonly=True)
+        cursor.execute("""
+            SELECT updated_at FROM story_cards
+            WHERE story_id = %s AND status = 'published' AND deleted_at IS NULL
+        """, (story_id,))
+        row = cursor.fetchone()
+        if not row or not row[0]:
+            return None
+        updated_at = row[0]
+        fragment_cache.set(key, updated_at)
+    return make_etag('story', story_id, updated_at, version, _viewer_state()), updated_at
+
+def _story_library_validators():
+    version = content_version.current(lambda: get_cursor(readonly=True))
+    if version is None:
+        return None
+    # The ETag applies to this URL, so filters and cursor need not be part of it
+    return make_etag('story_library', version, _viewer_state()), None
+
+def _user_stories_validators():
+    cursor = get_cursor(readonly=True)
+    cursor.execute("""
+        SELECT COUNT(*), MAX(updated_at), SUM(view_count), SUM(like_count)
+        FROM story_cards
+        WHERE user_id = %s
+    """, (current_user.id,))
+    count, updated_at, views, likes = cursor.fetchone()
+    return make_etag('user_stories', current_user.id, count, updated_at, views, likes), updated_at
+
+def render_fragment(key, render):
+    """
+    Rendered HTML for key from fragment_cache, calling render() on a miss
+    
+    Args:
+        key (tuple): Cache key; None renders without caching
+        render (callable): Returns the HTML string (queries and render_template)
+    """
+    html = fragment_cache.get(key) if key is not None else None
+    if html is None:
+        html = Markup(render())
+        if key is not None:
+            fragment_cache.set(key, html)
+    return html
+
 def admin_required(f):
     """Decorator to require admin authentication"""
     @wraps(f)
@@ -176,34 +514,13 @@ def _get_user_friendly_error(error_msg):
         return f'语音识别失败：{error_msg}。请检查音频文件质量，或稍后重试。'
 
 @app.route('/')
+@cached_page()
 def index():
     """Home page"""
     try:
-        # 获取访问量前三的已发布故事
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
-        cursor.execute("""
-            SELECT s.id, s.title, s.description, s.image_path, s.view_count, 
-                   s.created_at, s.published_at, u.username,
-                   COALESCE(s.description, LEFT(s.content, 200)) as excerpt
-            FROM stories s
-            JOIN users u ON s.user_id = u.id
-            WHERE s.status = 'published' AND s.deleted_at IS NULL
-            ORDER BY s.view_count DESC, s.published_at DESC
-            LIMIT 3
-        """)
-        
-        featured_stories = cursor.fetchall()
-        
-        # Process stories data to generate proper image URLs
-        for story in featured_stories:
-            story['image_url'] = image_service.get_image_url(story['image_path']) if story['image_path'] else None
-        
-        cursor.close()
-        connection.close()
-        
-        return render_template('index.html', featured_stories=featured_stories)
+        # 获取访问量前三的已发布故事 (cached in memory and reloaded in the background)
+        # StoryCard rows expose image_url and username for the template
+        return render_template('index.html', featured_stories=featured_stories.get(get_db_connection))
         
     except Exception as e:
         logger.error(f"Error fetching featured stories: {e}")
@@ -252,8 +569,8 @@ def register():
             return render_template('register.html')
         
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor()
+            connection = get_db()
+            cursor = get_cursor()
             
             # Check if username already exists
             cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
@@ -283,10 +600,6 @@ def register():
         except Exception as e:
             flash(f'Registration failed: {str(e)}', 'error')
             return render_template('register.html')
-        finally:
-            if 'connection' in locals() and connection.open:
-                cursor.close()
-                connection.close()
     
     return render_template('register.html')
 
@@ -302,8 +615,8 @@ def login():
             return render_template('login.html')
         
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor()
+            connection = get_db()
+            cursor = get_cursor()
             
             # Get user from database
             cursor.execute("""
@@ -314,13 +627,8 @@ def login():
             user_data = cursor.fetchone()
             
             if user_data and bcrypt.checkpw(password.encode('utf-8'), user_data[3].encode('utf-8')):
-                # Update last login time - first ensure column exists
+                # Update last login time (column added by migration 0002)
                 try:
-                    cursor.execute("SHOW COLUMNS FROM users LIKE 'last_login'")
-                    if not cursor.fetchone():
-                        cursor.execute("ALTER TABLE users ADD COLUMN last_login DATETIME NULL")
-                    
-                    # Update last login time
                     cursor.execute("""
                         UPDATE users 
                         SET last_login = %s 
@@ -347,10 +655,6 @@ def login():
                 
         except Exception as e:
             flash(f'Login failed: {str(e)}', 'error')
-        finally:
-            if 'connection' in locals() and connection.open:
-                cursor.close()
-                connection.close()
     
     return render_template('login.html')
 
@@ -359,45 +663,27 @@ def login():
 def my_stories():
     """用户的故事管理页面 - User's story management page"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(readonly=True)
         
         # 获取当前用户的所有故事
-        cursor.execute("""
-            SELECT 
-                s.id,
-                s.title,
-                s.description,
-                s.content,
-                s.status,
-                s.image_path,
-                s.created_at,
-                s.updated_at,
-                s.view_count,
-                s.like_count,
-                GROUP_CONCAT(t.name) as categories
-            FROM stories s
-            LEFT JOIN story_tags st ON s.id = st.story_id
-            LEFT JOIN tags t ON st.tag_id = t.id
-            WHERE s.user_id = %s
-            GROUP BY s.id, s.title, s.description, s.content, s.status, s.image_path, s.created_at, s.updated_at, s.view_count, s.like_count
-            ORDER BY s.created_at DESC
+        cursor.execute(f"""
+            SELECT {STORY_CARD_COLUMNS}
+            FROM story_cards
+            WHERE user_id = %s
+            ORDER BY created_at DESC
         """, (current_user.id,))
         
-        stories = cursor.fetchall()
+        stories = fetch_all(cursor, StoryCard)
         
         # 计算统计数据 - 三种状态：待审核、通过审核、未通过审核
         stats = {
             'total': len(stories),
-            'published': len([s for s in stories if s['status'] == 'published']),
-            'pending': len([s for s in stories if s['status'] == 'pending']),
-            'rejected': len([s for s in stories if s['status'] == 'rejected']),
-            'total_views': sum(s['view_count'] or 0 for s in stories)
+            'published': len([s for s in stories if s.status == 'published']),
+            'pending': len([s for s in stories if s.status == 'pending']),
+            'rejected': len([s for s in stories if s.status == 'rejected']),
+            'total_views': sum(s.view_count or 0 for s in stories)
         }
         
-        cursor.close()
-        connection.close()
-        
         return render_template('my_stories.html', 
                              user=current_user, 
                              stories=stories, 
@@ -428,8 +714,8 @@ def profile():
         bio = request.form.get('bio')
         
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor()
+            connection = get_db()
+            cursor = get_cursor()
             
             # Update user profile
             cursor.execute("""
@@ -447,10 +733,6 @@ def profile():
             
         except Exception as e:
             flash(f'Profile update failed: {str(e)}', 'error')
-        finally:
-            if 'connection' in locals() and connection.open:
-                cursor.close()
-                connection.close()
     
     return render_template('profile.html', user=current_user)
 
@@ -529,8 +811,8 @@ def change_password():
             }), 400
         
         # Get user from database and verify current password
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
         
         cursor.execute("""
             SELECT password_hash FROM users WHERE id = %s
@@ -573,10 +855,6 @@ def change_password():
             'success': False,
             'error': 'An error occurred while updating password'
         }), 500
-    finally:
-        if 'connection' in locals() and connection.open:
-            cursor.close()
-            connection.close()
 
 @app.route('/forgot-password', methods=['GET', 'POST'])
 def forgot_password():
@@ -618,8 +896,8 @@ def forgot_password():
             }), 400
         
         # Check if user exists
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
         
         cursor.execute("""
             SELECT id, username FROM users WHERE email = %s
@@ -643,8 +921,6 @@ def forgot_password():
             """, (user_id, reset_token, expires_at))
             
             connection.commit()
-            cursor.close()
-            connection.close()
             
             # Direct redirect to reset password page
             return jsonify({
@@ -653,9 +929,6 @@ def forgot_password():
                 'message': f'邮箱验证成功！正在跳转到密码重置页面...'
             })
         else:
-            cursor.close()
-            connection.close()
-            
             return jsonify({
                 'success': False,
                 'error': '该邮箱地址未注册，请检查后重试'
@@ -667,18 +940,13 @@ def forgot_password():
             'success': False,
             'error': 'Service temporarily unavailable, please try again later'
         }), 500
-    finally:
-        if 'connection' in locals() and connection.open:
-            cursor.close()
-            connection.close()
 
 @app.route('/reset-password/<token>')
 def reset_password(token):
     """Password reset page with token validation"""
     try:
         # Validate token exists and is not expired
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        cursor = get_cursor()
         
         cursor.execute("""
             SELECT prt.id, prt.user_id, prt.expires_at, prt.used, u.username, u.email
@@ -706,9 +974,6 @@ def reset_password(token):
             flash('This reset link has already been used', 'error')
             return redirect(url_for('login'))
         
-        cursor.close()
-        connection.close()
-        
         # Token is valid, show reset password form
         return render_template('reset_password.html', token=token, username=username)
         
@@ -716,10 +981,6 @@ def reset_password(token):
         print(f"Password reset page error: {str(e)}")
         flash('Service temporarily unavailable, please try again later', 'error')
         return redirect(url_for('forgot_password'))
-    finally:
-        if 'connection' in locals() and connection.open:
-            cursor.close()
-            connection.close()
 
 @app.route('/api/reset-password', methods=['POST'])
 def reset_password_api():
@@ -773,8 +1034,8 @@ def reset_password_api():
             }), 400
         
         # Validate token and get user info
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
         
         cursor.execute("""
             SELECT prt.id, prt.user_id, prt.expires_at, prt.used, u.username
@@ -842,10 +1103,6 @@ def reset_password_api():
             'success': False,
             'error': '密码重置失败，请重试'
         }), 500
-    finally:
-        if 'connection' in locals() and connection.open:
-            cursor.close()
-            connection.close()
 
 @app.route('/record')
 @login_required
@@ -858,8 +1115,7 @@ def record_story():
 def api_users():
     """API endpoint to get all users (for admin/testing)"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        cursor = get_cursor(readonly=True)
         
         cursor.execute("""
             SELECT id, username, email, phone_number, bio, created_at 
@@ -881,10 +1137,6 @@ def api_users():
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if 'connection' in locals() and connection.open:
-            cursor.close()
-            connection.close()
 
 @app.route('/api/transcribe', methods=['POST'])
 @login_required
@@ -1060,60 +1312,52 @@ def publish_story():
     """Story publishing page"""
     return render_template('publish_story.html')
 
+def _count_story_view(story_id):
+    view_counter.add(story_id, get_viewer_key())
+
 @app.route('/story/<int:story_id>')
+@conditional_get(_story_detail_validators, on_not_modified=_count_story_view)
+@cached_page(on_hit=_count_story_view)
 def story_detail(story_id):
     """故事详情页面 - Story detail page"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(readonly=True)
         
         # 获取故事详情和作者信息
-        cursor.execute("""
-            SELECT 
-                s.id, s.title, s.content, s.description, s.language_name,
-                s.image_path, s.image_original_name, s.reading_time, s.word_count,
-                s.status, s.view_count, s.like_count, s.created_at, s.updated_at, s.published_at,
-                u.username as author, u.bio as author_bio,
-                GROUP_CONCAT(t.name) as categories
+        cursor.execute(f"""
+            SELECT {STORY_COLUMNS}
             FROM stories s
             JOIN users u ON s.user_id = u.id
-            LEFT JOIN story_tags st ON s.id = st.story_id
-            LEFT JOIN tags t ON st.tag_id = t.id
-            WHERE s.id = %s AND s.status = 'published'
-            GROUP BY s.id, s.title, s.content, s.description, s.language_name,
-                     s.image_path, s.image_original_name, s.reading_time, s.word_count,
-                     s.status, s.view_count, s.like_count, s.created_at, s.updated_at, s.published_at,
-                     u.username, u.bio
+            LEFT JOIN story_cards c ON c.story_id = s.id
+            WHERE s.id = %s AND s.status = 'published' AND s.deleted_at IS NULL
         """, (story_id,))
         
-        story = cursor.fetchone()
+        story = fetch_one(cursor, Story)
         
         if not story:
             flash('Story does not exist or is not published yet', 'error')
             return redirect(url_for('story_library'))
         
-        # 更新浏览次数
-        cursor.execute("UPDATE stories SET view_count = view_count + 1 WHERE id = %s", (story_id,))
-        connection.commit()
-        story['view_count'] = (story['view_count'] or 0) + 1
+        # 更新浏览次数 (buffered in this worker; view_counter writes story_stats every few seconds)
+        story = story._replace(view_count=(story.view_count or 0) + view_counter.add(story_id, get_viewer_key()))
+        top_stories.record_view(story_id, story.view_count, story.published_at)
         
-        # 获取相关故事推荐（同标签或同作者）
-        cursor.execute("""
-            SELECT s.id, s.title, s.image_path, s.view_count, s.like_count
-            FROM stories s
-            WHERE s.id != %s AND s.status = 'published'
-            ORDER BY s.view_count DESC, s.created_at DESC
-            LIMIT 3
-        """, (story_id,))
+        # 正文按故事版本缓存 (rendered once per edit and shared by every reader)
+        story_body_html = render_fragment(
+            ('story_body', story_id, story.updated_at),
+            lambda: render_template('_story_content.html', story=story))
         
-        related_stories = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
+        # 获取相关故事推荐 (most viewed other stories, from the in-memory top-K; cached per content version)
+        version = content_version.current(lambda: cursor)
+        related_stories_html = render_fragment(
+            ('related_stories', story_id, version) if version is not None else None,
+            lambda: render_template('_related_stories.html',
+                                    related_stories=top_stories.top(cursor, 3, exclude=[story_id])))
         
         return render_template('story_detail.html', 
                              story=story, 
-                             related_stories=related_stories)
+                             story_body_html=story_body_html,
+                             related_stories_html=related_stories_html)
         
     except Exception as e:
         print(f"Error fetching story detail: {e}")
@@ -1121,80 +1365,98 @@ def story_detail(story_id):
         return redirect(url_for('story_library'))
 
 @app.route('/story_library')
+@conditional_get(_story_library_validators)
+@cached_page()
 def story_library():
-    """Story library page showing all published stories"""
+    """Story library page showing published stories, newest first, one page at a time"""
     try:
-        connection = pymysql.connect(**DB_CONFIG)
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(readonly=True)
         
-        # Get all published stories with user info and tags
-        cursor.execute("""
-            SELECT 
-                s.id,
-                s.title,
-                s.description,
-                s.image_path,
-                s.created_at,
-                s.view_count,
-                s.like_count,
-                u.username as author,
-                GROUP_CONCAT(t.name) as categories
-            FROM stories s
-            JOIN users u ON s.user_id = u.id
-            LEFT JOIN story_tags st ON s.id = st.story_id
-            LEFT JOIN tags t ON st.tag_id = t.id
-            WHERE s.status = 'published'
-            GROUP BY s.id, s.title, s.description, s.image_path, s.created_at, s.view_count, s.like_count, u.username
-            ORDER BY s.created_at DESC
-        """)
+        # Filters are applied in SQL; cursor is the "load more" continuation token
+        category = request.args.get('category', '').strip()
+        language = request.args.get('language', '').strip()[:20]
+        token = request.args.get('cursor', '').strip()
+        search_query = request.args.get('q', '').strip()[:200]
+        author = request.args.get('author', '').strip()[:50] if not search_query else ''
         
-        stories = cursor.fetchall()
+        catalog = get_story_type_catalog()
+        tag_id = catalog.by_name.get(category) if category else None
         
-        # Get unique categories for filtering
-        cursor.execute("""
-            SELECT DISTINCT t.name
-            FROM tags t
-            JOIN story_tags st ON t.id = st.tag_id
-            JOIN stories s ON st.story_id = s.id
-            WHERE s.status = 'published'
-            ORDER BY t.name
-        """)
+        user_id = None
+        if author:
+            cursor.execute("SELECT id FROM users WHERE username = %s", (author,))
+            row = cursor.fetchone()
+            user_id = row[0] if row else None
+        
+        try:
+            after = decode_page_token(token) if token else None
+        except ValueError:
+            after = None  # garbled or outdated link: start from the newest stories
+        
+        if (category and tag_id is None) or (author and user_id is None):
+            stories, next_cursor = [], None
+        elif search_query:
+            # Search results are ranked by relevance, so they come as one page without "load more"
+            stories = story_search.search(cursor, search_query, limit=Config.SEARCH_RESULT_LIMIT,
+                                          tag_id=tag_id, language_group=language or None)
+            next_cursor = None
+        else:
+            stories, next_cursor = fetch_published_cards(
+                cursor, Config.STORY_LIBRARY_PAGE_SIZE, after=after,
+                tag_id=tag_id, language_group=language or None, user_id=user_id
+            )
         
-        categories = [row['name'] for row in cursor.fetchall()]
+        # "Load more" requests get just the next cards; the token for the page after rides in a header
+        if request.args.get('partial') == '1':
+            response = app.make_response(render_template('_story_library_cards.html', stories=stories))
+            if next_cursor:
+                response.headers['X-Next-Cursor'] = next_cursor
+            return response
+        
+        # Filter buttons and totals come from the cached counts, not COUNT(*) per request
+        counts = get_published_counts()
+        if counts is None:
+            # The worker's first count has not finished; render without filters and don't cache the page
+            g.page_incomplete = True
+            counts = PublishedCountsSnapshot({}, {})
+        categories = sorted(
+            (story_type['name'], counts.count(tag_id=story_type['id']))
+            for story_type in catalog.types if counts.count(tag_id=story_type['id'])
+        )
+        languages = sorted((group, count) for group, count in counts.by_language.items() if group)
         
-        return render_template('story_library.html', stories=stories, categories=categories)
+        return render_template('story_library.html',
+                             stories=stories,
+                             categories=categories,
+                             languages=languages,
+                             current_category=category,
+                             current_language=language,
+                             search_query=search_query,
+                             current_author=author,
+                             next_cursor=next_cursor,
+                             # The cached counts are not kept per author, so author pages show no total
+                             total_count=len(stories) if search_query
+                                         else None if author or g.get('page_incomplete')
+                                         else 0 if category and tag_id is None
+                                         else counts.count(tag_id=tag_id, language_group=language or None))
         
     except Exception as e:
         flash(f'Error loading story library: {str(e)}', 'error')
         return redirect(url_for('index'))
-    finally:
-        if 'connection' in locals():
-            connection.close()
 
 @app.route('/api/get_story_types')
 @login_required  
+@conditional_get(lambda: (make_etag('story_types', get_story_type_catalog().etag), None))
 def get_story_types():
     """Get simplified story types for story publishing"""
     try:
-        connection = pymysql.connect(**DB_CONFIG)
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
-        # Get all story types (simplified tags)
-        cursor.execute("""
-            SELECT id, name, description, usage_count
-            FROM tags 
-            WHERE category_id = 1
-            ORDER BY id
-        """)
-        
-        story_types = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
+        # Get all story types (simplified tags) from the in-process catalog cache;
+        # browsers revalidate with If-None-Match and get a 304 while it is unchanged
+        catalog = get_story_type_catalog()
         
         return jsonify({
             'success': True,
-            'story_types': story_types
+            'story_types': catalog.types
         })
         
     except Exception as e:
@@ -1273,8 +1535,8 @@ def submit_feedback():
             feedback_type = 'general'
         
         # Insert feedback into database
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
         
         cursor.execute("""
             INSERT INTO user_feedback (user_id, content, feedback_type)
@@ -1284,9 +1546,6 @@ def submit_feedback():
         connection.commit()
         feedback_id = cursor.lastrowid
         
-        cursor.close()
-        connection.close()
-        
         return jsonify({
             'success': True,
             'message': 'Feedback submitted successfully',
@@ -1408,6 +1667,15 @@ def publish_story_api():
                 'suggestion': 'Record your story on the previous page, or if Gemini AI enhancement failed, you can still submit with raw transcript.'
             }), 400
         
+        # Validate story type against the cached catalog (no query on a cache hit)
+        story_type_id = resolve_story_type(story_type) if story_type else None
+        if story_type and story_type_id is None:
+            logger.warning(f"Unknown story type: {story_type}")
+            return jsonify({
+                'success': False,
+                'error': 'Invalid story type'
+            }), 400
+        
         # Calculate word count and reading time
         word_count = len(content.replace(' ', '')) if any('\u4e00' <= char <= '\u9fff' for char in content) else len(content.split())
         reading_time = max(1, word_count // (200 if language.startswith('zh') else 250))
@@ -1435,8 +1703,11 @@ def publish_story_api():
         
         # Insert story into database
         logger.info("Connecting to database for story insertion")
-        connection = pymysql.connect(**DB_CONFIG)
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
+        
+        # The story, its tag, its card and the content version commit together
+        connection.begin()
         
         # Insert story
         logger.info("Inserting story into database")
@@ -1457,19 +1728,18 @@ def publish_story_api():
         print(f"✅ Story inserted with ID: {story_id}")
         
         # Insert story type (single tag)
-        if story_type and story_type.isdigit():
-            print(f"🏷️  Adding story type: {story_type}")
-            cursor.execute("INSERT INTO story_tags (story_id, tag_id) VALUES (%s, %s)", (story_id, int(story_type)))
+        if story_type_id:
+            print(f"🏷️  Adding story type: {story_type_id}")
+            cursor.execute("INSERT INTO story_tags (story_id, tag_id) VALUES (%s, %s)", (story_id, story_type_id))
             
             # Update tag usage count
-            cursor.execute("UPDATE tags SET usage_count = usage_count + 1 WHERE id = %s", (int(story_type),))
+            cursor.execute("UPDATE tags SET usage_count = usage_count + 1 WHERE id = %s", (story_type_id,))
             print("✅ Story type added")
         else:
             print(f"⚠️  No valid story type provided: {story_type}")
         
+        story_cards.refresh(cursor, [story_id])
         connection.commit()
-        cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True,
@@ -1488,43 +1758,25 @@ def publish_story_api():
 
 @app.route('/api/get_user_stories')
 @login_required
+@conditional_get(_user_stories_validators)
 def get_user_stories():
     """Get current user's stories"""
     try:
-        connection = pymysql.connect(**DB_CONFIG)
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(readonly=True)
         
-        cursor.execute("""
-            SELECT s.id, s.title, s.description, s.language_name, s.word_count, 
-                   s.reading_time, s.status, s.view_count, s.like_count,
-                   s.created_at, s.updated_at, s.published_at, s.image_path,
-                   GROUP_CONCAT(t.name) as tags
-            FROM stories s
-            LEFT JOIN story_tags st ON s.id = st.story_id
-            LEFT JOIN tags t ON st.tag_id = t.id
-            WHERE s.user_id = %s
-            GROUP BY s.id
-            ORDER BY s.created_at DESC
+        cursor.execute(f"""
+            SELECT {STORY_CARD_COLUMNS}
+            FROM story_cards
+            WHERE user_id = %s
+            ORDER BY created_at DESC
         """, (current_user.id,))
         
-        stories = cursor.fetchall()
-        
-        # Process stories data
-        for story in stories:
-            story['tags'] = story['tags'].split(',') if story['tags'] else []
-            story['image_url'] = image_service.get_image_url(story['image_path']) if story['image_path'] else None
-            
-            # Format dates
-            for date_field in ['created_at', 'updated_at', 'published_at']:
-                if story[date_field]:
-                    story[date_field] = story[date_field].isoformat()
-        
-        cursor.close()
-        connection.close()
+        stories = fetch_all(cursor, StoryCard)
         
+        # to_dict() splits tags, adds image_url and formats dates
         return jsonify({
             'success': True,
-            'stories': stories
+            'stories': [story.to_dict() for story in stories]
         })
         
     except Exception as e:
@@ -1538,6 +1790,175 @@ def get_user_stories():
             'error': f'Failed to load stories: {str(e)}'
         }), 500
 
+def requested_card_fields():
+    """
+    Story keys selected by the fields= query arg (all public keys when absent)
+    
+    Raises:
+        ValueError: fields names a key that is not a public story key, or is empty
+    """
+    if not request.args.get('fields'):
+        return PUBLIC_STORY_CARD_FIELDS
+    fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+    unknown = [field for field in fields if field not in PUBLIC_STORY_CARD_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if not fields:
+        raise ValueError('No fields requested')
+    return fields
+
+@app.route('/api/v1/stories')
+def api_v1_stories():
+    """
+    Published stories feed for API clients, newest first
+    
+    Query args: cursor (next_cursor of the previous page), limit, tag (name or id),
+    language (language group, e.g. 'en'), author (username), fields (comma-separated
+    subset of the story keys, e.g. fields=id,title,thumbnail_url)
+    """
+    try:
+        try:
+            fields = requested_card_fields()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'available_fields': list(PUBLIC_STORY_CARD_FIELDS)
+            }), 400
+        
+        try:
+            limit = int(request.args.get('limit', Config.API_STORIES_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+        limit = max(1, min(limit, Config.API_STORIES_MAX_PAGE_SIZE))
+        
+        token = request.args.get('cursor', '').strip()
+        try:
+            after = decode_page_token(token) if token else None
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        
+        tag = request.args.get('tag', '').strip()
+        language = request.args.get('language', '').strip()[:20]
+        author = request.args.get('author', '').strip()
+        
+        cursor = get_cursor(readonly=True)
+        
+        # Unknown tags and authors match nothing rather than being ignored
+        tag_id = get_story_type_catalog().resolve(tag) if tag else None
+        user_id = None
+        if author:
+            cursor.execute("SELECT id FROM users WHERE username = %s", (author,))
+            row = cursor.fetchone()
+            user_id = row[0] if row else None
+        
+        if (tag and tag_id is None) or (author and user_id is None):
+            stories, next_cursor = [], None
+        else:
+            stories, next_cursor = fetch_published_cards(
+                cursor, limit, after=after, tag_id=tag_id,
+                language_group=language or None, user_id=user_id
+            )
+        
+        return jsonify({
+            'success': True,
+            'stories': [story.to_dict(fields) for story in stories],
+            'next_cursor': next_cursor
+        })
+        
+    except Exception as e:
+        logger.error(f"Error serving story feed: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to load stories'
+        }), 500
+
+@app.route('/api/suggest')
+def api_suggest():
+    """Typeahead completions (story titles, authors, story types) for a typed prefix"""
+    try:
+        # Answered from memory; a background thread keeps the index current
+        response = jsonify({
+            'success': True,
+            **suggest_index.suggest(request.args.get('q', ''))
+        })
+        response.cache_control.public = True
+        response.cache_control.max_age = 60
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error serving suggestions: {e}")
+        return jsonify({'success': False, 'error': 'Failed to load suggestions'}), 500
+
+@app.route('/api/v1/search')
+def api_v1_search():
+    """
+    Ranked full-text search over published stories
+    
+    Query args: q, tag (name or id), language (language group), limit, offset,
+    fields (as for /api/v1/stories); admins may also pass status (pending, rejected)
+    """
+    try:
+        search_query = request.args.get('q', '').strip()[:200]
+        if not search_query:
+            return jsonify({'success': False, 'error': 'q is required'}), 400
+        
+        try:
+            fields = requested_card_fields()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'available_fields': list(PUBLIC_STORY_CARD_FIELDS)
+            }), 400
+        
+        try:
+            limit = max(1, min(int(request.args.get('limit', Config.API_STORIES_PAGE_SIZE)),
+                               Config.API_STORIES_MAX_PAGE_SIZE))
+            offset = max(0, min(int(request.args.get('offset', 0)), Config.SEARCH_MAX_OFFSET))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit and offset must be integers'}), 400
+        
+        status = 'published'
+        if session.get('admin_logged_in') and request.args.get('status') in ('published', 'pending', 'rejected'):
+            status = request.args['status']
+        
+        tag = request.args.get('tag', '').strip()
+        language = request.args.get('language', '').strip()[:20]
+        tag_id = get_story_type_catalog().resolve(tag) if tag else None
+        
+        cursor = get_cursor(readonly=True)
+        if tag and tag_id is None:
+            stories, facets = [], None
+        else:
+            stories = story_search.search(cursor, search_query,
+                                          limit=limit, offset=offset, status=status,
+                                          tag_id=tag_id, language_group=language or None)
+            # Tag / language counts for the query; only the in-memory backend provides them
+            facets = story_search.facets(cursor, search_query, tag_id=tag_id,
+                                         language_group=language or None) if status == 'published' else None
+        
+        response = {
+            'success': True,
+            'stories': [story.to_dict(fields) for story in stories],
+            'next_offset': offset + limit if len(stories) == limit else None
+        }
+        if facets is not None:
+            catalog = get_story_type_catalog()
+            response['facets'] = {
+                'tags': {catalog.by_id[facet_tag_id]['name']: count
+                         for facet_tag_id, count in facets['tags'].items() if facet_tag_id in catalog.by_id},
+                'languages': {group: count for group, count in facets['languages'].items() if group}
+            }
+        return jsonify(response)
+        
+    except Exception as e:
+        logger.error(f"Error searching stories: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Search failed'
+        }), 500
+
 # =====================================================
 # Admin Management Routes
 # =====================================================
@@ -1573,8 +1994,7 @@ def admin_logout():
 def admin_dashboard():
     """Admin dashboard with statistics"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(dict_rows=True, readonly=True)
         
         # Get system statistics
         stats = {}
@@ -1594,49 +2014,155 @@ def admin_dashboard():
         stats['total_users'] = cursor.fetchone()['count']
         
         # Recent pending stories (last 10, exclude soft-deleted)
-        cursor.execute("""
-            SELECT s.id, s.title, s.created_at, u.username as author
-            FROM stories s
-            JOIN users u ON s.user_id = u.id
-            WHERE s.status = 'pending' AND s.deleted_at IS NULL
-            ORDER BY s.created_at DESC
+        card_cursor = get_cursor(readonly=True)
+        card_cursor.execute(f"""
+            SELECT {STORY_CARD_COLUMNS}
+            FROM story_cards
+            WHERE status = 'pending' AND deleted_at IS NULL
+            ORDER BY created_at DESC
             LIMIT 10
         """)
-        recent_pending = cursor.fetchall()
+        recent_pending = fetch_all(card_cursor, StoryCard)
         
-        # Top viewed published stories (exclude soft-deleted)
-        cursor.execute("""
-            SELECT s.id, s.title, s.view_count, u.username as author
-            FROM stories s
-            JOIN users u ON s.user_id = u.id
-            WHERE s.status = 'published' AND s.deleted_at IS NULL
-            ORDER BY s.view_count DESC
-            LIMIT 5
-        """)
-        top_stories = cursor.fetchall()
+        # Top viewed published stories (exclude soft-deleted), from the in-memory top-K
+        most_viewed = top_stories.top(card_cursor, 5)
         
-        cursor.close()
-        connection.close()
+        # Distinct readers of those stories over the last week (merged HyperLogLog sketches)
+        unique_viewers = view_counter.unique_viewers(card_cursor, [story.id for story in most_viewed], days=7)
         
         return render_template('admin/dashboard.html', 
                              stats=stats,
                              recent_pending=recent_pending,
-                             top_stories=top_stories)
+                             top_stories=most_viewed,
+                             unique_viewers=unique_viewers)
         
     except Exception as e:
         flash(f'Failed to get statistics: {str(e)}', 'error')
         return render_template('admin/dashboard.html', 
                              stats={'stories': {}},
                              recent_pending=[],
-                             top_stories=[])
+                             top_stories=[],
+                             unique_viewers={})
+
+@app.route('/admin/api/db_pool_stats')
+@admin_required
+def admin_db_pool_stats():
+    """Database connection pool metrics for this worker"""
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'pool': db_pool.get_stats(),
+        'replicas': replica_set.get_stats()
+    })
+
+@app.route('/admin/api/query_stats')
+@admin_required
+def admin_query_stats():
+    """Per-route query counts and timings for this worker"""
+    if request.args.get('reset') == '1':
+        query_stats.reset()
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'routes': query_stats.get_stats(top=request.args.get('top', 10, type=int))
+    })
+
+@app.route('/admin/api/tag_catalog', methods=['GET', 'POST'])
+@admin_required
+def admin_tag_catalog():
+    """Story type cache stats for this worker; POST drops the cached catalog"""
+    if request.method == 'POST':
+        tag_catalog.invalidate()
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'tag_catalog': tag_catalog.get_stats()
+    })
+
+@app.route('/admin/api/featured_stories', methods=['GET', 'POST'])
+@admin_required
+def admin_featured_stories():
+    """Home page featured stories cache and top-K tracker stats for this worker; POST reloads them"""
+    if request.method == 'POST':
+        top_stories.discard()
+        featured_stories.invalidate()
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'featured_stories': featured_stories.get_stats(),
+        'top_stories': top_stories.get_stats()
+    })
+
+@app.route('/admin/api/page_cache', methods=['GET', 'POST'])
+@admin_required
+def admin_page_cache():
+    """Rendered page and fragment cache stats for this worker; POST empties both"""
+    if request.method == 'POST':
+        page_cache.clear()
+        fragment_cache.clear()
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'content_version': content_version.get_stats(),
+        'page_cache': page_cache.get_stats(),
+        'fragment_cache': fragment_cache.get_stats()
+    })
+
+@app.route('/admin/api/view_counter', methods=['GET', 'POST'])
+@admin_required
+def admin_view_counter():
+    """Buffered story view stats for this worker; POST flushes the buffer now"""
+    flushed = view_counter.flush() if request.method == 'POST' else 0
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'flushed': flushed,
+        'view_counter': view_counter.get_stats()
+    })
+
+@app.route('/admin/api/like_counter', methods=['GET', 'POST'])
+@admin_required
+def admin_like_counter():
+    """Sharded like counter stats for this worker; POST rolls up every story's slots now"""
+    rolled_up = like_counter.rollup() if request.method == 'POST' else 0
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'rolled_up': rolled_up,
+        'like_counter': like_counter.get_stats()
+    })
+
+@app.route('/admin/api/story_viewers/<int:story_id>')
+@admin_required
+def admin_story_viewers(story_id):
+    """Estimated unique viewers of a story per day and over the window (?days=, default 30)"""
+    days = min(max(request.args.get('days', 30, type=int), 1), 366)
+    cursor = get_cursor(readonly=True)
+    return jsonify({
+        'success': True,
+        'story_id': story_id,
+        'days': days,
+        'unique_viewers': view_counter.unique_viewers(cursor, [story_id], days=days).get(story_id, 0),
+        'daily': view_counter.daily_unique_viewers(cursor, story_id, days=days)
+    })
+
+@app.route('/admin/api/search_index')
+@admin_required
+def admin_search_index():
+    """In-memory search index stats for this worker"""
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'backend': Config.SEARCH_BACKEND,
+        'search_index': search_index.get_stats()
+    })
 
 @app.route('/admin/stories')
 @admin_required
 def admin_stories():
     """Admin story management page"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(dict_rows=True, readonly=True)
         
         # Get filter parameters
         status = request.args.get('status', 'pending')
@@ -1645,23 +2171,16 @@ def admin_stories():
         offset = (page - 1) * per_page
         
         # Get stories with pagination (exclude soft-deleted)
-        cursor.execute("""
-            SELECT s.id, s.title, s.description, s.status, s.created_at, s.updated_at,
-                   s.view_count, s.like_count, s.word_count,
-                   u.username as author, u.email as author_email,
-                   GROUP_CONCAT(t.name) as tags
-            FROM stories s
-            JOIN users u ON s.user_id = u.id
-            LEFT JOIN story_tags st ON s.id = st.story_id
-            LEFT JOIN tags t ON st.tag_id = t.id
-            WHERE s.status = %s AND s.deleted_at IS NULL
-            GROUP BY s.id, s.title, s.description, s.status, s.created_at, s.updated_at,
-                     s.view_count, s.like_count, s.word_count, u.username, u.email
-            ORDER BY s.created_at DESC
+        card_cursor = get_cursor(readonly=True)
+        card_cursor.execute(f"""
+            SELECT {STORY_CARD_COLUMNS}
+            FROM story_cards
+            WHERE status = %s AND deleted_at IS NULL
+            ORDER BY created_at DESC
             LIMIT %s OFFSET %s
         """, (status, per_page, offset))
         
-        stories = cursor.fetchall()
+        stories = fetch_all(card_cursor, StoryCard)
         
         # Get total count for pagination (exclude soft-deleted)
         cursor.execute("SELECT COUNT(*) as count FROM stories WHERE status = %s AND deleted_at IS NULL", (status,))
@@ -1677,9 +2196,6 @@ def admin_stories():
         """)
         status_counts = {stat['status']: stat['count'] for stat in cursor.fetchall()}
         
-        cursor.close()
-        connection.close()
-        
         return render_template('admin/stories.html',
                              stories=stories,
                              current_status=status,
@@ -1703,22 +2219,25 @@ def admin_stories():
 def admin_story_detail(story_id):
     """Admin story detail view"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(dict_rows=True, readonly=True)
         
         # Get story details
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT s.*, u.username as author, u.email as author_email,
-                   GROUP_CONCAT(t.name) as tags
+                   GROUP_CONCAT(t.name) as tags, COALESCE(ss.view_count, 0) as views,
+                   COALESCE(ss.unique_viewers, 0) as unique_viewers,
+                   {PENDING_LIKES_SQL} as pending_likes
             FROM stories s
             JOIN users u ON s.user_id = u.id
             LEFT JOIN story_tags st ON s.id = st.story_id
             LEFT JOIN tags t ON st.tag_id = t.id
+            LEFT JOIN story_stats ss ON ss.story_id = s.id
             WHERE s.id = %s
             GROUP BY s.id, s.title, s.content, s.description, s.status, s.created_at, 
                      s.updated_at, s.published_at, s.view_count, s.like_count, 
                      s.word_count, s.reading_time, s.language, s.language_name,
-                     s.image_path, s.image_original_name, u.username, u.email
+                     s.image_path, s.image_original_name, u.username, u.email,
+                     ss.view_count, ss.unique_viewers
         """, (story_id,))
         
         story = cursor.fetchone()
@@ -1727,8 +2246,10 @@ def admin_story_detail(story_id):
             flash('Story does not exist', 'error')
             return redirect(url_for('admin_stories'))
         
-        cursor.close()
-        connection.close()
+        # stories.view_count is no longer updated; views live in story_stats
+        story['view_count'] = story.pop('views')
+        story['like_count'] = max(0, story['like_count'] + int(story.pop('pending_likes')))
+        story['unique_viewers_7d'] = view_counter.unique_viewers(get_cursor(readonly=True), [story_id], days=7).get(story_id, 0)
         
         return render_template('admin/story_detail.html', story=story)
         
@@ -1742,8 +2263,9 @@ def admin_story_detail(story_id):
 def admin_approve_story(story_id):
     """Approve a story"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
+        connection.begin()
         
         # Update story status to published
         cursor.execute("""
@@ -1753,13 +2275,10 @@ def admin_approve_story(story_id):
         """, (datetime.now(), datetime.now(), story_id))
         
         if cursor.rowcount > 0:
+            story_cards.refresh(cursor, [story_id])
             connection.commit()
-            cursor.close()
-            connection.close()
             return jsonify({'success': True, 'message': '故事已审核通过'})
         else:
-            cursor.close()
-            connection.close()
             return jsonify({'success': False, 'error': 'Story does not exist or status is incorrect'}), 400
             
     except Exception as e:
@@ -1770,8 +2289,9 @@ def admin_approve_story(story_id):
 def admin_reject_story(story_id):
     """Reject a story"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
+        connection.begin()
         
         # Update story status to rejected
         cursor.execute("""
@@ -1781,13 +2301,10 @@ def admin_reject_story(story_id):
         """, (datetime.now(), story_id))
         
         if cursor.rowcount > 0:
+            story_cards.refresh(cursor, [story_id])
             connection.commit()
-            cursor.close()
-            connection.close()
             return jsonify({'success': True, 'message': '故事已被拒绝'})
         else:
-            cursor.close()
-            connection.close()
             return jsonify({'success': False, 'error': 'Story does not exist or status is incorrect'}), 400
             
     except Exception as e:
@@ -1805,8 +2322,9 @@ def admin_batch_action():
         if not action or not story_ids:
             return jsonify({'success': False, 'error': '缺少必要参数'}), 400
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
+        connection.begin()
         
         if action == 'approve':
             # Batch approve stories
@@ -1829,9 +2347,8 @@ def admin_batch_action():
             return jsonify({'success': False, 'error': '无效的操作'}), 400
         
         affected_rows = cursor.rowcount
+        story_cards.refresh(cursor, story_ids)
         connection.commit()
-        cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True, 
@@ -1850,87 +2367,31 @@ def admin_batch_action():
 def like_story(story_id):
     """Like a story - supports both logged in and anonymous users"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
         
         if current_user.is_authenticated:
-            # Logged in user - use database
-            cursor.execute("""
-                SELECT id FROM story_likes 
-                WHERE user_id = %s AND story_id = %s
-            """, (current_user.id, story_id))
+            # Logged in user - toggled atomically on the (user_id, story_id) unique key
+            result = like_store.toggle(connection, cursor, current_user.id, story_id)
+            if result is None:
+                return jsonify({'success': False, 'error': 'Story not found'}), 404
+            action, like_count = result
+        else:
+            # Anonymous user - use session (packed id set, capped at ANONYMOUS_LIKES_MAX)
+            liked_stories = anonymous_likes.load(session)
+            liked = story_id not in liked_stories
             
-            existing_like = cursor.fetchone()
+            like_count = like_store.adjust(connection, cursor, story_id, liked)
+            if like_count is None:
+                return jsonify({'success': False, 'error': 'Story not found'}), 404
             
-            if existing_like:
-                # Unlike: Remove the like
-                cursor.execute("""
-                    DELETE FROM story_likes 
-                    WHERE user_id = %s AND story_id = %s
-                """, (current_user.id, story_id))
-                
-                # Decrease like count
-                cursor.execute("""
-                    UPDATE stories 
-                    SET like_count = GREATEST(0, like_count - 1) 
-                    WHERE id = %s
-                """, (story_id,))
-                
-                action = 'unliked'
-            else:
-                # Like: Add the like
-                cursor.execute("""
-                    INSERT INTO story_likes (user_id, story_id) 
-                    VALUES (%s, %s)
-                """, (current_user.id, story_id))
-                
-                # Increase like count
-                cursor.execute("""
-                    UPDATE stories 
-                    SET like_count = like_count + 1 
-                    WHERE id = %s
-                """, (story_id,))
-                
+            if liked:
+                liked_stories.add(story_id)
                 action = 'liked'
-        else:
-            # Anonymous user - use session
-            if 'liked_stories' not in session:
-                session['liked_stories'] = []
-            
-            if story_id in session['liked_stories']:
-                # Unlike: Remove from session and decrease count
-                session['liked_stories'].remove(story_id)
-                session.modified = True
-                
-                # Decrease like count
-                cursor.execute("""
-                    UPDATE stories 
-                    SET like_count = GREATEST(0, like_count - 1) 
-                    WHERE id = %s
-                """, (story_id,))
-                
-                action = 'unliked'
             else:
-                # Like: Add to session and increase count
-                session['liked_stories'].append(story_id)
-                session.modified = True
-                
-                # Increase like count
-                cursor.execute("""
-                    UPDATE stories 
-                    SET like_count = like_count + 1 
-                    WHERE id = %s
-                """, (story_id,))
-                
-                action = 'liked'
-        
-        # Get updated like count
-        cursor.execute("SELECT like_count FROM stories WHERE id = %s", (story_id,))
-        like_count = cursor.fetchone()[0] or 0
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
+                liked_stories.discard(story_id)
+                action = 'unliked'
+            anonymous_likes.save(session, liked_stories)
         
         return jsonify({
             'success': True,
@@ -1944,35 +2405,62 @@ def like_story(story_id):
             'error': f'点赞操作失败: {str(e)}'
         }), 500
 
+def _liked_story_ids(story_ids):
+    """The given story ids the current visitor has liked (one IN query, or the session for anonymous users)"""
+    if not story_ids:
+        return set()
+    if current_user.is_authenticated:
+        cursor = get_cursor(readonly=True)
+        placeholders = ','.join(['%s'] * len(story_ids))
+        cursor.execute(f"""
+            SELECT story_id FROM story_likes
+            WHERE user_id = %s AND story_id IN ({placeholders})
+        """, [current_user.id] + list(story_ids))
+        return {row[0] for row in cursor.fetchall()}
+    return anonymous_likes.load(session).intersection(story_ids)
+
 @app.route('/api/check_like_status/<int:story_id>')
 def check_like_status(story_id):
     """Check if current user has liked a story - supports both logged in and anonymous users"""
     try:
-        liked = False
+        liked = story_id in _liked_story_ids([story_id])
         
-        if current_user.is_authenticated:
-            # Logged in user - check database
-            connection = get_db_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                SELECT id FROM story_likes 
-                WHERE user_id = %s AND story_id = %s
-            """, (current_user.id, story_id))
-            
-            liked = cursor.fetchone() is not None
-            
-            cursor.close()
-            connection.close()
-        else:
-            # Anonymous user - check session
-            if 'liked_stories' in session:
-                liked = story_id in session['liked_stories']
+        # Polling clients revalidate and get a 304 while the answer is unchanged
+        response = jsonify({
+            'success': True,
+            'liked': liked
+        })
+        set_validators(response, make_etag('liked', story_id, _viewer_state(), liked))
+        return response.make_conditional(request)
         
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'检查点赞状态失败: {str(e)}'
+        }), 500
+
+@app.route('/api/like_status')
+def like_status():
+    """Like state of many stories at once (?ids=1,2,3) - for card grids; answers with the liked ids"""
+    try:
+        story_ids = sorted({int(value) for value in request.args.get('ids', '').split(',') if value.strip()})
+    except ValueError:
+        return jsonify({'success': False, 'error': 'ids must be comma-separated story ids'}), 400
+    if len(story_ids) > Config.LIKE_STATUS_MAX_IDS:
         return jsonify({
+            'success': False,
+            'error': f'At most {Config.LIKE_STATUS_MAX_IDS} story ids per request'
+        }), 400
+    
+    try:
+        liked = sorted(_liked_story_ids(story_ids))
+        
+        response = jsonify({
             'success': True,
             'liked': liked
         })
+        set_validators(response, make_etag('liked', story_ids, _viewer_state(), liked))
+        return response.make_conditional(request)
         
     except Exception as e:
         return jsonify({
@@ -1989,8 +2477,7 @@ def check_like_status(story_id):
 def edit_story(story_id):
     """Edit story page - only for story owner"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(dict_rows=True)
         
         # Get story details and verify ownership
         cursor.execute("""
@@ -2010,16 +2497,7 @@ def edit_story(story_id):
             return redirect(url_for('my_stories'))
         
         # Get available story types
-        cursor.execute("""
-            SELECT id, name, description 
-            FROM tags 
-            WHERE category_id = 1
-            ORDER BY name
-        """)
-        story_types = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
+        story_types = sorted(get_story_type_catalog().types, key=lambda story_type: story_type['name'])
         
         return render_template('edit_story.html', story=story, story_types=story_types)
         
@@ -2044,8 +2522,15 @@ def update_story(story_id):
                 'error': '标题和内容不能为空'
             }), 400
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        story_type_id = resolve_story_type(story_type) if story_type else None
+        if story_type and story_type_id is None:
+            return jsonify({
+                'success': False,
+                'error': '无效的故事类型'
+            }), 400
+        
+        connection = get_db()
+        cursor = get_cursor()
         
         # Verify story ownership
         cursor.execute("""
@@ -2095,20 +2580,21 @@ def update_story(story_id):
         update_query += " WHERE id = %s AND user_id = %s"
         update_params.extend([story_id, current_user.id])
         
+        # The story, its tags, its card and the content version commit together
+        connection.begin()
         cursor.execute(update_query, update_params)
         
         # Update story tags
-        if story_type and story_type.isdigit():
+        if story_type_id:
             # Remove existing tags
             cursor.execute("DELETE FROM story_tags WHERE story_id = %s", (story_id,))
             
             # Add new tag
             cursor.execute("INSERT INTO story_tags (story_id, tag_id) VALUES (%s, %s)", 
-                          (story_id, int(story_type)))
+                          (story_id, story_type_id))
         
+        story_cards.refresh(cursor, [story_id])
         connection.commit()
-        cursor.close()
-        connection.close()
         
         # Determine message based on status change
         if current_status in ['published', 'rejected'] and new_status == 'pending':
@@ -2138,8 +2624,7 @@ def update_story(story_id):
 def admin_users():
     """Admin user management page"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(dict_rows=True, readonly=True)
         
         # Get query parameters
         page = int(request.args.get('page', 1))
@@ -2153,8 +2638,9 @@ def admin_users():
         params = []
         
         if search:
-            where_conditions.append("(u.username LIKE %s OR u.email LIKE %s)")
-            params.extend([f'%{search}%', f'%{search}%'])
+            # FULLTEXT (ngram) match instead of LIKE '%term%', which scanned every user
+            where_conditions.append("MATCH(u.username, u.email) AGAINST(%s IN BOOLEAN MODE)")
+            params.append(boolean_query(search))
         
         if status_filter == 'active':
             where_conditions.append("u.is_active = 1")
@@ -2189,9 +2675,7 @@ def admin_users():
         
         # Get users with story count (exclude soft-deleted stories)
         users_query = f"""
-            SELECT u.id, u.username, u.email, u.created_at, u.last_login,
-                   COALESCE(u.is_active, 1) as is_active,
-                   COUNT(CASE WHEN s.deleted_at IS NULL THEN s.id END) as story_count
+            SELECT {USER_COLUMNS}
             FROM users u
             LEFT JOIN stories s ON u.id = s.user_id
             {where_clause}
@@ -2199,8 +2683,9 @@ def admin_users():
             ORDER BY {order_by}
             LIMIT %s OFFSET %s
         """
-        cursor.execute(users_query, params + [per_page, offset])
-        users = cursor.fetchall()
+        row_cursor = get_cursor(readonly=True)
+        row_cursor.execute(users_query, params + [per_page, offset])
+        users = fetch_all(row_cursor, UserRow)
         
         # Get user statistics
         cursor.execute("""
@@ -2213,9 +2698,6 @@ def admin_users():
         """)
         stats = cursor.fetchone()
         
-        cursor.close()
-        connection.close()
-        
         # Create pagination object
         pagination = {
             'page': page,
@@ -2247,8 +2729,7 @@ def admin_users():
 def admin_get_user(user_id):
     """Get detailed user information"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(dict_rows=True, readonly=True)
         
         # Get user details with story statistics (exclude soft-deleted stories)
         cursor.execute("""
@@ -2257,16 +2738,15 @@ def admin_get_user(user_id):
                    COUNT(CASE WHEN s.deleted_at IS NULL THEN s.id END) as total_stories,
                    SUM(CASE WHEN s.status = 'published' AND s.deleted_at IS NULL THEN 1 ELSE 0 END) as published_stories,
                    SUM(CASE WHEN s.status = 'pending' AND s.deleted_at IS NULL THEN 1 ELSE 0 END) as pending_stories,
-                   COALESCE(SUM(CASE WHEN s.deleted_at IS NULL THEN s.view_count ELSE 0 END), 0) as total_views
+                   COALESCE(SUM(CASE WHEN s.deleted_at IS NULL THEN ss.view_count ELSE 0 END), 0) as total_views
             FROM users u
             LEFT JOIN stories s ON u.id = s.user_id
+            LEFT JOIN story_stats ss ON ss.story_id = s.id
             WHERE u.id = %s
             GROUP BY u.id, u.username, u.email, u.created_at, u.last_login, u.is_active
         """, (user_id,))
         
         user = cursor.fetchone()
-        cursor.close()
-        connection.close()
         
         if not user:
             return jsonify({'success': False, 'message': 'User not found'}), 404
@@ -2290,8 +2770,8 @@ def admin_reset_user_password(user_id):
         # Hash the new password
         password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
         
         # Update user password
         cursor.execute("""
@@ -2302,12 +2782,8 @@ def admin_reset_user_password(user_id):
         
         if cursor.rowcount > 0:
             connection.commit()
-            cursor.close()
-            connection.close()
             return jsonify({'success': True, 'message': 'Password reset successfully'})
         else:
-            cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': 'User not found'}), 404
             
     except Exception as e:
@@ -2321,13 +2797,8 @@ def admin_toggle_user_status(user_id):
         data = request.get_json()
         new_status = data.get('status', True)
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # First check if is_active column exists, if not add it
-        cursor.execute("SHOW COLUMNS FROM users LIKE 'is_active'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE users ADD COLUMN is_active TINYINT(1) DEFAULT 1")
+        connection = get_db()
+        cursor = get_cursor()
         
         # Update user status
         cursor.execute("""
@@ -2338,13 +2809,9 @@ def admin_toggle_user_status(user_id):
         
         if cursor.rowcount > 0:
             connection.commit()
-            cursor.close()
-            connection.close()
             action = 'activated' if new_status else 'deactivated'
             return jsonify({'success': True, 'message': f'User {action} successfully'})
         else:
-            cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': 'User not found'}), 404
             
     except Exception as e:
@@ -2363,8 +2830,7 @@ def admin_feedback():
         type_filter = request.args.get('type', '')
         search_query = request.args.get('search', '')
         
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(dict_rows=True, readonly=True)
         
         # Build WHERE clause
         where_conditions = []
@@ -2379,8 +2845,8 @@ def admin_feedback():
             params.append(type_filter)
         
         if search_query:
-            where_conditions.append("f.content LIKE %s")
-            params.append(f"%{search_query}%")
+            where_conditions.append("MATCH(f.content) AGAINST(%s IN BOOLEAN MODE)")
+            params.append(boolean_query(search_query))
         
         where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
         
@@ -2412,18 +2878,16 @@ def admin_feedback():
         
         # Get feedback list
         feedback_query = f"""
-            SELECT f.*, u.username
+            SELECT {FEEDBACK_COLUMNS}
             FROM user_feedback f
             LEFT JOIN users u ON f.user_id = u.id
             {where_clause}
             ORDER BY f.created_at DESC
             LIMIT %s OFFSET %s
         """
-        cursor.execute(feedback_query, params + [per_page, offset])
-        feedback_list = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
+        row_cursor = get_cursor(readonly=True)
+        row_cursor.execute(feedback_query, params + [per_page, offset])
+        feedback_list = fetch_all(row_cursor, Feedback)
         
         # Create pagination object
         class Pagination:
@@ -2472,8 +2936,8 @@ def admin_feedback_response():
         if not feedback_id:
             return jsonify({'success': False, 'error': 'Feedback ID is required'}), 400
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
         
         # Update feedback with admin response
         cursor.execute("""
@@ -2486,8 +2950,6 @@ def admin_feedback_response():
         """, (admin_response, feedback_id))
         
         connection.commit()
-        cursor.close()
-        connection.close()
         
         return jsonify({'success': True, 'message': 'Response updated successfully'})
         
@@ -2508,8 +2970,8 @@ def admin_feedback_status():
         if not feedback_id or status not in valid_statuses:
             return jsonify({'success': False, 'error': 'Invalid parameters'}), 400
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
         
         # Update feedback status
         cursor.execute("""
@@ -2521,8 +2983,6 @@ def admin_feedback_status():
         """, (status, feedback_id))
         
         connection.commit()
-        cursor.close()
-        connection.close()
         
         return jsonify({'success': True, 'message': f'Status updated to {status}'})
         
@@ -2535,13 +2995,17 @@ def admin_feedback_status():
 def admin_delete_user(user_id):
     """Delete user and all their data"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
+        connection.begin()
         
         # Delete user's stories first (cascade delete)
         cursor.execute("DELETE FROM story_likes WHERE story_id IN (SELECT id FROM stories WHERE user_id = %s)", (user_id,))
         cursor.execute("DELETE FROM story_tags WHERE story_id IN (SELECT id FROM stories WHERE user_id = %s)", (user_id,))
+        cursor.execute("DELETE FROM story_stats WHERE story_id IN (SELECT id FROM stories WHERE user_id = %s)", (user_id,))
+        cursor.execute("DELETE FROM story_like_shards WHERE story_id IN (SELECT id FROM stories WHERE user_id = %s)", (user_id,))
         cursor.execute("DELETE FROM stories WHERE user_id = %s", (user_id,))
+        story_cards.delete_for_user(cursor, user_id)
         
         # Delete user's likes on other stories
         cursor.execute("DELETE FROM story_likes WHERE user_id = %s", (user_id,))
@@ -2554,12 +3018,8 @@ def admin_delete_user(user_id):
         
         if cursor.rowcount > 0:
             connection.commit()
-            cursor.close()
-            connection.close()
             return jsonify({'success': True, 'message': 'User deleted successfully'})
         else:
-            cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': 'User not found'}), 404
             
     except Exception as e:
@@ -2577,14 +3037,9 @@ def admin_batch_user_action():
         if not action or not user_ids:
             return jsonify({'success': False, 'message': 'Missing required parameters'}), 400
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # Ensure is_active column exists for toggle_status action
-        if action == 'toggle_status':
-            cursor.execute("SHOW COLUMNS FROM users LIKE 'is_active'")
-            if not cursor.fetchone():
-                cursor.execute("ALTER TABLE users ADD COLUMN is_active TINYINT(1) DEFAULT 1")
+        connection = get_db()
+        cursor = get_cursor()
+        connection.begin()
         
         affected_count = 0
         
@@ -2604,7 +3059,10 @@ def admin_batch_user_action():
                 # Delete cascade data
                 cursor.execute("DELETE FROM story_likes WHERE story_id IN (SELECT id FROM stories WHERE user_id = %s)", (user_id,))
                 cursor.execute("DELETE FROM story_tags WHERE story_id IN (SELECT id FROM stories WHERE user_id = %s)", (user_id,))
+                cursor.execute("DELETE FROM story_stats WHERE story_id IN (SELECT id FROM stories WHERE user_id = %s)", (user_id,))
+                cursor.execute("DELETE FROM story_like_shards WHERE story_id IN (SELECT id FROM stories WHERE user_id = %s)", (user_id,))
                 cursor.execute("DELETE FROM stories WHERE user_id = %s", (user_id,))
+                story_cards.delete_for_user(cursor, user_id)
                 cursor.execute("DELETE FROM story_likes WHERE user_id = %s", (user_id,))
                 cursor.execute("DELETE FROM password_reset_tokens WHERE email IN (SELECT email FROM users WHERE id = %s)", (user_id,))
                 cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
@@ -2613,8 +3071,6 @@ def admin_batch_user_action():
             return jsonify({'success': False, 'message': 'Invalid action'}), 400
         
         connection.commit()
-        cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True, 
@@ -2626,13 +3082,38 @@ def admin_batch_user_action():
         return jsonify({'success': False, 'message': f'Batch operation failed: {str(e)}'}), 500
 
 
+def stream_csv(header, rows, format_row, chunk_size=16 * 1024):
+    """
+    Yield CSV text in chunks of roughly chunk_size characters
+    
+    rows can be an unbuffered (SSCursor) cursor, so only one chunk is in memory at a time.
+    """
+    import io
+    import csv
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    
+    for row in rows:
+        writer.writerow(format_row(row))
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    yield buffer.getvalue()
+
 @app.route('/admin/api/export_users')
 @admin_required
 def admin_export_users():
-    """Export users to CSV"""
+    """Export users to CSV, streamed straight from an unbuffered server-side cursor"""
+    from flask import Response, stream_with_context
+    
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        # Rows are read off the wire while the response is written; the request
+        # context (and with it the cursor) lives until the stream is finished
+        cursor = get_cursor(readonly=True, unbuffered=True)
         
         # Get all users with story statistics (exclude soft-deleted stories)
         cursor.execute("""
@@ -2640,60 +3121,36 @@ def admin_export_users():
                    COALESCE(u.is_active, 1) as is_active,
                    COUNT(CASE WHEN s.deleted_at IS NULL THEN s.id END) as story_count,
                    SUM(CASE WHEN s.status = 'published' AND s.deleted_at IS NULL THEN 1 ELSE 0 END) as published_stories,
-                   COALESCE(SUM(CASE WHEN s.deleted_at IS NULL THEN s.view_count ELSE 0 END), 0) as total_views
+                   COALESCE(SUM(CASE WHEN s.deleted_at IS NULL THEN ss.view_count ELSE 0 END), 0) as total_views
             FROM users u
             LEFT JOIN stories s ON u.id = s.user_id
+            LEFT JOIN story_stats ss ON ss.story_id = s.id
             GROUP BY u.id, u.username, u.email, u.created_at, u.last_login, u.is_active
             ORDER BY u.created_at DESC
         """)
-        
-        users = cursor.fetchall()
-        cursor.close()
-        connection.close()
-        
-        # Create CSV content
-        import io
-        import csv
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['User ID', 'Username', 'Email', 'Status', 'Registration Date', 
-                        'Last Login', 'Story Count', 'Published Stories', 'Total Views'])
-        
-        # Write data
-        for user in users:
-            status = 'Active' if user['is_active'] else 'Inactive'
-            reg_date = user['created_at'].strftime('%Y-%m-%d %H:%M:%S') if user['created_at'] else ''
-            last_login = user['last_login'].strftime('%Y-%m-%d %H:%M:%S') if user['last_login'] else 'Never'
-            
-            writer.writerow([
-                user['id'],
-                user['username'],
-                user['email'] or '',
-                status,
-                reg_date,
-                last_login,
-                user['story_count'] or 0,
-                user['published_stories'] or 0,
-                user['total_views'] or 0
-            ])
-        
-        output.seek(0)
-        csv_content = output.getvalue()
-        output.close()
-        
-        # Create response
-        from flask import make_response
-        response = make_response(csv_content)
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=users_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        
-        return response
-        
     except Exception as e:
         return jsonify({'success': False, 'message': f'Export failed: {str(e)}'}), 500
+    
+    def format_user(row):
+        user_id, username, email, created_at, last_login, is_active, story_count, published_stories, total_views = row
+        return [
+            user_id,
+            username,
+            email or '',
+            'Active' if is_active else 'Inactive',
+            created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else '',
+            last_login.strftime('%Y-%m-%d %H:%M:%S') if last_login else 'Never',
+            story_count or 0,
+            published_stories or 0,
+            total_views or 0
+        ]
+    
+    header = ['User ID', 'Username', 'Email', 'Status', 'Registration Date',
+              'Last Login', 'Story Count', 'Published Stories', 'Total Views']
+    
+    response = Response(stream_with_context(stream_csv(header, cursor, format_user)), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename=users_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    return response
 
 # =====================================================
 # Enhanced Admin Story Management (with delete)
@@ -2704,13 +3161,9 @@ def admin_export_users():
 def admin_delete_story(story_id):
     """Soft delete a story (move to recycling bin)"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # First check if deleted_at column exists, if not add it
-        cursor.execute("SHOW COLUMNS FROM stories LIKE 'deleted_at'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE stories ADD COLUMN deleted_at DATETIME NULL")
+        connection = get_db()
+        cursor = get_cursor()
+        connection.begin()
         
         # Soft delete the story by setting deleted_at timestamp
         cursor.execute("""
@@ -2720,13 +3173,10 @@ def admin_delete_story(story_id):
         """, (datetime.now(), datetime.now(), story_id))
         
         if cursor.rowcount > 0:
+            story_cards.refresh(cursor, [story_id])
             connection.commit()
-            cursor.close()
-            connection.close()
             return jsonify({'success': True, 'message': 'Story moved to recycling bin'})
         else:
-            cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': 'Story not found or already deleted'}), 404
             
     except Exception as e:
@@ -2737,8 +3187,7 @@ def admin_delete_story(story_id):
 def admin_recycling_bin():
     """Admin recycling bin page for deleted stories"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = get_cursor(dict_rows=True, readonly=True)
         
         # Get query parameters
         page = int(request.args.get('page', 1))
@@ -2746,20 +3195,21 @@ def admin_recycling_bin():
         search = request.args.get('search', '').strip()
         
         # Build WHERE clause for deleted stories
-        where_conditions = ["s.deleted_at IS NOT NULL"]
+        where_conditions = ["deleted_at IS NOT NULL"]
         params = []
         
         if search:
-            where_conditions.append("(s.title LIKE %s OR u.username LIKE %s)")
-            params.extend([f'%{search}%', f'%{search}%'])
+            # Title or author via the FULLTEXT indexes instead of LIKE '%term%' over every card
+            where_conditions.append("""(story_id IN (SELECT id FROM stories WHERE MATCH(title) AGAINST(%s IN BOOLEAN MODE))
+                OR user_id IN (SELECT id FROM users WHERE MATCH(username, email) AGAINST(%s IN BOOLEAN MODE)))""")
+            params.extend([boolean_query(search)] * 2)
         
         where_clause = " AND ".join(where_conditions)
         
         # Get total count
         count_query = f"""
             SELECT COUNT(*) as total
-            FROM stories s
-            LEFT JOIN users u ON s.user_id = u.id
+            FROM story_cards
             WHERE {where_clause}
         """
         cursor.execute(count_query, params)
@@ -2771,22 +3221,15 @@ def admin_recycling_bin():
         
         # Get deleted stories
         stories_query = f"""
-            SELECT s.id, s.title, s.description, s.status, s.word_count, s.view_count,
-                   s.created_at, s.updated_at, s.deleted_at,
-                   u.username as author_name, u.email as author_email,
-                   GROUP_CONCAT(t.name) as tags
-            FROM stories s
-            LEFT JOIN users u ON s.user_id = u.id
-            LEFT JOIN story_tags st ON s.id = st.story_id
-            LEFT JOIN tags t ON st.tag_id = t.id
+            SELECT {STORY_CARD_COLUMNS}
+            FROM story_cards
             WHERE {where_clause}
-            GROUP BY s.id, s.title, s.description, s.status, s.word_count, s.view_count,
-                     s.created_at, s.updated_at, s.deleted_at, u.username, u.email
-            ORDER BY s.deleted_at DESC
+            ORDER BY deleted_at DESC
             LIMIT %s OFFSET %s
         """
-        cursor.execute(stories_query, params + [per_page, offset])
-        stories = cursor.fetchall()
+        card_cursor = get_cursor(readonly=True)
+        card_cursor.execute(stories_query, params + [per_page, offset])
+        stories = fetch_all(card_cursor, StoryCard)
         
         # Get recycling bin statistics
         cursor.execute("""
@@ -2800,9 +3243,6 @@ def admin_recycling_bin():
         """)
         stats = cursor.fetchone()
         
-        cursor.close()
-        connection.close()
-        
         # Create pagination object
         pagination = {
             'page': page,
@@ -2831,8 +3271,9 @@ def admin_recycling_bin():
 def admin_restore_story(story_id):
     """Restore a story from recycling bin"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
+        connection.begin()
         
         # Restore the story by clearing deleted_at timestamp
         cursor.execute("""
@@ -2842,13 +3283,10 @@ def admin_restore_story(story_id):
         """, (datetime.now(), story_id))
         
         if cursor.rowcount > 0:
+            story_cards.refresh(cursor, [story_id])
             connection.commit()
-            cursor.close()
-            connection.close()
             return jsonify({'success': True, 'message': 'Story restored successfully'})
         else:
-            cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': 'Story not found in recycling bin'}), 404
             
     except Exception as e:
@@ -2859,26 +3297,26 @@ def admin_restore_story(story_id):
 def admin_permanently_delete_story(story_id):
     """Permanently delete a story from recycling bin"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
+        connection.begin()
         
         # Verify story is in recycling bin
         cursor.execute("SELECT id FROM stories WHERE id = %s AND deleted_at IS NOT NULL", (story_id,))
         if not cursor.fetchone():
-            cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': 'Story not found in recycling bin'}), 404
         
         # Delete related data first
         cursor.execute("DELETE FROM story_likes WHERE story_id = %s", (story_id,))
         cursor.execute("DELETE FROM story_tags WHERE story_id = %s", (story_id,))
+        cursor.execute("DELETE FROM story_stats WHERE story_id = %s", (story_id,))
+        cursor.execute("DELETE FROM story_like_shards WHERE story_id = %s", (story_id,))
         
         # Permanently delete the story
         cursor.execute("DELETE FROM stories WHERE id = %s", (story_id,))
+        story_cards.delete(cursor, [story_id])
         
         connection.commit()
-        cursor.close()
-        connection.close()
         return jsonify({'success': True, 'message': 'Story permanently deleted'})
             
     except Exception as e:
@@ -2896,8 +3334,9 @@ def admin_batch_recycling_action():
         if not action or not story_ids:
             return jsonify({'success': False, 'message': 'Missing required parameters'}), 400
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        connection = get_db()
+        cursor = get_cursor()
+        connection.begin()
         
         affected_count = 0
         
@@ -2910,9 +3349,11 @@ def admin_batch_recycling_action():
                     WHERE id = %s AND deleted_at IS NOT NULL
                 """, (datetime.now(), story_id))
                 affected_count += cursor.rowcount
+            story_cards.refresh(cursor, story_ids)
                 
         elif action == 'permanently_delete':
             # Batch permanently delete stories
+            deleted_ids = []
             for story_id in story_ids:
                 # Verify story is in recycling bin first
                 cursor.execute("SELECT id FROM stories WHERE id = %s AND deleted_at IS NOT NULL", (story_id,))
@@ -2920,14 +3361,16 @@ def admin_batch_recycling_action():
                     # Delete related data
                     cursor.execute("DELETE FROM story_likes WHERE story_id = %s", (story_id,))
                     cursor.execute("DELETE FROM story_tags WHERE story_id = %s", (story_id,))
+                    cursor.execute("DELETE FROM story_stats WHERE story_id = %s", (story_id,))
+                    cursor.execute("DELETE FROM story_like_shards WHERE story_id = %s", (story_id,))
                     cursor.execute("DELETE FROM stories WHERE id = %s", (story_id,))
+                    deleted_ids.append(story_id)
                     affected_count += 1
+            story_cards.delete(cursor, deleted_ids)
         else:
             return jsonify({'success': False, 'message': 'Invalid action'}), 400
         
         connection.commit()
-        cursor.close()
-        connection.close()
         
         action_text = 'restored' if action == 'restore' else 'permanently deleted'
         return jsonify({
@@ -2939,6 +3382,28 @@ def admin_batch_recycling_action():
     except Exception as e:
         return jsonify({'success': False, 'message': f'Batch operation failed: {str(e)}'}), 500
 
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending database schema migrations"""
+    applied = migration_runner.upgrade()
+    print(f"Applied {len(applied)} migration(s)" if applied else "Database schema is up to date")
+
+@app.cli.command('rebuild-story-cards')
+def rebuild_story_cards_command():
+    """Rebuild the story_cards read model from the stories table"""
+    connection = get_db()
+    connection.begin()
+    count = story_cards.rebuild(get_cursor())
+    connection.commit()
+    print(f"Rebuilt {count} story cards")
+
+@app.cli.command('build-search-index')
+def build_search_index_command():
+    """Build the in-memory search index from the database and write its snapshot file"""
+    search_index.build(get_cursor(readonly=True))
+    path = search_index.write_snapshot()
+    print(f"Indexed {search_index.get_stats()['stories']} stories into {path}")
+
 if __name__ == '__main__':
     # Create upload folder for profile pictures
     os.makedirs('/image', exist_ok=True)
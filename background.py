@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Background Refresher for AI Storytelling Platform
+Runs a cache's load or catch-up function in one daemon thread per worker
+process, so requests only read what the last run produced. The thread runs when
+triggered (a story changed, a snapshot expired) and, given an interval, also
+periodically. A trigger that arrives during a run queues exactly one more run,
+so a change the running one read too early is still picked up.
+
+A thread started before a fork (gunicorn --preload) does not run in the child;
+the first trigger in a new process starts a fresh one.
+"""
+
+import os
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """One daemon thread per process that runs work() when triggered or every interval seconds"""
+
+    def __init__(self, name: str, work: Callable[[], None], interval: Optional[float] = None):
+        """
+        Initialize the refresher (no thread runs until the first trigger)
+
+        Args:
+            name (str): Thread name, also used in log messages
+            work (callable): One load or catch-up; exceptions are logged and counted
+            interval (float): Seconds between untriggered runs; None runs only when triggered
+        """
+        self.name = name
+        self.work = work
+        self.interval = interval
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._wake = threading.Event()
+        self._done = threading.Event()
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        """True while work() is running"""
+        return self._running
+
+    def trigger(self, after_running: bool = True):
+        """
+        Run work() soon in the background thread, starting it if this process has none
+
+        Args:
+            after_running (bool): When a run is in progress, queue one more after it;
+                False lets the running one count (e.g. for a plain expiry)
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._wake = threading.Event()
+                self._done = threading.Event()
+                threading.Thread(target=self._run, args=(self._wake, self._done),
+                                 name=self.name, daemon=True).start()
+        if self._running and not after_running:
+            return
+        self._wake.set()
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Wait for the first run in this process to finish
+
+        Returns:
+            bool: False when it did not finish within timeout
+        """
+        return self._done.wait(timeout)
+
+    def _run(self, wake: threading.Event, done: threading.Event):
+        while True:
+            wake.wait(self.interval)
+            wake.clear()
+            self._running = True
+            try:
+                self.work()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"{self.name} failed: {e}")
+            finally:
+                self._running = False
+                done.set()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Like Toggle Benchmark for AI Storytelling Platform
+Measures like_story toggle throughput under contention: many threads toggle
+likes on one story, with pairs of threads sharing a user so the same
+(user_id, story_id) row is clicked concurrently. Compares the previous
+read-then-write toggle with likes.LikeStore updating stories.like_count in
+place ('atomic') and through story_like_shards ('sharded'), and checks each
+for drift between the story's like count and the rows in story_likes.
+
+Usage:
+    python benchmarks/like_toggle.py --database scratch                  # 16 threads x 200 toggles
+    python benchmarks/like_toggle.py --database scratch --threads 64 --toggles 500
+
+Needs a scratch database: it applies the migrations and writes a test story.
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from typing import Callable, Dict, List
+
+import pymysql
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from like_counter import like_counter
+from likes import like_store
+from migrate import MigrationRunner
+from story_cards import story_cards
+
+logger = logging.getLogger(__name__)
+
+
+def legacy_toggle(connection, cursor, user_id: int, story_id: int):
+    """The like_story implementation this benchmark replaced: SELECT, then write, then re-read"""
+    cursor.execute("SELECT id FROM story_likes WHERE user_id = %s AND story_id = %s", (user_id, story_id))
+    if cursor.fetchone():
+        cursor.execute("DELETE FROM story_likes WHERE user_id = %s AND story_id = %s", (user_id, story_id))
+        cursor.execute("UPDATE stories SET like_count = GREATEST(0, like_count - 1) WHERE id = %s", (story_id,))
+        action = 'unliked'
+    else:
+        cursor.execute("INSERT INTO story_likes (user_id, story_id) VALUES (%s, %s)", (user_id, story_id))
+        cursor.execute("UPDATE stories SET like_count = like_count + 1 WHERE id = %s", (story_id,))
+        action = 'liked'
+    story_cards.sync_counters(cursor, [story_id])
+    cursor.execute("SELECT like_count FROM stories WHERE id = %s", (story_id,))
+    like_count = cursor.fetchone()[0]
+    connection.commit()
+    return action, like_count
+
+
+IMPLEMENTATIONS: Dict[str, Callable] = {
+    'legacy': legacy_toggle,
+    'atomic': like_store.toggle,
+    'sharded': like_store.toggle,
+}
+
+# like_counter.shards while each implementation runs
+SHARDS = {
+    'legacy': 0,
+    'atomic': 0,
+    'sharded': Config.LIKE_COUNTER_SHARDS or 16,
+}
+
+
+def create_story(db_config: Dict) -> int:
+    """Insert a published story (and its card) with no likes, by a benchmark author; returns its id"""
+    connection = pymysql.connect(**db_config)
+    try:
+        cursor = connection.cursor()
+        # stories.user_id references users; reuse the author across runs
+        cursor.execute("""
+            INSERT INTO users (username, email, password_hash)
+            VALUES ('like-benchmark', 'like-benchmark@example.invalid', '!')
+            ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+        """)
+        user_id = cursor.lastrowid
+        cursor.execute("""
+            INSERT INTO stories (user_id, title, content, description, status, like_count, created_at, published_at)
+            VALUES (%s, 'Like benchmark', 'Benchmark story', NULL, 'published', 0, NOW(), NOW())
+        """, (user_id,))
+        story_id = cursor.lastrowid
+        story_cards.refresh(cursor, [story_id])
+        connection.commit()
+        return story_id
+    finally:
+        connection.close()
+
+
+def run(db_config: Dict, name: str, threads: int, toggles: int) -> Dict:
+    """
+    Toggle likes on a fresh story from many threads at once
+
+    Returns:
+        dict: Throughput, latency percentiles, errors and like_count drift
+    """
+    story_id = create_story(db_config)
+    toggle = IMPLEMENTATIONS[name]
+    like_counter.shards = SHARDS[name]
+    latencies: List[float] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(threads)
+
+    def worker(index: int):
+        connection = pymysql.connect(**db_config)
+        cursor = connection.cursor()
+        # Two threads per user: their clicks race on the same (user_id, story_id) row
+        user_id = 1000 + index // 2
+        local_latencies, local_errors = [], []
+        start_barrier.wait()
+        try:
+            for _ in range(toggles):
+                started = time.perf_counter()
+                try:
+                    toggle(connection, cursor, user_id, story_id)
+                except pymysql.err.MySQLError as e:
+                    connection.rollback()
+                    local_errors.append(f"{e.args[0]}")
+                local_latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors.extend(local_errors)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    connection = pymysql.connect(**db_config)
+    try:
+        cursor = connection.cursor()
+        # Slots not rolled up yet are part of the count
+        cursor.execute("""
+            SELECT s.like_count + COALESCE((SELECT SUM(delta) FROM story_like_shards WHERE story_id = s.id), 0)
+            FROM stories s WHERE s.id = %s
+        """, (story_id,))
+        like_count = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM story_likes WHERE story_id = %s", (story_id,))
+        rows = cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+    latencies.sort()
+    return {
+        'name': name,
+        'toggles': len(latencies),
+        'per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else 0.0,
+        'errors': len(errors),
+        'drift': like_count - rows,
+    }
+
+
+def main(argv: List[str]) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description='Benchmark like toggles under contention')
+    parser.add_argument('--database', required=True, help='Scratch database (migrated and written to)')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent clients (default 16)')
+    parser.add_argument('--toggles', type=int, default=200, help='Toggles per client (default 200)')
+    parser.add_argument('--only', choices=sorted(IMPLEMENTATIONS), help='Run one implementation')
+    args = parser.parse_args(argv[1:])
+
+    if args.database == Config.DB_CONFIG['database']:
+        parser.error('--database must be a scratch database, not the application database')
+    db_config = dict(Config.DB_CONFIG, database=args.database)
+    MigrationRunner(db_config=db_config).upgrade()
+
+    print(f"{args.threads} threads x {args.toggles} toggles on one story\n")
+    print(f"{'implementation':<16}{'toggles/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'drift':>8}")
+    drifted = False
+    for name in ([args.only] if args.only else list(IMPLEMENTATIONS)):
+        result = run(db_config, name, args.threads, args.toggles)
+        drifted = drifted or (name != 'legacy' and result['drift'] != 0)
+        print(f"{result['name']:<16}{result['per_second']:>12.0f}{result['p50_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['errors']:>8}{result['drift']:>8}")
+
+    print("\ndrift = stories.like_count + pending slots - COUNT(story_likes rows); anything but 0 is a double count"
+          " or a lost update")
+    return 1 if drifted else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
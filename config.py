@@ -1,6 +1,14 @@
 import os
 import secrets
 
+def _parse_replicas(value, primary):
+    """Build replica connection settings from a comma-separated host[:port] list"""
+    replicas = []
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        host, _, port = entry.partition(':')
+        replicas.append(dict(primary, host=host, port=int(port) if port else primary['port']))
+    return replicas
+
 class Config:
     """Base configuration"""
     # Flask Configuration - Use secure secret key
@@ -17,6 +25,77 @@ class Config:
         'autocommit': True
     }
     
+    # Connection Pool Configuration (per worker process)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # replace connections older than this
+    DB_POOL_PING_INTERVAL = int(os.environ.get('DB_POOL_PING_INTERVAL', 30))  # ping if idle longer than this
+    
+    # Read Replicas (optional): DB_REPLICA_HOSTS="replica1:3306,replica2:3306", same credentials as primary
+    DB_REPLICAS = _parse_replicas(os.environ.get('DB_REPLICA_HOSTS', ''), DB_CONFIG)
+    DB_REPLICA_MAX_LAG = int(os.environ.get('DB_REPLICA_MAX_LAG', 5))  # seconds; lagging replicas are skipped
+    DB_REPLICA_LAG_CHECK_INTERVAL = int(os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', 5))
+    DB_READ_YOUR_WRITES_WINDOW = int(os.environ.get('DB_READ_YOUR_WRITES_WINDOW', 10))  # read from primary after a write
+    
+    # Query Instrumentation: warn when one request runs the same statement more often than this
+    QUERY_REPEAT_WARN_THRESHOLD = int(os.environ.get('QUERY_REPEAT_WARN_THRESHOLD', 10))
+    
+    # Story type catalog cache: seconds before the tags list is reloaded (usage counts may lag this much)
+    TAG_CATALOG_TTL = int(os.environ.get('TAG_CATALOG_TTL', 300))
+    
+    # Story library: cards per page ("load more" fetches the next page) and published-count cache lifetime
+    STORY_LIBRARY_PAGE_SIZE = int(os.environ.get('STORY_LIBRARY_PAGE_SIZE', 24))
+    PUBLISHED_COUNTS_TTL = int(os.environ.get('PUBLISHED_COUNTS_TTL', 60))
+    
+    # Home page featured stories: seconds before the cached list is reloaded in the background
+    FEATURED_STORIES_TTL = int(os.environ.get('FEATURED_STORIES_TTL', 60))
+    
+    # Most viewed stories tracked per worker, and seconds between re-seeds from the database
+    TOP_STORIES_K = int(os.environ.get('TOP_STORIES_K', 50))
+    TOP_STORIES_RESEED_INTERVAL = int(os.environ.get('TOP_STORIES_RESEED_INTERVAL', 60))
+    
+    # Story views: buffered per worker and written to story_stats every VIEW_FLUSH_INTERVAL seconds
+    VIEW_FLUSH_INTERVAL = float(os.environ.get('VIEW_FLUSH_INTERVAL', 5))
+    VIEW_FLUSH_BATCH_SIZE = int(os.environ.get('VIEW_FLUSH_BATCH_SIZE', 500))  # stories per upsert statement
+    
+    # Story likes: slot rows per story in story_like_shards (0 updates stories.like_count directly),
+    # and seconds between rollups of the slots into stories.like_count
+    LIKE_COUNTER_SHARDS = int(os.environ.get('LIKE_COUNTER_SHARDS', 16))
+    LIKE_ROLLUP_INTERVAL = float(os.environ.get('LIKE_ROLLUP_INTERVAL', 5))
+    
+    # /api/like_status: most story ids answered per request
+    LIKE_STATUS_MAX_IDS = int(os.environ.get('LIKE_STATUS_MAX_IDS', 300))
+    
+    # Anonymous likes kept in the session cookie (packed ids); the least recently liked are dropped beyond this
+    ANONYMOUS_LIKES_MAX = int(os.environ.get('ANONYMOUS_LIKES_MAX', 200))
+    
+    # Rendered pages (anonymous readers) and story fragments: lifetime in seconds (0 disables), entries
+    # per worker, and seconds between content version checks (a story change elsewhere shows up after it)
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 60))
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 500))
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 1000))
+    CONTENT_VERSION_CHECK_INTERVAL = float(os.environ.get('CONTENT_VERSION_CHECK_INTERVAL', 2))
+    
+    # /api/v1/stories feed: default and maximum page size (?limit=)
+    API_STORIES_PAGE_SIZE = int(os.environ.get('API_STORIES_PAGE_SIZE', 20))
+    API_STORIES_MAX_PAGE_SIZE = int(os.environ.get('API_STORIES_MAX_PAGE_SIZE', 100))
+    
+    # Story search: results shown in story_library, and the deepest offset /api/v1/search pages to
+    SEARCH_RESULT_LIMIT = int(os.environ.get('SEARCH_RESULT_LIMIT', 48))
+    SEARCH_MAX_OFFSET = int(os.environ.get('SEARCH_MAX_OFFSET', 1000))
+    
+    # Search backend: 'mysql' (FULLTEXT indexes) or 'memory' (per-worker inverted index, see search_index.py)
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'mysql')
+    SEARCH_SNAPSHOT_PATH = os.environ.get('SEARCH_SNAPSHOT_PATH',
+                                          os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'search_index.bin'))
+    SEARCH_INDEX_POLL_INTERVAL = int(os.environ.get('SEARCH_INDEX_POLL_INTERVAL', 30))  # catch up with changed stories
+    SEARCH_INDEX_RECONCILE_INTERVAL = int(os.environ.get('SEARCH_INDEX_RECONCILE_INTERVAL', 600))  # full published-ID check
+    SEARCH_SNAPSHOT_INTERVAL = int(os.environ.get('SEARCH_SNAPSHOT_INTERVAL', 900))  # rewrite the snapshot file
+    
+    # Typeahead (/api/suggest): catch up with changed stories / rebuild the prefix index (seconds)
+    SUGGEST_REFRESH_INTERVAL = int(os.environ.get('SUGGEST_REFRESH_INTERVAL', 30))
+    SUGGEST_REBUILD_INTERVAL = int(os.environ.get('SUGGEST_REBUILD_INTERVAL', 600))
+    
     # API Keys
     GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY')
     
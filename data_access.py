@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Row Types for AI Storytelling Platform
+Compact NamedTuple rows for the list and detail queries. Queries select the
+columns named in each *_COLUMNS constant from a plain tuple cursor and the rows
+are mapped positionally, which avoids building a dict per row.
+
+Templates read the fields as attributes (story.title); JSON endpoints call
+to_dict(), since jsonify would otherwise serialize a tuple as a list.
+Published listings page by the (created_at, id) keyset with opaque tokens.
+"""
+
+import base64
+import binascii
+from datetime import datetime, date
+from typing import NamedTuple, Optional, Iterable, List, Dict, Any, Tuple, Type, TypeVar
+
+from image_service import image_service
+
+Row = TypeVar('Row', bound=tuple)
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _split_tags(tags: Optional[str]) -> List[str]:
+    return tags.split(',') if tags else []
+
+
+class StoryCard(NamedTuple):
+    """One row of story_cards (list pages)"""
+    id: int
+    user_id: int
+    author: Optional[str]
+    author_email: Optional[str]
+    title: str
+    description: Optional[str]
+    excerpt: Optional[str]
+    tags: Optional[str]
+    image_path: Optional[str]
+    language_name: Optional[str]
+    language_group: Optional[str]
+    status: str
+    word_count: int
+    reading_time: int
+    view_count: int
+    like_count: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    published_at: Optional[datetime]
+    deleted_at: Optional[datetime]
+
+    # Names the list templates used before the read model existed
+    @property
+    def categories(self) -> Optional[str]:
+        return self.tags
+
+    @property
+    def author_name(self) -> Optional[str]:
+        return self.author
+
+    @property
+    def username(self) -> Optional[str]:
+        return self.author
+
+    @property
+    def tag_list(self) -> List[str]:
+        return _split_tags(self.tags)
+
+    @property
+    def image_url(self) -> Optional[str]:
+        return image_service.get_image_url(self.image_path) if self.image_path else None
+
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return image_service.get_image_url(self.image_path, 'thumbnail') if self.image_path else None
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        JSON-ready dict: ISO dates, tags as a list, thumbnail_url and image_url added
+
+        Args:
+            fields (iterable): Keys to include (default: all); see STORY_CARD_FIELDS
+        """
+        if fields is None:
+            fields = STORY_CARD_FIELDS
+        return {field: _json_value(getattr(self, 'tag_list' if field == 'tags' else field)) for field in fields}
+
+
+# Keys of StoryCard.to_dict(); PUBLIC_STORY_CARD_FIELDS omits the author's email
+STORY_CARD_FIELDS = StoryCard._fields + ('thumbnail_url', 'image_url')
+PUBLIC_STORY_CARD_FIELDS = tuple(field for field in STORY_CARD_FIELDS if field != 'author_email')
+
+STORY_CARD_COLUMNS = """
+    story_id, user_id, author, author_email, title, description, excerpt, tags,
+    image_path, language_name, language_group, status,
+    word_count, reading_time, view_count, like_count,
+    created_at, updated_at, published_at, deleted_at
+"""
+
+
+class Story(NamedTuple):
+    """A published story with its content (story_detail)"""
+    id: int
+    title: str
+    content: str
+    description: Optional[str]
+    language_name: Optional[str]
+    image_path: Optional[str]
+    image_original_name: Optional[str]
+    reading_time: int
+    word_count: int
+    status: str
+    view_count: int
+    like_count: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    published_at: Optional[datetime]
+    author: Optional[str]
+    author_bio: Optional[str]
+    categories: Optional[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready dict with ISO dates"""
+        return {field: _json_value(value) for field, value in zip(self._fields, self)}
+
+
+# Likes of story alias s still in story_like_shards (see like_counter.py); at most
+# LIKE_COUNTER_SHARDS primary-key rows
+PENDING_LIKES_SQL = "COALESCE((SELECT SUM(l.delta) FROM story_like_shards l WHERE l.story_id = s.id), 0)"
+
+# Tag names and the flushed view count come from the story's card, so the detail
+# query needs no GROUP BY
+STORY_COLUMNS = f"""
+    s.id, s.title, s.content, s.description, s.language_name,
+    s.image_path, s.image_original_name, s.reading_time, s.word_count,
+    s.status, COALESCE(c.view_count, 0), GREATEST(0, CAST(s.like_count + {PENDING_LIKES_SQL} AS SIGNED)),
+    s.created_at, s.updated_at, s.published_at,
+    u.username, u.bio, c.tags
+"""
+
+
+class User(NamedTuple):
+    """A user with their story count (admin user list)"""
+    id: int
+    username: str
+    email: str
+    created_at: Optional[datetime]
+    last_login: Optional[datetime]
+    is_active: int
+    story_count: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready dict with ISO dates"""
+        return {field: _json_value(value) for field, value in zip(self._fields, self)}
+
+
+USER_COLUMNS = """
+    u.id, u.username, u.email, u.created_at, u.last_login,
+    COALESCE(u.is_active, 1),
+    COUNT(CASE WHEN s.deleted_at IS NULL THEN s.id END)
+"""
+
+
+class Feedback(NamedTuple):
+    """One user_feedback row with the submitter's username (admin feedback list)"""
+    id: int
+    user_id: Optional[int]
+    content: str
+    feedback_type: str
+    status: str
+    admin_response: Optional[str]
+    admin_viewed_at: Optional[datetime]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    username: Optional[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready dict with ISO dates"""
+        return {field: _json_value(value) for field, value in zip(self._fields, self)}
+
+
+FEEDBACK_COLUMNS = """
+    f.id, f.user_id, f.content, f.feedback_type, f.status, f.admin_response,
+    f.admin_viewed_at, f.created_at, f.updated_at, u.username
+"""
+
+
+def fetch_all(cursor, row_type: Type[Row]) -> List[Row]:
+    """
+    Map every remaining row of a tuple cursor onto row_type
+
+    Args:
+        cursor: Tuple (non-dict) cursor that executed a query selecting row_type's columns
+        row_type: NamedTuple class whose fields match the selected columns in order
+
+    Returns:
+        list: Rows of row_type
+    """
+    return list(map(row_type._make, cursor.fetchall()))
+
+
+def fetch_one(cursor, row_type: Type[Row]) -> Optional[Row]:
+    """Map the next row of a tuple cursor onto row_type, or None when there is none"""
+    row = cursor.fetchone()
+    return row_type._make(row) if row is not None else None
+
+
+def encode_page_token(created_at: datetime, story_id: int) -> str:
+    """
+    Build an opaque continuation token for the (created_at, id) keyset
+
+    Args:
+        created_at (datetime): created_at of the last row on the page
+        story_id (int): ID of the last row on the page
+
+    Returns:
+        str: URL-safe token
+    """
+    raw = f"{created_at.isoformat()}|{story_id}".encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_page_token(token: str) -> Tuple[datetime, int]:
+    """
+    Parse a continuation token from encode_page_token()
+
+    Raises:
+        ValueError: The token is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('ascii')
+        created_at, story_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(story_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid page token: {token!r}") from e
+
+
+def fetch_published_cards(cursor, limit: int, after: Optional[Tuple[datetime, int]] = None,
+                          tag_id: Optional[int] = None, language_group: Optional[str] = None,
+                          user_id: Optional[int] = None) -> Tuple[List[StoryCard], Optional[str]]:
+    """
+    One keyset page of published stories, newest first
+
+    Args:
+        cursor: Tuple cursor
+        limit (int): Page size
+        after (tuple): (created_at, id) of the last row of the previous page
+        tag_id (int): Only stories with this tag
+        language_group (str): Only stories in this language group
+        user_id (int): Only stories by this author
+
+    Returns:
+        tuple: (cards, token for the next page or None on the last page)
+    """
+    conditions = ["status = 'published'", "deleted_at IS NULL"]
+    params = []
+
+    if tag_id is not None:
+        conditions.append("story_id IN (SELECT story_id FROM story_tags WHERE tag_id = %s)")
+        params.append(tag_id)
+    if language_group is not None:
+        conditions.append("language_group = %s")
+        params.append(language_group)
+    if user_id is not None:
+        conditions.append("user_id = %s")
+        params.append(user_id)
+    if after is not None:
+        conditions.append("(created_at < %s OR (created_at = %s AND story_id < %s))")
+        params.extend([after[0], after[0], after[1]])
+
+    # One extra row tells whether another page exists
+    cursor.execute(f"""
+        SELECT {STORY_CARD_COLUMNS}
+        FROM story_cards
+        WHERE {' AND '.join(conditions)}
+        ORDER BY created_at DESC, story_id DESC
+        LIMIT %s
+    """, params + [limit + 1])
+    cards = fetch_all(cursor, StoryCard)
+
+    if len(cards) <= limit:
+        return cards, None
+    cards = cards[:limit]
+    return cards, encode_page_token(cards[-1].created_at, cards[-1].id)
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Database Connection Pool for AI Storytelling Platform
+Keeps a bounded set of reusable PyMySQL connections per worker process,
+plus optional read replica pools with replication-lag checks
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the wait timeout"""
+
+
+class PooledConnection:
+    """
+    Thin proxy around a pymysql connection.
+
+    Behaves like the underlying connection, except that close() hands the
+    connection back to its pool instead of tearing down the socket.
+    """
+
+    def __init__(self, pool: 'ConnectionPool', raw: pymysql.connections.Connection):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+
+    @property
+    def open(self) -> bool:
+        return not self._released and self._raw.open
+
+    def close(self):
+        """Return the connection to the pool (safe to call more than once)"""
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self._raw)
+
+    def __getattr__(self, name):
+        if self._released:
+            raise pymysql.err.InterfaceError(0, 'Connection already returned to pool')
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        # A handler that forgot to close() must not leak a pool slot forever;
+        # the connection state is unknown, so drop it rather than reuse it.
+        if not self._released:
+            self._released = True
+            self._pool._discard(self._raw)
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of PyMySQL connections"""
+
+    def __init__(self, db_config: Dict[str, Any], max_size: int = 10, timeout: float = 10,
+                 recycle: int = 1800, ping_interval: int = 30):
+        """
+        Initialize the connection pool
+
+        Args:
+            db_config (dict): Keyword arguments for pymysql.connect
+            max_size (int): Maximum number of open connections per worker
+            timeout (float): Seconds to wait for a free connection before failing
+            recycle (int): Seconds after which a connection is closed and replaced
+            ping_interval (int): Idle seconds after which a connection is pinged before reuse
+        """
+        self.db_config = db_config
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+
+        # RLock so that a PooledConnection finalizer running mid-checkout can re-enter
+        self._cond = threading.Condition(threading.RLock())
+        self._idle = deque()
+        self._size = 0
+        self._pid = os.getpid()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'ping_failures': 0,
+            'discarded': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+        }
+
+    def _check_pid(self):
+        """Drop connections inherited across a fork (e.g. gunicorn --preload)"""
+        if self._pid != os.getpid():
+            logger.info("Worker fork detected, resetting database connection pool")
+            self._idle.clear()
+            self._size = 0
+            self._pid = os.getpid()
+            self._reset_stats()
+
+    def _connect(self) -> pymysql.connections.Connection:
+        raw = pymysql.connect(**self.db_config)
+        raw._pool_created_at = time.monotonic()
+        raw._pool_returned_at = raw._pool_created_at
+        self._stats['created'] += 1
+        return raw
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _validate(self, raw):
+        """Return a usable connection, replacing it if it is stale or dead"""
+        now = time.monotonic()
+        if now - raw._pool_created_at > self.recycle:
+            self._close_quietly(raw)
+            self._stats['recycled'] += 1
+            return self._connect()
+
+        if now - raw._pool_returned_at > self.ping_interval:
+            try:
+                raw.ping(reconnect=False)
+            except Exception as e:
+                logger.warning(f"Pooled connection failed liveness ping: {e}")
+                self._close_quietly(raw)
+                self._stats['ping_failures'] += 1
+                return self._connect()
+
+        return raw
+
+    def get_connection(self) -> PooledConnection:
+        """
+        Check out a connection, waiting up to `timeout` seconds if the pool is exhausted
+
+        Returns:
+            PooledConnection: Connection proxy; call close() to return it
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        raw = None
+        waited = False
+
+        with self._cond:
+            self._check_pid()
+            while True:
+                if self._idle:
+                    raw = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.timeout}s waiting for a database connection "
+                        f"(pool size {self.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            wait_ms = (time.monotonic() - start) * 1000
+            self._stats['checkouts'] += 1
+            self._stats['total_wait_ms'] += wait_ms
+            self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+            if waited:
+                self._stats['waits'] += 1
+                logger.info(f"Waited {wait_ms:.1f}ms for a pooled database connection")
+
+        # Network round trips happen outside the lock
+        try:
+            raw = self._validate(raw) if raw is not None else self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, raw)
+
+    def _release(self, raw):
+        """Put a connection back into the idle queue"""
+        if raw.open:
+            try:
+                if raw.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    raw.rollback()
+            except Exception as e:
+                logger.warning(f"Discarding connection that failed to roll back: {e}")
+                self._discard(raw)
+                return
+
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            if not raw.open:
+                self._size -= 1
+                self._stats['discarded'] += 1
+            else:
+                raw._pool_returned_at = time.monotonic()
+                self._idle.append(raw)
+            self._cond.notify()
+
+    def _discard(self, raw):
+        """Close a connection and free its slot"""
+        self._close_quietly(raw)
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._size -= 1
+            self._stats['discarded'] += 1
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection (checked-out connections close on return)"""
+        with self._cond:
+            while self._idle:
+                self._close_quietly(self._idle.pop())
+                self._size -= 1
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage metrics
+
+        Returns:
+            dict: Size, idle/in-use counts and checkout wait statistics
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats['max_size'] = self.max_size
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+        checkouts = stats['checkouts']
+        stats['avg_wait_ms'] = round(stats['total_wait_ms'] / checkouts, 3) if checkouts else 0.0
+        stats['total_wait_ms'] = round(stats['total_wait_ms'], 3)
+        stats['max_wait_ms'] = round(stats['max_wait_ms'], 3)
+        return stats
+
+
+class ReplicaSet:
+    """Pools for read replicas; replicas lagging behind the primary are skipped"""
+
+    def __init__(self, configs: List[Dict[str, Any]], max_lag: int = 5, lag_check_interval: int = 5, **pool_kwargs):
+        """
+        Initialize the replica set
+
+        Args:
+            configs (list): pymysql.connect keyword arguments, one dict per replica
+            max_lag (int): Maximum replication lag in seconds for a replica to serve reads
+            lag_check_interval (int): Seconds between lag measurements per replica
+            **pool_kwargs: Passed to each replica's ConnectionPool
+        """
+        self.pools = [ConnectionPool(config, **pool_kwargs) for config in configs]
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self._lag = {}  # pool index -> (checked_at, lag seconds or None)
+
+    def _measure_lag(self, connection) -> Optional[int]:
+        """Read Seconds_Behind_Source; None means replication is broken or unknown"""
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        try:
+            row = None
+            for statement in ('SHOW REPLICA STATUS', 'SHOW SLAVE STATUS'):  # MySQL >= 8.0.22 / older
+                try:
+                    cursor.execute(statement)
+                    row = cursor.fetchone()
+                    break
+                except pymysql.err.ProgrammingError:
+                    continue
+            if not row:
+                logger.warning(f"{connection.host} is not replicating; not using it for reads")
+                return None
+            lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+            return int(lag) if lag is not None else None
+        except Exception as e:
+            logger.warning(f"Replica lag check failed on {connection.host}: {e}")
+            return None
+        finally:
+            cursor.close()
+
+    def _is_fresh(self, index: int, connection=None) -> bool:
+        checked_at, lag = self._lag.get(index, (None, None))
+        if checked_at is None or time.monotonic() - checked_at > self.lag_check_interval:
+            if connection is None:
+                return True  # unknown yet; measured once a connection is checked out
+            lag = self._measure_lag(connection)
+            self._lag[index] = (time.monotonic(), lag)
+        return lag is not None and lag <= self.max_lag
+
+    def get_connection(self) -> Optional[PooledConnection]:
+        """
+        Check out a connection from a healthy replica
+
+        Returns:
+            PooledConnection or None: None when no replica can serve reads (use the primary)
+        """
+        order = list(range(len(self.pools)))
+        random.shuffle(order)
+        for index in order:
+            if not self._is_fresh(index):
+                continue
+            try:
+                connection = self.pools[index].get_connection()
+            except Exception as e:
+                logger.warning(f"Replica {index} unavailable: {e}")
+                continue
+            if self._is_fresh(index, connection):
+                return connection
+            connection.close()
+        return None
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Get pool metrics and last measured lag per replica"""
+        stats = []
+        for index, pool in enumerate(self.pools):
+            replica_stats = pool.get_stats()
+            replica_stats['host'] = pool.db_config.get('host')
+            replica_stats['lag_seconds'] = self._lag.get(index, (None, None))[1]
+            stats.append(replica_stats)
+        return stats
+
+
+# Global instances (one pool per worker process)
+db_pool = ConnectionPool(
+    Config.DB_CONFIG,
+    max_size=Config.DB_POOL_SIZE,
+    timeout=Config.DB_POOL_TIMEOUT,
+    recycle=Config.DB_POOL_RECYCLE,
+    ping_interval=Config.DB_POOL_PING_INTERVAL
+)
+
+replica_set = ReplicaSet(
+    Config.DB_REPLICAS,
+    max_lag=Config.DB_REPLICA_MAX_LAG,
+    lag_check_interval=Config.DB_REPLICA_LAG_CHECK_INTERVAL,
+    max_size=Config.DB_POOL_SIZE,
+    timeout=Config.DB_POOL_TIMEOUT,
+    recycle=Config.DB_POOL_RECYCLE,
+    ping_interval=Config.DB_POOL_PING_INTERVAL
+)
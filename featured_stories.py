@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Featured Stories Cache for AI Storytelling Platform
+Keeps the home page's most viewed published stories in process memory. Requests
+only read the cached list; reloads run in a background thread, one at a time,
+when the list is older than FEATURED_STORIES_TTL or a story changed.
+"""
+
+import time
+import logging
+from typing import Callable, List, Optional
+
+from background import BackgroundRefresher
+from config import Config
+from data_access import StoryCard
+from top_stories import top_stories
+
+logger = logging.getLogger(__name__)
+
+# Longest a request waits for the very first load before rendering without featured stories
+COLD_WAIT_TIMEOUT = 2.0
+
+
+class FeaturedStories:
+    """Per-process cache of the home page's featured (most viewed) stories"""
+
+    def __init__(self, ttl: int = 60, limit: int = 3):
+        """
+        Initialize the featured stories cache
+
+        Args:
+            ttl (int): Seconds before a background reload is started
+            limit (int): Number of featured stories
+        """
+        self.ttl = ttl
+        self.limit = limit
+        self._cards: Optional[List[StoryCard]] = None
+        self._loaded_at = 0.0
+        self._connection_factory = None
+        self._refresher = BackgroundRefresher('featured-stories-reload', self._reload)
+        self._stats = {'hits': 0, 'stale_hits': 0, 'cold_misses': 0, 'loads': 0, 'invalidations': 0}
+
+    def _reload(self):
+        connection = self._connection_factory()
+        try:
+            self._cards = top_stories.top(connection.cursor(), self.limit)
+        finally:
+            connection.close()
+        self._loaded_at = time.monotonic()
+        self._stats['loads'] += 1
+
+    def get(self, connection_factory: Callable) -> List[StoryCard]:
+        """
+        Get the featured stories without querying on the request path
+
+        An expired list is still returned while a background reload replaces it.
+        Only the first call in a process waits (up to COLD_WAIT_TIMEOUT) for a
+        load, and concurrent first calls share that one load.
+
+        Args:
+            connection_factory (callable): Returns a pooled connection (closed after use);
+                called from the background thread
+
+        Returns:
+            list: StoryCard rows, most viewed first
+        """
+        self._connection_factory = connection_factory
+        cards = self._cards
+        if cards is None:
+            self._stats['cold_misses'] += 1
+            self._refresher.trigger(after_running=False)
+            self._refresher.wait(COLD_WAIT_TIMEOUT)
+            return self._cards or []
+
+        if time.monotonic() - self._loaded_at >= self.ttl:
+            self._stats['stale_hits'] += 1
+            self._refresher.trigger(after_running=False)
+        else:
+            self._stats['hits'] += 1
+        return cards
+
+    def invalidate(self, story_ids=None):
+        """story_cards change listener (approve, reject, delete, ...): reload in the background"""
+        self._stats['invalidations'] += 1
+        self._loaded_at = 0.0
+        if self._connection_factory is not None:
+            self._refresher.trigger()
+
+    def get_stats(self):
+        """Get cache hit/load counters"""
+        stats = dict(self._stats)
+        stats['errors'] = self._refresher.errors
+        stats['cached'] = len(self._cards) if self._cards is not None else None
+        stats['age_seconds'] = round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None
+        stats['reloading'] = self._refresher.running
+        return stats
+
+
+# Global instance
+featured_stories = FeaturedStories(ttl=Config.FEATURED_STORIES_TTL)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+HyperLogLog Sketches for AI Storytelling Platform
+Approximate distinct counts in constant space: a sketch of 2**precision one-byte
+registers counts any number of viewers with a standard error of about
+1.04 / sqrt(2**precision) (1.6% at the default precision 12). Sketches of the
+same precision merge by taking the register-wise maximum, so per-worker and
+per-day sketches combine into totals without the underlying viewer IDs.
+"""
+
+import math
+import zlib
+import hashlib
+from typing import Optional
+
+DEFAULT_PRECISION = 12
+
+_HASH_BITS = 64
+
+
+def hash64(value: str) -> int:
+    """Stable 64-bit hash of a string (the same in every worker and process)"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """Mergeable approximate distinct counter"""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytearray] = None):
+        """
+        Initialize a sketch
+
+        Args:
+            precision (int): log2 of the register count (4-16)
+            registers (bytearray): Existing registers, e.g. from from_bytes()
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError(f"HyperLogLog precision must be between 4 and 16, got {precision}")
+        self.precision = precision
+        self.registers = registers if registers is not None else bytearray(1 << precision)
+
+    def add(self, value: str):
+        """Count a value (adding the same value again changes nothing)"""
+        h = hash64(value)
+        index = h >> (_HASH_BITS - self.precision)
+        rest_bits = _HASH_BITS - self.precision
+        rest = h & ((1 << rest_bits) - 1)
+        # Position of the first 1 bit in the remaining bits
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog'):
+        """Add every value counted by another sketch of the same precision"""
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog precision {other.precision} into {self.precision}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        """Estimated number of distinct values added"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        # Small range correction: linear counting while many registers are still empty
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def is_empty(self) -> bool:
+        """True if nothing has been added"""
+        return not any(self.registers)
+
+    def to_bytes(self) -> bytes:
+        """Compact storage form: precision byte + zlib-compressed registers"""
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers), 9)
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes], precision: int = DEFAULT_PRECISION) -> 'HyperLogLog':
+        """
+        Load a sketch written by to_bytes()
+
+        Args:
+            data (bytes): Stored sketch; empty or None gives an empty sketch
+            precision (int): Precision of the empty sketch
+        """
+        if not data:
+            return cls(precision)
+        registers = bytearray(zlib.decompress(data[1:]))
+        if len(registers) != 1 << data[0]:
+            raise ValueError("Corrupt HyperLogLog sketch")
+        return cls(data[0], registers)
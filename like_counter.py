@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Sharded Like Counter for AI Storytelling Platform
+A viral story would have every like serialize on its one stories row. Instead,
+like_story adds +1 / -1 to one of LIKE_COUNTER_SHARDS slot rows per story in
+story_like_shards, picked at random, so concurrent likes rarely wait on the same
+row lock. A background rollup moves the slot totals into stories.like_count and
+story_cards every LIKE_ROLLUP_INTERVAL seconds and deletes the slots it moved.
+
+The true count is stories.like_count plus the story's slots. Single-story reads
+(story page, like response) add the SUM of the story's slots in the same query
+(PENDING_LIKES_SQL in data_access.py), so they are exact whichever worker rolls
+up. Card lists read story_cards.like_count and are
+at most one rollup interval behind.
+
+With LIKE_COUNTER_SHARDS=0 likes update stories.like_count in place, and the
+rollup copies the counts of the stories this worker saw liked to story_cards,
+so a like still never locks the card row. A worker that exits before its next
+rollup leaves those cards behind until their next view flush or card refresh.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from config import Config
+from story_cards import story_cards
+
+logger = logging.getLogger(__name__)
+
+# Slot rows moved per rollup transaction
+ROLLUP_BATCH_SIZE = 1000
+
+
+class LikeCounter:
+    """Per-process writer of sharded like counts and their rollup"""
+
+    def __init__(self, shards: int = 16, rollup_interval: float = 5):
+        """
+        Initialize the counter
+
+        Args:
+            shards (int): Slot rows per story; 0 updates stories.like_count directly
+            rollup_interval (float): Seconds between background rollups
+        """
+        self.shards = shards
+        self.rollup_interval = rollup_interval
+        self._lock = threading.Lock()
+        self._rollup_lock = threading.Lock()
+        self._connection_factory: Optional[Callable] = None
+        self._thread_pid = None
+        self._stale_cards = set()
+        self._stats = {'rollups': 0, 'slots_rolled_up': 0, 'errors': 0}
+
+    @property
+    def sharded(self) -> bool:
+        return self.shards > 0
+
+    def start(self, connection_factory: Callable):
+        """
+        Start this worker's rollup thread
+
+        It runs even before the worker takes a like, so slots written before a
+        deploy or restart are still moved into stories.like_count.
+
+        Args:
+            connection_factory (callable): Returns a pooled primary connection (closed after use)
+        """
+        self._connection_factory = connection_factory
+        self._start_thread()
+
+    def add(self, cursor, story_id: int, delta: int):
+        """Add to a random slot of the story, in the caller's transaction"""
+        cursor.execute("""
+            INSERT INTO story_like_shards (story_id, slot, delta) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE delta = delta + VALUES(delta)
+        """, (story_id, random.randrange(self.shards), delta))
+
+    def card_changed(self, story_id: int):
+        """Have the next rollup copy the story's in-place like_count to story_cards (unsharded mode)"""
+        with self._lock:
+            self._stale_cards.add(story_id)
+
+    def _sync_cards(self, connection, cursor):
+        with self._lock:
+            story_ids, self._stale_cards = self._stale_cards, set()
+        if not story_ids:
+            return
+        try:
+            connection.begin()
+            story_cards.sync_counters(cursor, story_ids)
+            connection.commit()
+        except Exception:
+            with self._lock:
+                self._stale_cards |= story_ids
+            raise
+
+    def _start_thread(self):
+        """Start the rollup thread once per process (a thread started before a fork does not run in the child)"""
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name='like-counter-rollup', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.rollup_interval)
+            self.rollup()
+
+    def rollup(self) -> int:
+        """
+        Move slot totals into stories.like_count and story_cards, and copy
+        in-place like counts to story_cards (see card_changed)
+
+        Slots are read with FOR UPDATE and deleted in the same transaction, so
+        concurrent rollups in other workers never move a slot twice.
+
+        Returns:
+            int: Number of slot rows moved
+        """
+        if self._connection_factory is None or not self._rollup_lock.acquire(blocking=False):
+            return 0
+        try:
+            moved = 0
+            connection = None
+            try:
+                connection = self._connection_factory()
+                cursor = connection.cursor()
+                self._sync_cards(connection, cursor)
+                while True:
+                    connection.begin()
+                    cursor.execute("""
+                        SELECT story_id, slot, delta FROM story_like_shards
+                        ORDER BY story_id, slot
+                        LIMIT %s
+                        FOR UPDATE
+                    """, (ROLLUP_BATCH_SIZE,))
+                    slots = cursor.fetchall()
+                    if not slots:
+                        connection.commit()
+                        break
+                    full = len(slots) == ROLLUP_BATCH_SIZE
+                    if full and slots[0][0] != slots[-1][0]:
+                        # The last story may have slots past the limit; move it whole in the next batch
+                        slots = [slot for slot in slots if slot[0] != slots[-1][0]]
+                    self._move(cursor, slots)
+                    connection.commit()
+                    moved += len(slots)
+                    if not full:
+                        break
+            except Exception as e:
+                self._stats['errors'] += 1
+                logger.error(f"Like counter rollup failed: {e}")
+            finally:
+                if connection is not None:
+                    connection.close()
+
+            if moved:
+                self._stats['rollups'] += 1
+                self._stats['slots_rolled_up'] += moved
+            return moved
+        finally:
+            self._rollup_lock.release()
+
+    @staticmethod
+    def _move(cursor, slots: List[tuple]):
+        totals: Counter = Counter()
+        for story_id, _, delta in slots:
+            totals[story_id] += delta
+        story_ids = sorted(totals)
+        changed = [story_id for story_id in story_ids if totals[story_id]]
+        if changed:
+            cases = ' '.join(['WHEN %s THEN %s'] * len(changed))
+            placeholders = ','.join(['%s'] * len(changed))
+            cursor.execute(f"""
+                UPDATE stories
+                SET like_count = GREATEST(0, like_count + CASE id {cases} END)
+                WHERE id IN ({placeholders})
+            """, [value for story_id in changed for value in (story_id, totals[story_id])] + changed)
+            story_cards.sync_counters(cursor, changed)
+        cursor.execute(
+            "DELETE FROM story_like_shards WHERE (story_id, slot) IN ("
+            + ','.join(['(%s, %s)'] * len(slots)) + ")",
+            [value for story_id, slot, _ in slots for value in (story_id, slot)])
+
+    def get_stats(self) -> Dict:
+        """Get rollup counters"""
+        stats = dict(self._stats)
+        stats['shards'] = self.shards
+        return stats
+
+
+# Global instance
+like_counter = LikeCounter(shards=Config.LIKE_COUNTER_SHARDS, rollup_interval=Config.LIKE_ROLLUP_INTERVAL)
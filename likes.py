@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Story Likes for AI Storytelling Platform
+Like toggles without a read-then-write race: the unique (user_id, story_id) key
+decides whether a click likes or unlikes. Everything runs in one transaction. Two
+concurrent clicks by the same user can deadlock on the like row; InnoDB rolls one
+back and it is retried, so each click toggles exactly once.
+
+The count goes to a random slot of story_like_shards (see like_counter.py), so a
+like never locks the stories or story_cards row; the count returned is the
+rolled-up like_count plus the story's slots, read in the same transaction. With
+LIKE_COUNTER_SHARDS=0 the stories row is updated in place and the new like_count comes back from the
+UPDATE itself via LAST_INSERT_ID(expr); the card is still left to the rollup
+(like_counter.card_changed), so the hot story_cards row is not locked either.
+"""
+
+import logging
+from typing import Optional, Tuple
+
+import pymysql
+
+from data_access import PENDING_LIKES_SQL
+from like_counter import like_counter
+
+logger = logging.getLogger(__name__)
+
+# ER_LOCK_DEADLOCK, ER_LOCK_WAIT_TIMEOUT: the transaction was rolled back and can be retried
+RETRYABLE_ERRORS = (1213, 1205)
+MAX_ATTEMPTS = 3
+
+
+class LikeStore:
+    """Writes to story_likes and the story's like count"""
+
+    @staticmethod
+    def _apply_delta(cursor, story_id: int, delta: int) -> Optional[int]:
+        """
+        Add delta to a published story's like count
+
+        Returns:
+            int or None: The new like_count, or None when no published story matched
+        """
+        if like_counter.sharded:
+            cursor.execute(f"""
+                SELECT CAST(s.like_count + {PENDING_LIKES_SQL} AS SIGNED) FROM stories s
+                WHERE s.id = %s AND s.status = 'published' AND s.deleted_at IS NULL
+            """, (story_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            like_counter.add(cursor, story_id, delta)
+            return max(0, row[0] + delta)
+        cursor.execute("""
+            UPDATE stories
+            SET like_count = LAST_INSERT_ID(GREATEST(0, like_count + %s))
+            WHERE id = %s AND status = 'published' AND deleted_at IS NULL
+        """, (delta, story_id))
+        if cursor.rowcount:
+            return cursor.lastrowid
+        # An unlike that leaves the count at 0 changes no row; tell it apart from a missing story
+        cursor.execute("""
+            SELECT 1 FROM stories
+            WHERE id = %s AND status = 'published' AND deleted_at IS NULL
+        """, (story_id,))
+        return 0 if cursor.fetchone() else None
+
+    def _run(self, connection, cursor, write) -> Optional[Tuple[str, int]]:
+        """Run write(cursor) in a transaction, retrying deadlocks; commits unless it returns None"""
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                connection.begin()
+                result = write(cursor)
+                if result is None:
+                    connection.rollback()
+                    return None
+                action, like_count, story_id, delta = result
+                connection.commit()
+                if not like_counter.sharded:
+                    like_counter.card_changed(story_id)
+                return action, like_count
+            except pymysql.err.OperationalError as e:
+                connection.rollback()
+                if e.args[0] not in RETRYABLE_ERRORS or attempt == MAX_ATTEMPTS:
+                    raise
+                logger.info(f"Retrying like toggle after error {e.args[0]} (attempt {attempt})")
+
+    def toggle(self, connection, cursor, user_id: int, story_id: int) -> Optional[Tuple[str, int]]:
+        """
+        Like the story if this user has not, otherwise remove the like
+
+        Args:
+            connection: Connection the cursor belongs to (transaction control)
+            cursor: Cursor on the primary database
+            user_id (int): Logged-in user
+            story_id (int): Story to toggle
+
+        Returns:
+            tuple or None: ('liked' or 'unliked', new like_count), or None when the
+            story does not exist or is not published
+        """
+        def write(cursor):
+            cursor.execute("INSERT IGNORE INTO story_likes (user_id, story_id) VALUES (%s, %s)",
+                           (user_id, story_id))
+            if cursor.rowcount:
+                action, delta = 'liked', 1
+            else:
+                cursor.execute("DELETE FROM story_likes WHERE user_id = %s AND story_id = %s",
+                               (user_id, story_id))
+                action, delta = 'unliked', -1
+            like_count = self._apply_delta(cursor, story_id, delta)
+            return None if like_count is None else (action, like_count, story_id, delta)
+
+        return self._run(connection, cursor, write)
+
+    def adjust(self, connection, cursor, story_id: int, liked: bool) -> Optional[int]:
+        """
+        Count an anonymous like or unlike (tracked in the session, not story_likes)
+
+        Args:
+            connection: Connection the cursor belongs to
+            cursor: Cursor on the primary database
+            story_id (int): Story
+            liked (bool): True for a like, False for an unlike
+
+        Returns:
+            int or None: New like_count, or None when the story is not published
+        """
+        def write(cursor):
+            delta = 1 if liked else -1
+            like_count = self._apply_delta(cursor, story_id, delta)
+            return None if like_count is None else ('liked' if liked else 'unliked', like_count, story_id, delta)
+
+        result = self._run(connection, cursor, write)
+        return result[1] if result else None
+
+
+# Global instance
+like_store = LikeStore()
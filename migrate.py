@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Schema Migration Runner for AI Storytelling Platform
+Applies the numbered SQL files in migrations/ and records them in schema_version
+
+Usage:
+    python migrate.py            # apply pending migrations
+    python migrate.py status     # list applied / pending migrations
+"""
+
+import os
+import re
+import sys
+import logging
+from typing import List, Tuple, Set
+
+import pymysql
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{4})_([a-z0-9_]+)\.sql$')
+
+# MySQL has no ADD COLUMN / ADD INDEX IF NOT EXISTS. Databases that were patched
+# by the old request-time ALTERs already have these objects, so treat them as applied.
+ALREADY_APPLIED_ERRORS = {
+    1050,  # ER_TABLE_EXISTS_ERROR
+    1060,  # ER_DUP_FIELDNAME
+    1061,  # ER_DUP_KEYNAME
+}
+
+LOCK_NAME = 'ai_story_schema_migrations'
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Split a migration file into statements
+
+    Args:
+        sql (str): File contents; statements end with ';' at the end of a line
+
+    Returns:
+        list: Individual SQL statements without comments
+    """
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    statements = re.split(r';\s*$', '\n'.join(lines), flags=re.MULTILINE)
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+class MigrationRunner:
+    """Applies versioned schema migrations"""
+
+    def __init__(self, migrations_dir: str = None, db_config: dict = None):
+        """
+        Initialize the migration runner
+
+        Args:
+            migrations_dir (str): Directory containing NNNN_name.sql files
+            db_config (dict): Keyword arguments for pymysql.connect
+        """
+        self.migrations_dir = migrations_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+        self.db_config = db_config or Config.DB_CONFIG
+
+    def discover(self) -> List[Tuple[int, str, str]]:
+        """
+        Find migration files on disk
+
+        Returns:
+            list: (version, name, path) tuples ordered by version
+        """
+        migrations = []
+        for filename in os.listdir(self.migrations_dir):
+            match = MIGRATION_FILE_PATTERN.match(filename)
+            if match:
+                migrations.append((int(match.group(1)), match.group(2), os.path.join(self.migrations_dir, filename)))
+
+        migrations.sort()
+        versions = [version for version, _, _ in migrations]
+        if len(versions) != len(set(versions)):
+            raise ValueError(f"Duplicate migration version numbers in {self.migrations_dir}")
+        return migrations
+
+    def _ensure_version_table(self, cursor):
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+
+    def applied_versions(self, cursor) -> Set[int]:
+        """Get the set of versions recorded in schema_version"""
+        self._ensure_version_table(cursor)
+        cursor.execute("SELECT version FROM schema_version")
+        return {row[0] for row in cursor.fetchall()}
+
+    def _apply_file(self, cursor, version: int, name: str, path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            statements = split_statements(f.read())
+
+        for statement in statements:
+            try:
+                cursor.execute(statement)
+            except pymysql.err.MySQLError as e:
+                if e.args and e.args[0] in ALREADY_APPLIED_ERRORS:
+                    logger.info(f"Migration {version:04d}: skipping already-applied statement ({e.args[1]})")
+                    continue
+                raise
+
+        cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)", (version, name))
+
+    def upgrade(self) -> List[str]:
+        """
+        Apply all pending migrations in order
+
+        Note: MySQL commits DDL implicitly, so a migration that fails halfway is
+        not rolled back; it stays unrecorded and is retried on the next run.
+
+        Returns:
+            list: Names of the migrations that were applied
+        """
+        connection = pymysql.connect(**self.db_config)
+        applied = []
+        try:
+            cursor = connection.cursor()
+
+            # Serialize concurrent deploys (several workers/instances starting at once)
+            cursor.execute("SELECT GET_LOCK(%s, 60)", (LOCK_NAME,))
+            if cursor.fetchone()[0] != 1:
+                raise RuntimeError("Could not acquire the schema migration lock")
+
+            try:
+                done = self.applied_versions(cursor)
+                for version, name, path in self.discover():
+                    if version in done:
+                        continue
+                    logger.info(f"Applying migration {version:04d}_{name}")
+                    self._apply_file(cursor, version, name, path)
+                    connection.commit()
+                    applied.append(f"{version:04d}_{name}")
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                cursor.fetchone()
+        finally:
+            connection.close()
+
+        if applied:
+            logger.info(f"Applied {len(applied)} migration(s)")
+        else:
+            logger.info("Database schema is up to date")
+        return applied
+
+    def status(self) -> List[Tuple[str, bool]]:
+        """
+        Get migration status
+
+        Returns:
+            list: (migration name, applied) tuples
+        """
+        connection = pymysql.connect(**self.db_config)
+        try:
+            cursor = connection.cursor()
+            done = self.applied_versions(cursor)
+        finally:
+            connection.close()
+        return [(f"{version:04d}_{name}", version in done) for version, name, _ in self.discover()]
+
+
+# Global instance
+migration_runner = MigrationRunner()
+
+
+def main(argv: List[str]) -> int:
+    logging.basicConfig(level=logging.INFO)
+    command = argv[1] if len(argv) > 1 else 'upgrade'
+
+    if command == 'upgrade':
+        migration_runner.upgrade()
+    elif command == 'status':
+        for name, applied in migration_runner.status():
+            print(f"[{'x' if applied else ' '}] {name}")
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,2 @@
+-- Previously added on demand by login()
+ALTER TABLE users ADD COLUMN last_login DATETIME NULL;
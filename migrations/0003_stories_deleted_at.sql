@@ -0,0 +1,2 @@
+-- Previously added on demand by admin_delete_story()
+ALTER TABLE stories ADD COLUMN deleted_at DATETIME NULL;
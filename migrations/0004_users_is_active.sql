@@ -0,0 +1,2 @@
+-- Previously added on demand by admin_toggle_user_status() / admin_batch_user_action()
+ALTER TABLE users ADD COLUMN is_active TINYINT(1) DEFAULT 1;
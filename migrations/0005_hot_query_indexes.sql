@@ -0,0 +1,33 @@
+-- Indexes for the hot query shapes in app.py (verified by query_check.py)
+
+-- story_library / admin_stories: status + not deleted, newest first
+CREATE INDEX idx_stories_status_deleted_created ON stories (status, deleted_at, created_at);
+
+-- index (featured) / story_detail related / admin_dashboard top stories: most viewed first
+CREATE INDEX idx_stories_status_deleted_views ON stories (status, deleted_at, view_count, published_at);
+
+-- my_stories / get_user_stories: one author's stories, newest first
+CREATE INDEX idx_stories_user_created ON stories (user_id, created_at);
+
+-- admin_recycling_bin: deleted stories, most recently deleted first
+CREATE INDEX idx_stories_deleted_at ON stories (deleted_at);
+
+-- story_tags primary key is (story_id, tag_id); tag -> stories lookups need the reverse
+CREATE INDEX idx_story_tags_tag ON story_tags (tag_id, story_id);
+
+-- get_story_types / edit_story: story types are tags with category_id = 1
+CREATE INDEX idx_tags_category ON tags (category_id);
+
+-- like_story / check_like_status: at most one like per user and story
+DELETE l1 FROM story_likes l1
+JOIN story_likes l2 ON l1.user_id = l2.user_id AND l1.story_id = l2.story_id AND l1.id > l2.id;
+ALTER TABLE story_likes ADD UNIQUE KEY uk_story_likes_user_story (user_id, story_id);
+CREATE INDEX idx_story_likes_story ON story_likes (story_id);
+
+-- reset_password / reset_password_api: token lookup; cleanup by user
+CREATE UNIQUE INDEX uk_password_reset_tokens_token ON password_reset_tokens (token);
+CREATE INDEX idx_password_reset_tokens_user ON password_reset_tokens (user_id);
+
+-- admin list pages ordered by creation time
+CREATE INDEX idx_users_created ON users (created_at);
+CREATE INDEX idx_user_feedback_created ON user_feedback (created_at);
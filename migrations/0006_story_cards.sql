@@ -0,0 +1,57 @@
+-- story_cards: denormalized list-page projection of stories (maintained by story_cards.py)
+-- List pages read author, tag names, excerpt and counters from here with one indexed
+-- range scan instead of joining users, story_tags and tags and grouping per request.
+
+CREATE TABLE IF NOT EXISTS story_cards (
+    story_id INT PRIMARY KEY,
+    user_id INT NOT NULL,
+    author VARCHAR(50) NULL,
+    author_email VARCHAR(255) NULL,
+    title VARCHAR(255) NOT NULL,
+    description TEXT NULL,
+    excerpt TEXT NULL,
+    tags VARCHAR(1024) NULL,
+    image_path VARCHAR(500) NULL,
+    thumbnail_url VARCHAR(600) NULL,
+    language VARCHAR(20) NULL,
+    language_name VARCHAR(50) NULL,
+    language_group VARCHAR(20) NULL,
+    status VARCHAR(20) NOT NULL,
+    word_count INT NOT NULL DEFAULT 0,
+    reading_time INT NOT NULL DEFAULT 1,
+    view_count INT NOT NULL DEFAULT 0,
+    like_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NULL,
+    updated_at TIMESTAMP NULL,
+    published_at DATETIME NULL,
+    deleted_at DATETIME NULL,
+    -- story_library / admin_stories / admin_dashboard pending: status + not deleted, newest first
+    KEY idx_story_cards_status_deleted_created (status, deleted_at, created_at),
+    -- index featured / story_detail related / admin_dashboard top stories: most viewed first
+    KEY idx_story_cards_status_deleted_views (status, deleted_at, view_count, published_at),
+    -- my_stories / get_user_stories: one author's stories, newest first
+    KEY idx_story_cards_user_created (user_id, created_at),
+    -- admin_recycling_bin: most recently deleted first
+    KEY idx_story_cards_deleted_at (deleted_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Backfill (same projection as story_cards.CARD_SELECT)
+INSERT INTO story_cards (story_id, user_id, author, author_email, title, description, excerpt, tags,
+                         image_path, thumbnail_url, language, language_name, language_group, status,
+                         word_count, reading_time, view_count, like_count,
+                         created_at, updated_at, published_at, deleted_at)
+SELECT s.id, s.user_id, u.username, u.email, s.title, s.description,
+       COALESCE(s.description, LEFT(s.content, 200)),
+       (SELECT GROUP_CONCAT(t.name ORDER BY t.id)
+        FROM story_tags st JOIN tags t ON st.tag_id = t.id
+        WHERE st.story_id = s.id),
+       s.image_path,
+       IF(s.image_path IS NULL OR s.image_path = '', NULL,
+          CONCAT('/image/stories/', REPLACE(s.image_path, '_medium.', '_thumbnail.'))),
+       s.language, s.language_name,
+       CASE WHEN s.language LIKE 'cmn-%' THEN 'zh' ELSE SUBSTRING_INDEX(s.language, '-', 1) END,
+       s.status, s.word_count, s.reading_time, s.view_count, s.like_count,
+       s.created_at, s.updated_at, s.published_at, s.deleted_at
+FROM stories s
+LEFT JOIN users u ON s.user_id = u.id
+ON DUPLICATE KEY UPDATE story_id = story_id;
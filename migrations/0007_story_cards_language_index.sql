@@ -0,0 +1,4 @@
+-- story_library language filter: published, not deleted, one language group, newest first.
+-- The primary key (story_id) is the implicit last index column, so the
+-- (created_at, story_id) keyset continues inside this index.
+CREATE INDEX idx_story_cards_status_deleted_lang_created ON story_cards (status, deleted_at, language_group, created_at);
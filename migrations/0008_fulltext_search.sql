@@ -0,0 +1,17 @@
+-- FULLTEXT indexes for story search (search.py) and the admin search boxes, replacing
+-- LIKE '%term%' scans. The ngram parser indexes overlapping character pairs, so text
+-- without spaces (Chinese, Japanese) is searchable; search.py builds matching queries.
+
+-- With stopwords enabled the ngram parser drops every bigram containing one ('a', 'i', ...),
+-- which would leave most English text unsearchable. The setting applies when an index is built.
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+-- Story search: title matches are ranked separately from the full text
+ALTER TABLE stories ADD FULLTEXT INDEX ft_stories_title (title) WITH PARSER ngram;
+ALTER TABLE stories ADD FULLTEXT INDEX ft_stories_text (title, description, content) WITH PARSER ngram;
+
+-- admin_users / admin_recycling_bin (author): username or email
+ALTER TABLE users ADD FULLTEXT INDEX ft_users_username_email (username, email) WITH PARSER ngram;
+
+-- admin_feedback: feedback text
+ALTER TABLE user_feedback ADD FULLTEXT INDEX ft_user_feedback_content (content) WITH PARSER ngram;
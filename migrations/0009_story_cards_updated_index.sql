@@ -0,0 +1,2 @@
+-- search_index.py catch-up: cards changed since the last poll
+CREATE INDEX idx_story_cards_updated_at ON story_cards (updated_at);
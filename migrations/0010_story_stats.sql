@@ -0,0 +1,15 @@
+-- story_stats: view counters, kept out of the content-heavy stories row. view_counter.py
+-- buffers views per worker and adds them here with one multi-row upsert per flush, so a
+-- popular story costs one row write per VIEW_FLUSH_INTERVAL instead of one per page view.
+-- stories.view_count is no longer updated; readers take the count from here or story_cards.
+
+CREATE TABLE IF NOT EXISTS story_stats (
+    story_id INT PRIMARY KEY,
+    view_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Backfill the counts accumulated in stories.view_count
+INSERT INTO story_stats (story_id, view_count)
+SELECT id, view_count FROM stories WHERE view_count > 0
+ON DUPLICATE KEY UPDATE view_count = GREATEST(story_stats.view_count, VALUES(view_count));
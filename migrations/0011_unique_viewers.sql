@@ -0,0 +1,17 @@
+-- Unique viewers per story: HyperLogLog sketches (hyperloglog.py) merged by view_counter.py.
+-- A sketch is one byte per register (4096 at precision 12), zlib-compressed, so a story costs
+-- a few hundred bytes to ~2 KB per day however many people read it. `viewers` caches the
+-- sketch's estimate; windows longer than a day merge the sketches instead of summing it.
+
+CREATE TABLE IF NOT EXISTS story_daily_viewers (
+    story_id INT NOT NULL,
+    day DATE NOT NULL,
+    viewers INT NOT NULL DEFAULT 0,
+    sketch BLOB NOT NULL,
+    PRIMARY KEY (story_id, day)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- All-time unique viewers next to the view count
+ALTER TABLE story_stats
+    ADD COLUMN unique_viewers INT NOT NULL DEFAULT 0 AFTER view_count,
+    ADD COLUMN viewer_sketch BLOB NULL AFTER unique_viewers;
@@ -0,0 +1,11 @@
+-- content_versions: counters bumped in the same transaction as content changes, so caches of
+-- rendered output (page_cache.py) can tell they are stale with one primary-key lookup.
+-- story_cards.py bumps 'stories' whenever a card is refreshed or deleted.
+
+CREATE TABLE IF NOT EXISTS content_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO content_versions (name, version) VALUES ('stories', 1)
+ON DUPLICATE KEY UPDATE name = name;
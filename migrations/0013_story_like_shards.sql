@@ -0,0 +1,12 @@
+-- story_like_shards: pending like deltas, spread over LIKE_COUNTER_SHARDS slot rows per
+-- story so concurrent likes on one viral story rarely wait on the same row lock.
+-- like_counter.py adds +1 / -1 to a random slot and a background rollup moves the slot
+-- totals into stories.like_count (and story_cards), deleting the slots it moved.
+-- The exact count of a story is stories.like_count + SUM(delta) of its slots.
+
+CREATE TABLE IF NOT EXISTS story_like_shards (
+    story_id INT NOT NULL,
+    slot SMALLINT UNSIGNED NOT NULL,
+    delta INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (story_id, slot)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,3 @@
+-- story_cards.thumbnail_url duplicated image_service's file naming in SQL; the
+-- thumbnail URL is now derived from image_path by StoryCard.thumbnail_url
+ALTER TABLE story_cards DROP COLUMN thumbnail_url;
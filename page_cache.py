@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Rendered Page Cache for AI Storytelling Platform
+Keeps rendered HTML in process memory so repeat readers skip the queries and the
+Jinja render. Entries are keyed on the content version, a counter in
+content_versions that story_cards bumps in the same transaction as every story
+change (publish, edit, moderation, delete, restore); a new version makes every
+older entry unreachable, and the LRU drops them.
+
+Workers read the version with a primary-key lookup at most once per
+CONTENT_VERSION_CHECK_INTERVAL seconds, so a change made in another worker shows
+up within that interval. View and like counts on cached pages may lag by up to
+PAGE_CACHE_TTL seconds.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config import Config
+from story_cards import CONTENT_VERSION_NAME
+
+logger = logging.getLogger(__name__)
+
+
+class ContentVersion:
+    """Per-process view of the stories content version"""
+
+    def __init__(self, check_interval: float = 2):
+        """
+        Initialize with no known version
+
+        Args:
+            check_interval (float): Seconds a probed version is trusted before re-reading it
+        """
+        self.check_interval = check_interval
+        self._version = None
+        self._checked_at = 0.0
+        self._stats = {'probes': 0, 'changes': 0}
+
+    def current(self, cursor_factory: Callable) -> Optional[int]:
+        """
+        The content version, probing the database when the last read is too old
+
+        Args:
+            cursor_factory (callable): Returns a tuple cursor; only called when a probe is due
+
+        Returns:
+            int: Current version, or None when it cannot be read (callers must not cache)
+        """
+        if self._version is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return self._version
+        try:
+            cursor = cursor_factory()
+            cursor.execute("SELECT version FROM content_versions WHERE name = %s", (CONTENT_VERSION_NAME,))
+            row = cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Failed to read content version: {e}")
+            return None
+        self._stats['probes'] += 1
+        version = row[0] if row else None
+        if version != self._version:
+            self._stats['changes'] += 1
+        self._version = version
+        self._checked_at = time.monotonic()
+        return version
+
+    def expire(self, story_ids=None):
+        """story_cards change listener: re-read the version on the next request"""
+        self._checked_at = 0.0
+
+    def get_stats(self) -> Dict:
+        """Get the known version and probe counters"""
+        stats = dict(self._stats)
+        stats['version'] = self._version
+        return stats
+
+
+class RenderCache:
+    """Bounded LRU of rendered output with a TTL"""
+
+    def __init__(self, ttl: int = 60, max_entries: int = 500):
+        """
+        Initialize an empty cache
+
+        Args:
+            ttl (int): Seconds an entry is served; 0 disables the cache
+            max_entries (int): Entries kept before the least recently used are dropped
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    @property
+    def enabled(self) -> bool:
+        """False when PAGE_CACHE_TTL or the entry limit is 0"""
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for key, or None when missing or expired"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries beyond max_entries"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            self._stats['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Get size and hit counters"""
+        stats = dict(self._stats)
+        stats['entries'] = len(self._entries)
+        return stats
+
+
+# Global instances
+content_version = ContentVersion(check_interval=Config.CONTENT_VERSION_CHECK_INTERVAL)
+# Whole pages for anonymous readers
+page_cache = RenderCache(ttl=Config.PAGE_CACHE_TTL, max_entries=Config.PAGE_CACHE_MAX_ENTRIES)
+# Story body and related-stories HTML (and story_detail validators), shared by every reader
+fragment_cache = RenderCache(ttl=Config.PAGE_CACHE_TTL, max_entries=Config.FRAGMENT_CACHE_MAX_ENTRIES)
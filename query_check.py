@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Query Plan Check for AI Storytelling Platform
+Runs EXPLAIN for the hot query shapes of each route and fails on full table scans
+
+Usage:
+    python query_check.py                                  # check the configured database
+    python query_check.py --database scratch --seed 20000  # migrate + seed a scratch database, then check
+
+Run it against a seeded database: on near-empty tables MySQL prefers full scans
+regardless of the available indexes, so the plans would not be representative.
+"""
+
+import sys
+import random
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+import pymysql
+
+from config import Config
+from data_access import STORY_CARD_COLUMNS, STORY_COLUMNS, fetch_published_cards
+from likes import like_store
+from migrate import MigrationRunner
+from search import StorySearch
+from story_cards import story_cards
+from top_stories import TopStoriesTracker
+
+logger = logging.getLogger(__name__)
+
+# EXPLAIN access types that read the whole table or the whole index
+FULL_SCAN_TYPES = {'ALL', 'index'}
+
+# EXPLAIN rows of INSERT ... VALUES report type ALL but read nothing
+WRITE_SELECT_TYPES = {'INSERT', 'REPLACE'}
+
+
+class StatementRecorder:
+    """
+    Stands in for a cursor and its connection while an application code path
+    runs, so the statements it issues can be EXPLAINed exactly as written
+
+    Every statement "affects" rowcount rows and fetchone() returns row, which
+    steers code that branches on results (e.g. a like vs an unlike).
+    """
+
+    def __init__(self, rowcount: int = 1, row=(0,)):
+        self.statements = []
+        self.rowcount = rowcount
+        self.lastrowid = 0
+        self._row = row
+
+    def execute(self, query, params=()):
+        self.statements.append((query, tuple(params or ())))
+
+    def fetchone(self):
+        return self._row
+
+    def fetchall(self):
+        return []
+
+    def begin(self):
+        pass
+
+    commit = rollback = begin
+
+
+def recorded(route: str, run: Callable, allowed_scans=frozenset(), **results) -> List[tuple]:
+    """
+    HOT_QUERIES entries for the statements run(cursor) issues
+
+    Args:
+        route (str): Route name; a statement number is appended when there are several
+        run (callable): Called with a StatementRecorder
+        results: StatementRecorder arguments
+    """
+    recorder = StatementRecorder(**results)
+    run(recorder)
+    statements = recorder.statements
+    return [(route if len(statements) == 1 else f"{route}:{number}", query, params, set(allowed_scans))
+            for number, (query, params) in enumerate(statements, 1)]
+
+
+# (route, query, params, aliases allowed to be scanned)
+# Statements of the like toggle, library pages and search are recorded from the
+# code that runs them; the route-level queries in app.py share its column lists.
+# The tags catalog is a handful of rows; scanning it is cheaper than an index dive.
+# <derivedN> tables are already-limited result sets materialized by the query itself.
+HOT_QUERIES = [
+    ('load_user', """
+        SELECT id, username, email, phone_number, profile_picture, bio
+        FROM users WHERE id = %s
+    """, (1,), set()),
+    ('login', """
+        SELECT id, username, email, password_hash, phone_number, profile_picture, bio
+        FROM users WHERE username = %s OR email = %s
+    """, ('user1', 'user1@example.com'), set()),
+    # index, story_detail:related and admin_dashboard read the top_stories.py top-K:
+    # a periodic seed plus a primary-key lookup of the few IDs shown
+    *recorded('top_stories:seed', TopStoriesTracker(k=50)._seed),
+    ('top_stories:cards', f"""
+        SELECT {STORY_CARD_COLUMNS}
+        FROM story_cards
+        WHERE story_id IN (%s, %s, %s) AND status = 'published' AND deleted_at IS NULL
+    """, (1, 2, 3), set()),
+    ('my_stories', f"""
+        SELECT {STORY_CARD_COLUMNS}
+        FROM story_cards
+        WHERE user_id = %s
+        ORDER BY created_at DESC
+    """, (1,), set()),
+    ('story_detail', f"""
+        SELECT {STORY_COLUMNS}
+        FROM stories s
+        JOIN users u ON s.user_id = u.id
+        LEFT JOIN story_cards c ON c.story_id = s.id
+        WHERE s.id = %s AND s.status = 'published' AND s.deleted_at IS NULL
+    """, (1,), set()),
+    *recorded('story_library', lambda cursor: fetch_published_cards(cursor, 24)),
+    *recorded('story_library:load_more',
+              lambda cursor: fetch_published_cards(cursor, 24, after=(datetime(2025, 1, 1), 1000))),
+    *recorded('story_library:language', lambda cursor: fetch_published_cards(cursor, 24, language_group='en')),
+    *recorded('story_library:category', lambda cursor: fetch_published_cards(cursor, 24, tag_id=1)),
+    *recorded('api_v1_stories:author', lambda cursor: fetch_published_cards(cursor, 20, user_id=1)),
+    ('get_story_types', """
+        SELECT id, name, description, usage_count
+        FROM tags
+        WHERE category_id = %s
+        ORDER BY id
+    """, (1,), {'tags'}),
+    ('admin_dashboard:pending', f"""
+        SELECT {STORY_CARD_COLUMNS}
+        FROM story_cards
+        WHERE status = 'pending' AND deleted_at IS NULL
+        ORDER BY created_at DESC
+        LIMIT 10
+    """, (), set()),
+    ('admin_stories', f"""
+        SELECT {STORY_CARD_COLUMNS}
+        FROM story_cards
+        WHERE status = %s AND deleted_at IS NULL
+        ORDER BY created_at DESC
+        LIMIT %s OFFSET %s
+    """, ('pending', 20, 0), set()),
+    ('admin_recycling_bin', f"""
+        SELECT {STORY_CARD_COLUMNS}
+        FROM story_cards
+        WHERE deleted_at IS NOT NULL
+        ORDER BY deleted_at DESC
+        LIMIT %s OFFSET %s
+    """, (20, 0), set()),
+    *recorded('story_library:search', lambda cursor: StorySearch().search(cursor, 'story', limit=48),
+              allowed_scans={'<derived2>'}),
+    ('admin_users:search', """
+        SELECT COUNT(*) AS total
+        FROM users u
+        WHERE MATCH(u.username, u.email) AGAINST(%s IN BOOLEAN MODE)
+    """, ('+"user1"',), set()),
+    # Both branches of the toggle: the INSERT IGNORE adds a row (like) or hits the key (unlike)
+    *recorded('like_story:like', lambda cursor: like_store.toggle(cursor, cursor, 1, 1), rowcount=1),
+    *recorded('like_story:unlike', lambda cursor: like_store.toggle(cursor, cursor, 1, 1), rowcount=0),
+    ('like_status', """
+        SELECT story_id FROM story_likes
+        WHERE user_id = %s AND story_id IN (%s, %s, %s)
+    """, (1, 1, 2, 3), set()),
+    ('reset_password', """
+        SELECT prt.id, prt.user_id, prt.expires_at, prt.used, u.username, u.email
+        FROM password_reset_tokens prt
+        JOIN users u ON prt.user_id = u.id
+        WHERE prt.token = %s
+    """, ('token-1',), set()),
+]
+
+
+def explain(cursor, query: str, params) -> List[Dict[str, Any]]:
+    """Run EXPLAIN for one query and return the plan rows"""
+    cursor.execute("EXPLAIN " + query, params)
+    return cursor.fetchall()
+
+
+def check_queries(cursor) -> List[str]:
+    """
+    EXPLAIN every hot query
+
+    Returns:
+        list: Failure descriptions (empty when every plan uses an index)
+    """
+    failures = []
+    for route, query, params, allowed_scans in HOT_QUERIES:
+        for row in explain(cursor, query, params):
+            table = row.get('table')
+            access = row.get('type')
+            print(f"{route:<30} {str(table):<12} {str(access):<12} key={row.get('key')} rows={row.get('rows')}")
+            if access in FULL_SCAN_TYPES and table not in allowed_scans \
+                    and row.get('select_type') not in WRITE_SELECT_TYPES:
+                failures.append(f"{route}: full scan ({access}) on {table}")
+    return failures
+
+
+def seed_database(cursor, story_count: int):
+    """
+    Fill a scratch database with synthetic rows so plans reflect production cardinality
+
+    Args:
+        story_count (int): Number of stories to create (users, likes etc. scale from it)
+    """
+    rng = random.Random(42)
+    now = datetime.now()
+    user_count = max(10, story_count // 10)
+    tag_count = 8
+
+    logger.info(f"Seeding {user_count} users, {story_count} stories")
+    cursor.executemany(
+        "INSERT INTO users (username, email, password_hash, created_at, last_login) VALUES (%s, %s, %s, %s, %s)",
+        [(f"user{i}", f"user{i}@example.com", 'x', now - timedelta(days=rng.randint(0, 900)), None)
+         for i in range(1, user_count + 1)]
+    )
+    cursor.executemany(
+        "INSERT INTO tags (category_id, name, description) VALUES (%s, %s, %s)",
+        [(1, f"type{i}", f"Story type {i}") for i in range(1, tag_count + 1)]
+    )
+
+    batch = []
+    for i in range(1, story_count + 1):
+        created = now - timedelta(minutes=rng.randint(0, 900 * 24 * 60))
+        status = rng.choices(['published', 'pending', 'rejected'], weights=[80, 15, 5])[0]
+        deleted = created + timedelta(days=1) if rng.random() < 0.03 else None
+        batch.append((
+            rng.randint(1, user_count), f"Story {i}", 'Lorem ipsum ' * 50, f"Description {i}",
+            status, rng.randint(0, 50000), rng.randint(0, 2000), created,
+            created if status == 'published' else None, deleted
+        ))
+        if len(batch) == 1000 or i == story_count:
+            cursor.executemany("""
+                INSERT INTO stories (user_id, title, content, description, status, view_count, like_count,
+                                     created_at, published_at, deleted_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, batch)
+            batch = []
+
+    cursor.execute("INSERT INTO story_tags (story_id, tag_id) SELECT id, 1 + (id %% %s) FROM stories", (tag_count,))
+    cursor.execute("""
+        INSERT IGNORE INTO story_likes (user_id, story_id)
+        SELECT 1 + (id * 7 %% %s), id FROM stories WHERE id %% 3 = 0
+    """, (user_count,))
+    cursor.executemany(
+        "INSERT INTO password_reset_tokens (user_id, token, expires_at) VALUES (%s, %s, %s)",
+        [(rng.randint(1, user_count), f"token-{i}", now + timedelta(hours=24)) for i in range(1, user_count + 1)]
+    )
+    story_cards.rebuild(cursor)
+
+    for table in ('users', 'tags', 'stories', 'story_tags', 'story_likes', 'password_reset_tokens', 'story_cards'):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+
+
+def main(argv: List[str]) -> int:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='EXPLAIN the hot queries and fail on full table scans')
+    parser.add_argument('--database', help='Database to check (default: DB_NAME from config)')
+    parser.add_argument('--seed', type=int, metavar='STORIES',
+                        help='Apply migrations and insert synthetic rows first (requires --database)')
+    args = parser.parse_args(argv[1:])
+
+    db_config = dict(Config.DB_CONFIG)
+    if args.database:
+        db_config['database'] = args.database
+
+    if args.seed:
+        if not args.database or args.database == Config.DB_CONFIG['database']:
+            parser.error('--seed needs --database pointing at a scratch database, not the application database')
+        MigrationRunner(db_config=db_config).upgrade()
+
+    connection = pymysql.connect(**db_config)
+    try:
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        if args.seed:
+            seed_database(cursor, args.seed)
+            connection.commit()
+        failures = check_queries(cursor)
+    finally:
+        connection.close()
+
+    if failures:
+        print("\nFull scans detected:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print(f"\nAll {len(HOT_QUERIES)} hot queries use indexes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
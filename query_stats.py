@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Query Instrumentation for AI Storytelling Platform
+Records every statement per request (fingerprint, duration, rows), aggregates per route
+and warns when one request repeats the same statement many times (N+1 patterns)
+"""
+
+import re
+import time
+import logging
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+
+from flask import g, has_app_context
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# (fingerprint, duration_ms, rows)
+QueryRecord = Tuple[str, float, int]
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql: str) -> str:
+    """
+    Normalize a statement so that calls differing only in values group together
+
+    Args:
+        sql (str): Query template (parameters are not interpolated yet)
+
+    Returns:
+        str: Whitespace-collapsed statement with literals and IN-lists replaced
+    """
+    normalized = _WHITESPACE.sub(' ', sql).strip()
+    normalized = _STRING_LITERAL.sub('?', normalized)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _PLACEHOLDER_LIST.sub('(...)', normalized)
+    return normalized
+
+
+class InstrumentedCursorMixin:
+    """Cursor mixin that appends a QueryRecord to g.query_log for every execute()"""
+
+    def execute(self, query, args=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            if has_app_context():
+                duration_ms = (time.perf_counter() - start) * 1000
+                g.setdefault('query_log', []).append((fingerprint(query), duration_ms, self.rowcount))
+
+
+class QueryStats:
+    """Per-route query aggregates for this worker process"""
+
+    def __init__(self, repeat_threshold: int = 10, max_fingerprints_per_route: int = 200):
+        """
+        Initialize the query statistics registry
+
+        Args:
+            repeat_threshold (int): Warn when a request runs one fingerprint more often than this
+            max_fingerprints_per_route (int): Cap on distinct fingerprints tracked per route
+        """
+        self.repeat_threshold = repeat_threshold
+        self.max_fingerprints_per_route = max_fingerprints_per_route
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, route: str, query_log: List[QueryRecord]):
+        """
+        Fold one request's query log into the route aggregates
+
+        Args:
+            route (str): Flask endpoint name
+            query_log (list): QueryRecords collected during the request
+        """
+        if not query_log:
+            return
+
+        repeats = Counter(record[0] for record in query_log)
+        suspicious = [(sql, count) for sql, count in repeats.items() if count > self.repeat_threshold]
+        for sql, count in suspicious:
+            logger.warning(f"Possible N+1 in {route}: {count} executions of: {sql[:200]}")
+
+        request_ms = sum(record[1] for record in query_log)
+
+        with self._lock:
+            stats = self._routes.setdefault(route, {
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'total_ms': 0.0,
+                'repeat_warnings': 0,
+                'fingerprints': {},
+            })
+            stats['requests'] += 1
+            stats['queries'] += len(query_log)
+            stats['max_queries'] = max(stats['max_queries'], len(query_log))
+            stats['total_ms'] += request_ms
+            stats['repeat_warnings'] += len(suspicious)
+
+            fingerprints = stats['fingerprints']
+            for sql, duration_ms, rows in query_log:
+                entry = fingerprints.get(sql)
+                if entry is None:
+                    if len(fingerprints) >= self.max_fingerprints_per_route:
+                        continue
+                    entry = fingerprints[sql] = {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0}
+                entry['calls'] += 1
+                entry['total_ms'] += duration_ms
+                entry['max_ms'] = max(entry['max_ms'], duration_ms)
+                entry['rows'] += max(rows or 0, 0)
+
+    def get_stats(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Get per-route aggregates
+
+        Args:
+            top (int): Number of most expensive fingerprints to include per route
+
+        Returns:
+            dict: Route name -> counts, timings and top fingerprints
+        """
+        with self._lock:
+            result = {}
+            for route, stats in self._routes.items():
+                requests = stats['requests']
+                fingerprints = sorted(stats['fingerprints'].items(), key=lambda item: item[1]['total_ms'], reverse=True)
+                result[route] = {
+                    'requests': requests,
+                    'queries': stats['queries'],
+                    'avg_queries': round(stats['queries'] / requests, 2),
+                    'max_queries': stats['max_queries'],
+                    'total_ms': round(stats['total_ms'], 3),
+                    'avg_ms': round(stats['total_ms'] / requests, 3),
+                    'repeat_warnings': stats['repeat_warnings'],
+                    'top_queries': [
+                        {
+                            'fingerprint': sql,
+                            'calls': entry['calls'],
+                            'total_ms': round(entry['total_ms'], 3),
+                            'avg_ms': round(entry['total_ms'] / entry['calls'], 3),
+                            'max_ms': round(entry['max_ms'], 3),
+                            'rows': entry['rows'],
+                        }
+                        for sql, entry in fingerprints[:top]
+                    ],
+                }
+            return result
+
+    def reset(self):
+        """Clear all aggregates"""
+        with self._lock:
+            self._routes.clear()
+
+
+# Global instance
+query_stats = QueryStats(repeat_threshold=Config.QUERY_REPEAT_WARN_THRESHOLD)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Story Search for AI Storytelling Platform
+Full-text search over story title, description and content using the InnoDB
+FULLTEXT indexes from migrations/0008 (ngram parser, so Chinese, Japanese and
+Korean text is searchable without word boundaries). InnoDB updates these
+indexes in the same transaction as the story write, so publish, edit, approve
+and delete need no separate indexing step.
+
+User input is turned into a BOOLEAN MODE query: every word (or short CJK run)
+is required, longer CJK runs contribute optional bigrams, and title matches
+are weighted above body matches when ranking.
+"""
+
+import re
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from data_access import StoryCard, STORY_CARD_COLUMNS, fetch_all
+
+logger = logging.getLogger(__name__)
+
+# Must match the server's ngram_token_size (MySQL default: 2)
+NGRAM_TOKEN_SIZE = 2
+
+# Longer CJK runs are matched as optional bigrams instead of one exact phrase
+CJK_PHRASE_MAX_LENGTH = 4
+
+# Caps the work one query can ask of the FULLTEXT index
+MAX_QUERY_TERMS = 16
+
+# A title match counts this many times a body match when ranking
+TITLE_WEIGHT = 2
+
+_CJK_RANGES = (
+    '\u3040-\u30ff'   # Hiragana, Katakana
+    '\u3400-\u4dbf'   # CJK Extension A
+    '\u4e00-\u9fff'   # CJK Unified Ideographs
+    '\uac00-\ud7af'   # Hangul syllables
+    '\uf900-\ufaff'   # CJK Compatibility Ideographs
+)
+_TOKEN_RE = re.compile(f'([{_CJK_RANGES}]+)|([^\\W_{_CJK_RANGES}]+)')
+
+
+def _runs(text: str) -> Iterator[Tuple[str, bool]]:
+    """Yield (run, is_cjk) for each CJK run or word in text"""
+    for match in _TOKEN_RE.finditer(text or ''):
+        if match.group(1):
+            yield match.group(1), True
+        else:
+            yield match.group(2).lower(), False
+
+
+def _bigrams(run: str) -> List[str]:
+    if len(run) < 2:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms: lowercased words, and overlapping bigrams for CJK runs
+
+    Args:
+        text (str): Story text or a search query
+
+    Returns:
+        list: Terms in text order (may repeat)
+    """
+    terms = []
+    for run, is_cjk in _runs(text):
+        terms.extend(_bigrams(run) if is_cjk else [run])
+    return terms
+
+
+def query_terms(text: str) -> Tuple[List[str], List[str]]:
+    """
+    Index terms for a query, following the same rules as boolean_query()
+
+    Returns:
+        tuple: (terms every match must contain, terms that only add to the score)
+    """
+    required, optional = [], []
+    for run, is_cjk in _runs(text):
+        if is_cjk and len(run) > CJK_PHRASE_MAX_LENGTH:
+            optional.extend(_bigrams(run))
+        else:
+            required.extend(_bigrams(run) if is_cjk else [run])
+    required = list(dict.fromkeys(required))[:MAX_QUERY_TERMS]
+    optional = [term for term in dict.fromkeys(optional) if term not in required]
+    return required, optional[:max(0, MAX_QUERY_TERMS - len(required))]
+
+
+def boolean_query(text: str) -> str:
+    """
+    Build a MATCH ... AGAINST (... IN BOOLEAN MODE) expression from user input
+
+    Operators in the input are dropped, so it cannot change the query's meaning.
+
+    Args:
+        text (str): Search box contents
+
+    Returns:
+        str: Boolean-mode query, or '' when the input has nothing searchable
+    """
+    parts = []
+    for run, is_cjk in _runs(text):
+        if is_cjk and len(run) > CJK_PHRASE_MAX_LENGTH:
+            parts.extend(f'"{bigram}"' for bigram in _bigrams(run))
+        elif len(run) < NGRAM_TOKEN_SIZE:
+            parts.append(f'+{run}*')
+        else:
+            parts.append(f'+"{run}"')
+    return ' '.join(list(dict.fromkeys(parts))[:MAX_QUERY_TERMS])
+
+
+class StorySearch:
+    """Ranked story search backed by the stories FULLTEXT indexes, or by an in-memory index"""
+
+    def __init__(self):
+        self.index = None
+
+    def use_index(self, index):
+        """
+        Answer published-story searches from an in-memory index (search_index.SearchIndex)
+
+        Admin searches (other statuses, deleted stories) and searches made while
+        the index is still loading keep using the FULLTEXT indexes.
+        """
+        self.index = index
+
+    def _index_for(self, status: str, deleted: bool):
+        if self.index is None or status != 'published' or deleted:
+            return None
+        return self.index if self.index.ready else None
+
+    def search(self, cursor, text: str, limit: int = 20, offset: int = 0,
+               status: str = 'published', deleted: bool = False,
+               tag_id: Optional[int] = None, language_group: Optional[str] = None) -> List[StoryCard]:
+        """
+        Find stories matching text, best match first
+
+        Args:
+            cursor: Tuple cursor
+            text (str): Search box contents
+            limit (int): Maximum number of results
+            offset (int): Number of results to skip
+            status (str): Story status to search ('published' for readers), or None for any
+            deleted (bool): Search soft-deleted stories instead of live ones
+            tag_id (int): Only stories with this tag
+            language_group (str): Only stories in this language group
+
+        Returns:
+            list: Matching StoryCard rows
+        """
+        index = self._index_for(status, deleted)
+        if index is not None:
+            story_ids = index.search(text, limit=limit, offset=offset, tag_id=tag_id, language_group=language_group)
+            return self._cards(cursor, story_ids)
+
+        query = boolean_query(text)
+        if not query:
+            return []
+
+        conditions = ["MATCH(s.title, s.description, s.content) AGAINST(%s IN BOOLEAN MODE)",
+                      "c.deleted_at IS NOT NULL" if deleted else "c.deleted_at IS NULL"]
+        params = [query, query, query]
+        if status is not None:
+            conditions.append("c.status = %s")
+            params.append(status)
+        if tag_id is not None:
+            conditions.append("c.story_id IN (SELECT story_id FROM story_tags WHERE tag_id = %s)")
+            params.append(tag_id)
+        if language_group is not None:
+            conditions.append("c.language_group = %s")
+            params.append(language_group)
+
+        # Rank and page in the derived table so only the returned cards are read in full
+        cursor.execute(f"""
+            SELECT {STORY_CARD_COLUMNS}
+            FROM story_cards
+            JOIN (
+                SELECT s.id,
+                       MATCH(s.title) AGAINST(%s IN BOOLEAN MODE) * {TITLE_WEIGHT}
+                       + MATCH(s.title, s.description, s.content) AGAINST(%s IN BOOLEAN MODE) AS score
+                FROM stories s
+                JOIN story_cards c ON c.story_id = s.id
+                WHERE {' AND '.join(conditions)}
+                ORDER BY score DESC, s.id DESC
+                LIMIT %s OFFSET %s
+            ) matches ON matches.id = story_cards.story_id
+            ORDER BY matches.score DESC, story_cards.story_id DESC
+        """, params + [limit, offset])
+        return fetch_all(cursor, StoryCard)
+
+    @staticmethod
+    def _cards(cursor, story_ids: List[int]) -> List[StoryCard]:
+        """Cards for ranked story IDs, in rank order (stories unpublished since indexing are dropped)"""
+        if not story_ids:
+            return []
+        placeholders = ','.join(['%s'] * len(story_ids))
+        cursor.execute(f"""
+            SELECT {STORY_CARD_COLUMNS}
+            FROM story_cards
+            WHERE story_id IN ({placeholders}) AND status = 'published' AND deleted_at IS NULL
+        """, story_ids)
+        cards = {card.id: card for card in fetch_all(cursor, StoryCard)}
+        return [cards[story_id] for story_id in story_ids if story_id in cards]
+
+    def facets(self, cursor, text: str, tag_id: Optional[int] = None,
+               language_group: Optional[str] = None) -> Optional[Dict[str, Dict]]:
+        """
+        Matching published stories per tag and language group (in-memory index only)
+
+        Returns:
+            dict or None: {'tags': {tag_id: count}, 'languages': {group: count}}, or
+            None when searches are answered by the FULLTEXT backend
+        """
+        index = self._index_for('published', False)
+        if index is None:
+            return None
+        return index.facets(text, tag_id=tag_id, language_group=language_group)
+
+
+# Global instance
+story_search = StorySearch()
@@ -0,0 +1,859 @@
+#!/usr/bin/env python3
+"""
+In-Memory Search Index for AI Storytelling Platform
+An inverted index over published stories, kept in each worker process as an
+alternative to the MySQL FULLTEXT backend (Config.SEARCH_BACKEND = 'memory').
+
+Every indexed version of a story gets the next document number, so postings
+are only ever appended and can be stored as delta-encoded varints in byte
+buffers. An edited story gets a new document number and the old one is marked
+dead; compact() renumbers once dead documents pile up.
+
+The index catches up from MySQL (normally a replica) every
+SEARCH_INDEX_POLL_INTERVAL seconds using story_cards.updated_at, and is written
+to a snapshot file that new workers mmap at startup instead of re-reading every
+story. Tag and language facets come from the same postings.
+
+Loading, building and catching up all run in one background thread per worker
+(start()); searches only read the index, and fall back to FULLTEXT until the
+first load is done.
+"""
+
+import os
+import json
+import math
+import mmap
+import time
+import heapq
+import struct
+import logging
+import threading
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from background import BackgroundRefresher
+from config import Config
+from search import tokenize, query_terms, TITLE_WEIGHT
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b'SIDX'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<4sII')  # magic, version, JSON header length
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Stories read per query when building or catching up
+LOAD_BATCH_SIZE = 500
+
+# Re-read stories whose updated_at is this close to the last poll (clock skew, slow commits)
+POLL_OVERLAP = timedelta(seconds=60)
+
+# compact() when this share of document numbers belongs to dead documents
+COMPACT_DEAD_RATIO = 0.5
+
+# Postings between two entries of a posting list's skip table
+SKIP_INTERVAL = 64
+
+_EPOCH = datetime(1970, 1, 1)
+
+_DOCUMENT_SELECT = """
+    SELECT s.id, s.title, s.description, s.content, c.language_group, c.updated_at,
+           (SELECT GROUP_CONCAT(st.tag_id) FROM story_tags st WHERE st.story_id = s.id)
+    FROM stories s
+    JOIN story_cards c ON c.story_id = s.id
+    WHERE c.status = 'published' AND c.deleted_at IS NULL
+"""
+
+
+# Tokens are word characters only, so tag terms can never collide with text terms
+_TAG_PREFIX = '\x00tag:'
+
+
+def _tag_term(tag_id: int) -> str:
+    return f'{_TAG_PREFIX}{tag_id}'
+
+
+def encode_varint(value: int, out: bytearray):
+    """Append value as an unsigned LEB128 varint"""
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varint(buffer, position: int) -> Tuple[int, int]:
+    """Read one varint at position; returns (value, position after it)"""
+    byte = buffer[position]
+    position += 1
+    value, shift = byte & 0x7f, 7
+    while byte & 0x80:
+        byte = buffer[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+    return value, position
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    return (value - _EPOCH).total_seconds() if value else 0.0
+
+
+class PostingList:
+    """
+    Postings of one term: (document number, term frequency) pairs in ascending
+    document order, stored as varint(docno delta) varint(tf). base is the part
+    loaded from a snapshot (possibly an mmap view); new postings go to tail.
+    """
+
+    __slots__ = ('base', 'tail', 'count', 'last', '_skip_docnos', '_skips')
+
+    def __init__(self, base=b'', count: int = 0, last: int = -1):
+        self.base = base
+        self.tail = bytearray()
+        self.count = count
+        self.last = last
+        self._skip_docnos: Optional[List[int]] = None
+        self._skips: Optional[List[Tuple[int, int, int]]] = None
+
+    def append(self, docno: int, tf: int):
+        if self._skips is not None and self.count % SKIP_INTERVAL == 0:
+            self._skip_docnos.append(docno)
+            self._skips.append((self.last, 1, len(self.tail)))
+        encode_varint(docno - self.last, self.tail)
+        encode_varint(tf, self.tail)
+        self.count += 1
+        self.last = docno
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        docno = -1
+        for buffer in (self.base, self.tail):
+            position, end = 0, len(buffer)
+            while position < end:
+                byte = buffer[position]
+                position += 1
+                delta, shift = byte & 0x7f, 7
+                while byte & 0x80:
+                    byte = buffer[position]
+                    position += 1
+                    delta |= (byte & 0x7f) << shift
+                    shift += 7
+
+                byte = buffer[position]
+                position += 1
+                tf, shift = byte & 0x7f, 7
+                while byte & 0x80:
+                    byte = buffer[position]
+                    position += 1
+                    tf |= (byte & 0x7f) << shift
+                    shift += 7
+
+                docno += delta
+                yield docno, tf
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.base) + bytes(self.tail)
+
+    def skip_to(self, target: int) -> Optional[Tuple[int, int, int, int]]:
+        """
+        The last skip entry at or before target
+
+        The skip table (every SKIP_INTERVAL-th posting) is built on first use
+        and then extended by append().
+
+        Returns:
+            tuple or None: (docno at the entry, docno before it, buffer 0=base 1=tail,
+            byte position), or None when target comes before the first entry
+        """
+        if self._skips is None:
+            self._build_skips()
+        index = bisect_right(self._skip_docnos, target) - 1
+        if index < 0:
+            return None
+        return (self._skip_docnos[index],) + self._skips[index]
+
+    def _build_skips(self):
+        skip_docnos, skips = [], []
+        docno, count = -1, 0
+        for index, buffer in enumerate((self.base, self.tail)):
+            position, end = 0, len(buffer)
+            while position < end:
+                entry = (docno, index, position) if count % SKIP_INTERVAL == 0 else None
+                delta, position = _decode_varint(buffer, position)
+                _, position = _decode_varint(buffer, position)
+                docno += delta
+                count += 1
+                if entry is not None:
+                    skip_docnos.append(docno)
+                    skips.append(entry)
+        self._skip_docnos, self._skips = skip_docnos, skips
+
+
+class PostingCursor:
+    """Forward-only reader of a PostingList that can seek ahead to a document number"""
+
+    __slots__ = ('_postings', '_buffers', '_buffer', '_position', 'docno', 'tf')
+
+    def __init__(self, postings: PostingList):
+        self._postings = postings
+        self._buffers = (postings.base, postings.tail)
+        self._buffer = 0
+        self._position = 0
+        self.docno = -1
+        self.tf = 0
+
+    def next(self) -> Optional[int]:
+        """Move to the next posting; returns its document number, or None past the end"""
+        if self.docno is None:
+            return None
+        buffer = self._buffers[self._buffer]
+        while self._position >= len(buffer):
+            if self._buffer == 1:
+                self.docno = None
+                return None
+            self._buffer, self._position = 1, 0
+            buffer = self._buffers[1]
+        delta, position = _decode_varint(buffer, self._position)
+        self.tf, self._position = _decode_varint(buffer, position)
+        self.docno += delta
+        return self.docno
+
+    def seek(self, target: int) -> Optional[int]:
+        """Move to the first posting at or after target; returns its document number, or None"""
+        if self.docno is None or self.docno >= target:
+            return self.docno
+        entry = self._postings.skip_to(target)
+        if entry is not None and entry[0] > self.docno:
+            _, self.docno, self._buffer, self._position = entry
+        while self.docno is not None and self.docno < target:
+            self.next()
+        return self.docno
+
+
+def _intersect(cursors: List[PostingCursor]) -> Iterator[int]:
+    """
+    Document numbers present in every cursor's list, ascending
+
+    cursors[0] should be the shortest list: it leads, and each other list only
+    seeks to the lead's candidates (leapfrog), skipping whole blocks.
+    """
+    lead = cursors[0]
+    target = lead.next()
+    while target is not None:
+        for cursor in cursors[1:]:
+            docno = cursor.seek(target)
+            if docno is None:
+                return
+            if docno != target:
+                target = lead.seek(docno)
+                break
+        else:
+            yield target
+            target = lead.next()
+
+
+class SearchIndex:
+    """Per-process inverted index of published stories"""
+
+    def __init__(self, snapshot_path: Optional[str] = None, poll_interval: int = 30,
+                 reconcile_interval: int = 600, snapshot_interval: int = 900):
+        """
+        Initialize an empty index
+
+        Args:
+            snapshot_path (str): Snapshot file to load at startup and rewrite periodically
+            poll_interval (int): Seconds between catch-up queries for changed stories
+            reconcile_interval (int): Seconds between full checks of the published story IDs
+            snapshot_interval (int): Minimum age in seconds before the snapshot file is rewritten
+        """
+        self.snapshot_path = snapshot_path
+        self.poll_interval = poll_interval
+        self.reconcile_interval = reconcile_interval
+        self.snapshot_interval = snapshot_interval
+
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._connection_factory = None
+        self._refresher = BackgroundRefresher('search-index-sync', self._load_or_sync, interval=poll_interval)
+        self._snapshot_mmap = None
+        self._clear()
+
+        self._ready = False
+        self._synced_until = None
+        self._next_poll = 0.0
+        self._next_reconcile = 0.0
+        self._dirty: Set[int] = set()
+        self._stats = {'searches': 0, 'indexed': 0, 'removed': 0, 'compactions': 0,
+                       'snapshots_written': 0, 'loaded_from': None}
+
+    def _clear(self):
+        self._postings: Dict[str, PostingList] = {}
+        self._story_ids = array('I')   # docno -> story id
+        self._lengths = array('I')     # docno -> number of tokens
+        self._updated = array('d')     # docno -> story_cards.updated_at (epoch seconds)
+        self._language = array('H')    # docno -> index into self._languages
+        self._live = bytearray()       # docno -> 1 while this is the story's current version
+        self._languages: List[Optional[str]] = [None]
+        self._language_ids = {None: 0}
+        self._docno_by_story: Dict[int, int] = {}
+        self._tag_ids: Set[int] = set()
+        self._total_length = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def _add(self, story_id: int, title: str, description: str, content: str,
+             language_group: Optional[str], updated_at: Optional[datetime], tag_ids: Iterable[int]):
+        """Index one story version; caller holds self._lock"""
+        self._remove(story_id)
+
+        frequencies = Counter(tokenize(title))
+        for term in frequencies:
+            frequencies[term] *= TITLE_WEIGHT
+        frequencies.update(tokenize(description))
+        frequencies.update(tokenize(content))
+        length = sum(frequencies.values())
+        for tag_id in tag_ids:
+            frequencies[_tag_term(tag_id)] = 1
+            self._tag_ids.add(tag_id)
+
+        docno = len(self._story_ids)
+        for term, tf in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = PostingList()
+            postings.append(docno, tf)
+
+        language_id = self._language_ids.get(language_group)
+        if language_id is None:
+            language_id = self._language_ids[language_group] = len(self._languages)
+            self._languages.append(language_group)
+
+        self._story_ids.append(story_id)
+        self._lengths.append(length)
+        self._updated.append(_timestamp(updated_at))
+        self._language.append(language_id)
+        self._live.append(1)
+        self._docno_by_story[story_id] = docno
+        self._total_length += length
+        self._stats['indexed'] += 1
+
+    def _remove(self, story_id: int) -> bool:
+        """Mark a story's current version dead; caller holds self._lock"""
+        docno = self._docno_by_story.pop(story_id, None)
+        if docno is None:
+            return False
+        self._live[docno] = 0
+        self._total_length -= self._lengths[docno]
+        self._stats['removed'] += 1
+        return True
+
+    @staticmethod
+    def _fetch_documents(cursor, where: str, params) -> List[tuple]:
+        cursor.execute(f"{_DOCUMENT_SELECT} AND {where}", params)
+        return list(cursor.fetchall())
+
+    def _apply(self, rows: List[tuple], story_ids: Iterable[int] = ()):
+        """Index the fetched rows and drop the requested stories that are no longer published"""
+        with self._lock:
+            found = set()
+            for story_id, title, description, content, language_group, updated_at, tags in rows:
+                found.add(story_id)
+                tag_ids = [int(tag_id) for tag_id in tags.split(',')] if tags else []
+                self._add(story_id, title or '', description or '', content or '', language_group, updated_at, tag_ids)
+                if updated_at and (self._synced_until is None or updated_at > self._synced_until):
+                    self._synced_until = updated_at
+            for story_id in story_ids:
+                if story_id not in found:
+                    self._remove(story_id)
+            if self._dead_ratio() > COMPACT_DEAD_RATIO:
+                self._compact()
+
+    def refresh(self, cursor, story_ids: Iterable[int]):
+        """
+        Re-read the given stories from the database and update their postings
+
+        Args:
+            cursor: Tuple cursor
+            story_ids (iterable): Stories that were published, edited, unpublished or deleted
+        """
+        story_ids = sorted(set(story_ids))
+        for start in range(0, len(story_ids), LOAD_BATCH_SIZE):
+            batch = story_ids[start:start + LOAD_BATCH_SIZE]
+            placeholders = ','.join(['%s'] * len(batch))
+            self._apply(self._fetch_documents(cursor, f"s.id IN ({placeholders})", batch), batch)
+
+    def mark_dirty(self, story_ids: Optional[List[int]]):
+        """
+        story_cards change listener: re-read these stories in the background
+
+        The stories are only queued here and read back by the background
+        thread's next sync(), which is woken now.
+        """
+        if story_ids is None:
+            self._next_reconcile = 0.0
+        else:
+            self._dirty.update(story_ids)
+        self._next_poll = 0.0
+        if self._connection_factory is not None:
+            self._refresher.trigger()
+
+    def build(self, cursor):
+        """
+        Index every published story from scratch
+
+        Args:
+            cursor: Tuple cursor (stories are read in LOAD_BATCH_SIZE keyset batches)
+        """
+        with self._build_lock:
+            self._build(cursor)
+
+    def _build(self, cursor):
+        """build(); caller holds self._build_lock"""
+        started = time.monotonic()
+        with self._lock:
+            self._clear()
+            self._synced_until = None
+        last_id = 0
+        while True:
+            rows = self._fetch_documents(cursor, "s.id > %s ORDER BY s.id LIMIT %s", (last_id, LOAD_BATCH_SIZE))
+            if not rows:
+                break
+            self._apply(rows)
+            last_id = rows[-1][0]
+        self._ready = True
+        self._next_poll = time.monotonic() + self.poll_interval
+        self._next_reconcile = time.monotonic() + self.reconcile_interval
+        self._stats['loaded_from'] = 'database'
+        logger.info(f"Built search index: {len(self._docno_by_story)} stories in {time.monotonic() - started:.1f}s")
+
+    def sync(self, cursor):
+        """
+        Catch up with changes made by this and other workers
+
+        Re-reads queued stories and stories whose card changed since the last poll;
+        every reconcile_interval also drops stories that were deleted outright and
+        adds any that were missed. Does nothing when the last poll is recent.
+
+        Args:
+            cursor: Tuple cursor
+        """
+        now = time.monotonic()
+        if now < self._next_poll or not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_poll = now + self.poll_interval
+
+            dirty, self._dirty = self._dirty, set()
+            synced_until = self._synced_until
+            if synced_until is not None:
+                cursor.execute("""
+                    SELECT story_id, updated_at, status = 'published' AND deleted_at IS NULL
+                    FROM story_cards WHERE updated_at >= %s
+                """, (synced_until - POLL_OVERLAP,))
+                for story_id, updated_at, published in cursor.fetchall():
+                    docno = self._docno_by_story.get(story_id)
+                    if docno is None:
+                        changed = bool(published)
+                    else:
+                        changed = not published or self._updated[docno] != _timestamp(updated_at)
+                    if changed:
+                        dirty.add(story_id)
+                    # Unpublished cards count too, or every poll would re-read them
+                    if updated_at and updated_at > synced_until:
+                        synced_until = updated_at
+            if dirty:
+                self.refresh(cursor, dirty)
+            with self._lock:
+                if synced_until is not None and (self._synced_until is None or synced_until > self._synced_until):
+                    self._synced_until = synced_until
+
+            if now >= self._next_reconcile:
+                self._next_reconcile = now + self.reconcile_interval
+                self._reconcile(cursor)
+
+            self._maybe_write_snapshot()
+        finally:
+            self._sync_lock.release()
+
+    def _reconcile(self, cursor):
+        cursor.execute("SELECT story_id FROM story_cards WHERE status = 'published' AND deleted_at IS NULL")
+        published = {row[0] for row in cursor.fetchall()}
+        indexed = set(self._docno_by_story)
+        if indexed - published:
+            with self._lock:
+                for story_id in indexed - published:
+                    self._remove(story_id)
+        if published - indexed:
+            self.refresh(cursor, published - indexed)
+
+    def _dead_ratio(self) -> float:
+        total = len(self._story_ids)
+        return (total - len(self._docno_by_story)) / total if total >= 1000 else 0.0
+
+    def _compact(self):
+        """Renumber live documents and rewrite every posting list without the dead ones; caller holds self._lock"""
+        renumber = {}
+        for docno, live in enumerate(self._live):
+            if live:
+                renumber[docno] = len(renumber)
+
+        postings = {}
+        for term, old in self._postings.items():
+            new = PostingList()
+            for docno, tf in old:
+                if docno in renumber:
+                    new.append(renumber[docno], tf)
+            if new.count:
+                postings[term] = new
+
+        keep = sorted(renumber)
+        self._postings = postings
+        self._story_ids = array('I', (self._story_ids[docno] for docno in keep))
+        self._lengths = array('I', (self._lengths[docno] for docno in keep))
+        self._updated = array('d', (self._updated[docno] for docno in keep))
+        self._language = array('H', (self._language[docno] for docno in keep))
+        self._live = bytearray(b'\x01' * len(keep))
+        self._docno_by_story = {story_id: docno for docno, story_id in enumerate(self._story_ids)}
+        self._snapshot_mmap = None
+        self._stats['compactions'] += 1
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _with_term(self, docnos: List[int], term: str) -> List[int]:
+        """The docnos (ascending) whose document contains term; caller holds self._lock"""
+        postings = self._postings.get(term)
+        if postings is None:
+            return []
+        cursor = PostingCursor(postings)
+        found = []
+        for docno in docnos:
+            at = cursor.seek(docno)
+            if at is None:
+                break
+            if at == docno:
+                found.append(docno)
+        return found
+
+    def _match(self, text: str) -> Dict[int, float]:
+        """
+        BM25 scores of the live documents matching text; caller holds self._lock
+
+        Required terms are intersected on the encoded posting lists, shortest
+        first, so a common term costs only the blocks around the candidates.
+        Optional terms then only seek to the candidates; with no required term
+        every optional posting is scored.
+        """
+        required, optional = query_terms(text)
+        if not required and not optional:
+            return {}
+
+        document_count = len(self._docno_by_story) or 1
+        average_length = self._total_length / document_count or 1.0
+        live = self._live
+        lengths = self._lengths
+
+        def idf(postings: PostingList) -> float:
+            return math.log(1 + (document_count - postings.count + 0.5) / (postings.count + 0.5))
+
+        def bm25(weight: float, tf: int, docno: int) -> float:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docno] / average_length)
+            return weight * tf * (BM25_K1 + 1) / (tf + norm)
+
+        scores = {}
+        optional_postings = [postings for postings in map(self._postings.get, optional) if postings is not None]
+        if required:
+            required_postings = [self._postings.get(term) for term in required]
+            if None in required_postings:
+                return {}
+            required_postings.sort(key=lambda postings: postings.count)
+            cursors = [PostingCursor(postings) for postings in required_postings]
+            weights = [idf(postings) for postings in required_postings]
+            for docno in _intersect(cursors):
+                if live[docno]:
+                    scores[docno] = sum(bm25(weight, cursor.tf, docno) for weight, cursor in zip(weights, cursors))
+            candidates = sorted(scores)
+            for postings in optional_postings:
+                cursor = PostingCursor(postings)
+                weight = idf(postings)
+                for docno in candidates:
+                    at = cursor.seek(docno)
+                    if at is None:
+                        break
+                    if at == docno:
+                        scores[docno] += bm25(weight, cursor.tf, docno)
+        else:
+            for postings in optional_postings:
+                weight = idf(postings)
+                for docno, tf in postings:
+                    if live[docno]:
+                        scores[docno] = scores.get(docno, 0.0) + bm25(weight, tf, docno)
+        return scores
+
+    def _filter(self, docnos: Iterable[int], tag_id: Optional[int], language_group: Optional[str]) -> List[int]:
+        """The docnos (returned ascending) with the tag and in the language group"""
+        docnos = sorted(docnos)
+        if tag_id is not None:
+            docnos = self._with_term(docnos, _tag_term(tag_id))
+        if language_group is not None:
+            language_id = self._language_ids.get(language_group)
+            docnos = [docno for docno in docnos if self._language[docno] == language_id]
+        return docnos
+
+    def search(self, text: str, limit: int = 20, offset: int = 0,
+               tag_id: Optional[int] = None, language_group: Optional[str] = None) -> List[int]:
+        """
+        Rank published stories against text (BM25, title terms weighted TITLE_WEIGHT times)
+
+        Args:
+            text (str): Search box contents
+            limit (int): Maximum number of results
+            offset (int): Number of results to skip
+            tag_id (int): Only stories with this tag
+            language_group (str): Only stories in this language group
+
+        Returns:
+            list: Story IDs, best match first
+        """
+        with self._lock:
+            self._stats['searches'] += 1
+            scores = self._match(text)
+            docnos = self._filter(scores, tag_id, language_group)
+            best = heapq.nlargest(offset + limit, docnos,
+                                  key=lambda docno: (scores[docno], self._story_ids[docno]))
+            return [self._story_ids[docno] for docno in best[offset:]]
+
+    def facets(self, text: str, tag_id: Optional[int] = None,
+               language_group: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Count matching stories per tag and per language group
+
+        Each facet ignores its own filter, so the counts show what selecting
+        another tag or language would return.
+
+        Returns:
+            dict: {'tags': {tag_id: count}, 'languages': {language_group: count}}
+        """
+        with self._lock:
+            matches = list(self._match(text))
+
+            tags = {}
+            in_language = self._filter(matches, None, language_group)
+            for facet_tag_id in self._tag_ids:
+                count = len(self._with_term(in_language, _tag_term(facet_tag_id)))
+                if count:
+                    tags[facet_tag_id] = count
+
+            languages = Counter(self._languages[self._language[docno]]
+                                for docno in self._filter(matches, tag_id, None))
+            return {'tags': tags, 'languages': dict(languages)}
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def _serialize(self) -> bytes:
+        """Snapshot file contents; caller holds self._lock"""
+        sections = []
+        offset = 0
+
+        def add(data: bytes) -> List[int]:
+            nonlocal offset
+            sections.append(data)
+            offset += len(data)
+            return [offset - len(data), len(data)]
+
+        header = {
+            'synced_until': self._synced_until.isoformat() if self._synced_until else None,
+            'languages': self._languages,
+            'arrays': {
+                'story_ids': add(self._story_ids.tobytes()),
+                'lengths': add(self._lengths.tobytes()),
+                'updated': add(self._updated.tobytes()),
+                'language': add(self._language.tobytes()),
+                'live': add(bytes(self._live)),
+            },
+            'terms': [[term, *add(postings.to_bytes()), postings.count, postings.last]
+                      for term, postings in self._postings.items()],
+        }
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        return b''.join([SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header_bytes)), header_bytes] + sections)
+
+    def write_snapshot(self, path: Optional[str] = None) -> str:
+        """
+        Write the index to a snapshot file (atomically replaces the old one)
+
+        Returns:
+            str: Path written
+        """
+        path = path or self.snapshot_path
+        with self._lock:
+            data = self._serialize()
+        self._write_file(path, data)
+        return path
+
+    def _write_file(self, path: str, data: bytes):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, path)
+            self._stats['snapshots_written'] += 1
+            logger.info(f"Wrote search index snapshot {path} ({len(data)} bytes)")
+        except OSError as e:
+            logger.error(f"Failed to write search index snapshot {path}: {e}")
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def _maybe_write_snapshot(self):
+        """Rewrite the snapshot once it is older than snapshot_interval (from the background thread)"""
+        if not self.snapshot_path:
+            return
+        try:
+            age = time.time() - os.path.getmtime(self.snapshot_path)
+        except OSError:
+            age = None
+        if age is not None and age < self.snapshot_interval:
+            return
+        # Touch first so the other workers do not all write the same snapshot
+        if age is not None:
+            os.utime(self.snapshot_path)
+        with self._lock:
+            data = self._serialize()
+        self._write_file(self.snapshot_path, data)
+
+    def load_snapshot(self, path: Optional[str] = None) -> bool:
+        """
+        Map a snapshot file into memory and use it as the index
+
+        Posting lists keep pointing into the mapped file until compact() rewrites
+        them, so loading costs little more than reading the per-story arrays.
+
+        Returns:
+            bool: False when there is no usable snapshot file
+        """
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, header_length = SNAPSHOT_HEADER.unpack_from(mapped, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                logger.warning(f"Ignoring search index snapshot {path}: unknown format")
+                return False
+            data_start = SNAPSHOT_HEADER.size + header_length
+            header = json.loads(mapped[SNAPSHOT_HEADER.size:data_start].decode('utf-8'))
+            view = memoryview(mapped)
+
+            def read_array(typecode: str, name: str) -> array:
+                start, length = header['arrays'][name]
+                values = array(typecode)
+                values.frombytes(view[data_start + start:data_start + start + length])
+                return values
+
+            with self._lock:
+                self._clear()
+                self._story_ids = read_array('I', 'story_ids')
+                self._lengths = read_array('I', 'lengths')
+                self._updated = read_array('d', 'updated')
+                self._language = read_array('H', 'language')
+                self._live = bytearray(read_array('B', 'live'))
+                self._languages = header['languages']
+                self._language_ids = {language: index for index, language in enumerate(self._languages)}
+                for term, start, length, count, last in header['terms']:
+                    self._postings[term] = PostingList(view[data_start + start:data_start + start + length], count, last)
+                    if term.startswith(_TAG_PREFIX):
+                        self._tag_ids.add(int(term[len(_TAG_PREFIX):]))
+                for docno, story_id in enumerate(self._story_ids):
+                    if self._live[docno]:
+                        self._docno_by_story[story_id] = docno
+                        self._total_length += self._lengths[docno]
+                self._synced_until = datetime.fromisoformat(header['synced_until']) if header['synced_until'] else None
+                self._snapshot_mmap = mapped
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logger.warning(f"Ignoring search index snapshot {path}: {e}")
+            return False
+
+        self._ready = True
+        self._next_poll = 0.0
+        self._next_reconcile = 0.0
+        self._stats['loaded_from'] = path
+        logger.info(f"Loaded search index snapshot {path}: {len(self._docno_by_story)} stories")
+        return True
+
+    def start(self, connection_factory):
+        """
+        Load the snapshot (or build the index) and keep it synced, in a background thread
+
+        Until the first load is done, ready is False and searches use FULLTEXT; a
+        failed load is retried every poll_interval.
+
+        Args:
+            connection_factory (callable): Returns a pooled connection (closed after use),
+                normally on a read replica
+        """
+        self._connection_factory = connection_factory
+        self._refresher.trigger()
+
+    def _with_cursor(self, work):
+        connection = self._connection_factory()
+        try:
+            work(connection.cursor())
+        finally:
+            connection.close()
+
+    def _load(self, cursor):
+        with self._build_lock:
+            if self._ready:
+                return
+            self._build(cursor)
+        self._maybe_write_snapshot()
+
+    def _load_or_sync(self):
+        if not self._ready:
+            with self._build_lock:
+                loaded = self._ready or self.load_snapshot()
+            if not loaded:
+                self._with_cursor(self._load)
+        self._with_cursor(self.sync)
+
+    def get_stats(self) -> Dict:
+        """Get index size and activity counters"""
+        stats = dict(self._stats)
+        stats.update({
+            'ready': self._ready,
+            'stories': len(self._docno_by_story),
+            'documents': len(self._story_ids),
+            'terms': len(self._postings),
+            'posting_bytes': sum(len(postings.base) + len(postings.tail) for postings in self._postings.values()),
+            'synced_until': self._synced_until.isoformat() if self._synced_until else None,
+            'pending_refresh': len(self._dirty),
+            'errors': self._refresher.errors,
+        })
+        return stats
+
+
+# Global instance
+search_index = SearchIndex(
+    snapshot_path=Config.SEARCH_SNAPSHOT_PATH,
+    poll_interval=Config.SEARCH_INDEX_POLL_INTERVAL,
+    reconcile_interval=Config.SEARCH_INDEX_RECONCILE_INTERVAL,
+    snapshot_interval=Config.SEARCH_SNAPSHOT_INTERVAL,
+)
@@ -5,6 +5,7 @@ Production startup script for AI Storytelling Platform
 
 import os
 from app import app, Config, logger
+from migrate import migration_runner
 
 if __name__ == '__main__':
     # Set production environment
@@ -13,6 +14,9 @@ if __name__ == '__main__':
     # Create necessary directories
     os.makedirs('/image', exist_ok=True)
     
+    # Bring the database schema up to date before serving requests
+    migration_runner.upgrade()
+    
     # Get port from environment or default
     port = int(os.environ.get('PORT', 5000))
     
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Story Card Read Model for AI Storytelling Platform
+Maintains story_cards, a denormalized copy of each story's list-page fields
+(author, tag names, excerpt, counters) so list pages read one
+indexed table instead of joining users, story_tags and tags per request
+"""
+
+import logging
+import threading
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CARD_COLUMNS = (
+    'story_id', 'user_id', 'author', 'author_email', 'title', 'description', 'excerpt', 'tags',
+    'image_path', 'language', 'language_name', 'language_group', 'status',
+    'word_count', 'reading_time', 'view_count', 'like_count',
+    'created_at', 'updated_at', 'published_at', 'deleted_at',
+)
+
+# One SELECT row per story, in CARD_COLUMNS order. Tag names are aggregated in a
+# correlated subquery so the outer query needs no GROUP BY; views come from story_stats.
+CARD_SELECT = """
+    SELECT s.id, s.user_id, u.username, u.email, s.title, s.description,
+           COALESCE(s.description, LEFT(s.content, 200)),
+           (SELECT GROUP_CONCAT(t.name ORDER BY t.id)
+            FROM story_tags st JOIN tags t ON st.tag_id = t.id
+            WHERE st.story_id = s.id),
+           s.image_path, s.language, s.language_name,
+           CASE WHEN s.language LIKE 'cmn-%%' THEN 'zh' ELSE SUBSTRING_INDEX(s.language, '-', 1) END,
+           s.status, s.word_count, s.reading_time,
+           COALESCE((SELECT ss.view_count FROM story_stats ss WHERE ss.story_id = s.id), 0),
+           s.like_count, s.created_at, s.updated_at, s.published_at, s.deleted_at
+    FROM stories s
+    LEFT JOIN users u ON s.user_id = u.id
+"""
+
+# content_versions row bumped with every card change; page_cache.py keys rendered pages on it
+CONTENT_VERSION_NAME = 'stories'
+
+CARD_UPSERT = (
+    f"INSERT INTO story_cards ({', '.join(CARD_COLUMNS)})"
+    + CARD_SELECT
+    + "{where}\nON DUPLICATE KEY UPDATE "
+    + ', '.join(f"{column} = VALUES({column})" for column in CARD_COLUMNS[1:])
+)
+
+
+class StoryCardStore:
+    """
+    Writes to the story_cards projection
+
+    Callers pass their own cursor and wrap the story change and the card write in
+    one transaction (connection.begin() ... commit(); pooled connections
+    autocommit otherwise), so readers never see a story without its card or a
+    card without its content version bump.
+    """
+
+    def __init__(self):
+        self._listeners = []
+        self._pending = threading.local()
+
+    def add_listener(self, callback: Callable[[Optional[List[int]]], None]):
+        """
+        Register a callback for card changes (refresh, delete); used by caches of list data
+
+        Callbacks run from flush(), after the writing transaction has closed, so
+        a listener that reads the cards back sees the change.
+
+        Args:
+            callback (callable): Called with the changed story IDs, or None when unknown
+        """
+        self._listeners.append(callback)
+
+    @staticmethod
+    def _bump_version(cursor):
+        """Move the content version on, in the caller's transaction"""
+        cursor.execute("UPDATE content_versions SET version = version + 1 WHERE name = %s",
+                       (CONTENT_VERSION_NAME,))
+
+    def _notify(self, story_ids: Optional[List[int]]):
+        """Queue a change for this thread's next flush()"""
+        changes = getattr(self._pending, 'changes', None)
+        if changes is None:
+            changes = self._pending.changes = []
+        changes.append(story_ids)
+
+    def flush(self):
+        """
+        Tell the listeners about the card changes this thread made
+
+        Call once the transaction that wrote them has committed or rolled back
+        (request teardown does); a rolled-back change only costs the listeners
+        a reload. Changes are merged into one call per listener.
+        """
+        changes = getattr(self._pending, 'changes', None)
+        if not changes:
+            return
+        self._pending.changes = []
+        if any(story_ids is None for story_ids in changes):
+            story_ids = None
+        else:
+            story_ids = self._ids(story_id for ids in changes for story_id in ids)
+        for callback in self._listeners:
+            try:
+                callback(story_ids)
+            except Exception as e:
+                logger.error(f"story_cards listener {callback!r} failed: {e}")
+
+    def refresh(self, cursor, story_ids: Iterable[int]) -> int:
+        """
+        Rebuild the cards for the given stories from the source tables
+
+        Args:
+            cursor: Cursor on the primary database
+            story_ids (iterable): Story IDs whose row, tags or author changed
+
+        Returns:
+            int: Number of stories refreshed
+        """
+        story_ids = self._ids(story_ids)
+        if not story_ids:
+            return 0
+        placeholders = ','.join(['%s'] * len(story_ids))
+        cursor.execute(CARD_UPSERT.format(where=f"WHERE s.id IN ({placeholders})"), story_ids)
+        self._bump_version(cursor)
+        self._notify(story_ids)
+        return len(story_ids)
+
+    def sync_counters(self, cursor, story_ids: Iterable[int]):
+        """
+        Copy view_count (story_stats) and like_count (stories) (cheaper than a full refresh)
+
+        Args:
+            cursor: Cursor on the primary database
+            story_ids (iterable): Story IDs whose counters changed
+        """
+        story_ids = self._ids(story_ids)
+        if not story_ids:
+            return
+        placeholders = ','.join(['%s'] * len(story_ids))
+        cursor.execute(f"""
+            UPDATE story_cards c
+            JOIN stories s ON s.id = c.story_id
+            LEFT JOIN story_stats ss ON ss.story_id = c.story_id
+            SET c.view_count = COALESCE(ss.view_count, 0), c.like_count = s.like_count
+            WHERE c.story_id IN ({placeholders})
+        """, story_ids)
+
+    def delete(self, cursor, story_ids: Iterable[int]):
+        """Remove the cards of permanently deleted stories"""
+        story_ids = self._ids(story_ids)
+        if not story_ids:
+            return
+        placeholders = ','.join(['%s'] * len(story_ids))
+        cursor.execute(f"DELETE FROM story_cards WHERE story_id IN ({placeholders})", story_ids)
+        self._bump_version(cursor)
+        self._notify(story_ids)
+
+    def delete_for_user(self, cursor, user_id: int):
+        """Remove every card of a deleted user"""
+        cursor.execute("DELETE FROM story_cards WHERE user_id = %s", (user_id,))
+        self._bump_version(cursor)
+        self._notify(None)
+
+    def rebuild(self, cursor) -> int:
+        """
+        Rebuild every card from scratch (repairs drift after manual SQL changes)
+
+        Returns:
+            int: Number of cards after the rebuild
+        """
+        cursor.execute("DELETE FROM story_cards WHERE story_id NOT IN (SELECT id FROM stories)")
+        cursor.execute(CARD_UPSERT.format(where=''), ())
+        cursor.execute("SELECT COUNT(*) AS count FROM story_cards")
+        row = cursor.fetchone()
+        count = row['count'] if isinstance(row, dict) else row[0]
+        logger.info(f"Rebuilt {count} story cards")
+        self._bump_version(cursor)
+        self._notify(None)
+        return count
+
+    @staticmethod
+    def _ids(story_ids: Iterable[int]) -> List[int]:
+        return sorted({int(story_id) for story_id in story_ids})
+
+
+# Global instance
+story_cards = StoryCardStore()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Published Story Counts Cache for AI Storytelling Platform
+Keeps the number of published stories per story type and language group in
+process memory, so story_library can show totals without a COUNT(*) per request.
+Recounts run in a background thread, one at a time, when the snapshot is older
+than PUBLISHED_COUNTS_TTL or a story changed; requests keep getting the previous
+snapshot meanwhile.
+"""
+
+import time
+import logging
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from background import BackgroundRefresher
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Longest a request waits for the worker's first count before rendering without totals
+COLD_WAIT_TIMEOUT = 2.0
+
+
+class PublishedCountsSnapshot:
+    """Published story counts at one point in time"""
+
+    def __init__(self, by_language: Dict[str, int], by_tag_language: Dict[tuple, int]):
+        self.by_language = by_language
+        self.by_tag_language = by_tag_language
+        self.total = sum(by_language.values())
+        self.by_tag = Counter()
+        for (tag_id, _), count in by_tag_language.items():
+            self.by_tag[tag_id] += count
+        self.loaded_at = time.monotonic()
+
+    def count(self, tag_id: Optional[int] = None, language_group: Optional[str] = None) -> int:
+        """
+        Number of published stories matching the filters
+
+        Args:
+            tag_id (int): Only stories with this tag
+            language_group (str): Only stories in this language group (e.g. 'en')
+
+        Returns:
+            int: Matching story count
+        """
+        if tag_id is not None and language_group is not None:
+            return self.by_tag_language.get((tag_id, language_group), 0)
+        if tag_id is not None:
+            return self.by_tag.get(tag_id, 0)
+        if language_group is not None:
+            return self.by_language.get(language_group, 0)
+        return self.total
+
+
+class PublishedCounts:
+    """Per-process cache of published story counts"""
+
+    def __init__(self, ttl: int = 60):
+        """
+        Initialize the counts cache
+
+        Args:
+            ttl (int): Seconds a snapshot is served before a background recount starts
+        """
+        self.ttl = ttl
+        self._snapshot: Optional[PublishedCountsSnapshot] = None
+        self._stale = False
+        self._connection_factory: Optional[Callable] = None
+        self._refresher = BackgroundRefresher('published-counts-reload', self._reload)
+
+    @staticmethod
+    def _load(cursor) -> PublishedCountsSnapshot:
+        cursor.execute("""
+            SELECT language_group, COUNT(*)
+            FROM story_cards
+            WHERE status = 'published' AND deleted_at IS NULL
+            GROUP BY language_group
+        """)
+        by_language = {row[0]: row[1] for row in cursor.fetchall()}
+
+        cursor.execute("""
+            SELECT st.tag_id, c.language_group, COUNT(*)
+            FROM story_cards c
+            JOIN story_tags st ON st.story_id = c.story_id
+            WHERE c.status = 'published' AND c.deleted_at IS NULL
+            GROUP BY st.tag_id, c.language_group
+        """)
+        by_tag_language = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+        return PublishedCountsSnapshot(by_language, by_tag_language)
+
+    def start(self, connection_factory: Callable):
+        """
+        Count in the background now, so the worker's first request finds totals
+
+        Args:
+            connection_factory (callable): Returns a pooled connection (closed after use)
+        """
+        self._connection_factory = connection_factory
+        self._refresher.trigger()
+
+    def _reload(self):
+        connection = self._connection_factory()
+        try:
+            snapshot = self._load(connection.cursor())
+        finally:
+            connection.close()
+        self._snapshot = snapshot
+        self._stale = False
+        logger.info(f"Recomputed published story counts ({snapshot.total} published)")
+
+    def get(self) -> Optional[PublishedCountsSnapshot]:
+        """
+        Get the counts without querying on the request path
+
+        An expired or invalidated snapshot is still returned while a background
+        recount replaces it. Only before the worker's first count completes does
+        a request wait (up to COLD_WAIT_TIMEOUT).
+
+        Returns:
+            PublishedCountsSnapshot or None: Current counts, or None when none
+            have been loaded yet
+        """
+        snapshot = self._snapshot
+        if self._connection_factory is None:
+            return snapshot
+        if snapshot is None:
+            self._refresher.trigger(after_running=False)
+            self._refresher.wait(COLD_WAIT_TIMEOUT)
+            return self._snapshot
+
+        if self._stale or time.monotonic() - snapshot.loaded_at >= self.ttl:
+            self._refresher.trigger(after_running=False)
+        return snapshot
+
+    def invalidate(self, story_ids=None):
+        """story_cards change listener: recount in the background (story_ids are ignored)"""
+        self._stale = True
+        if self._connection_factory is not None:
+            self._refresher.trigger()
+
+
+# Global instance
+published_counts = PublishedCounts(ttl=Config.PUBLISHED_COUNTS_TTL)
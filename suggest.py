@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Typeahead Suggestions for AI Storytelling Platform
+Keeps published story titles, their authors and the story types in a sorted
+in-process list, so /api/suggest answers each keystroke with a bisect instead
+of a query. Titles are indexed from the start of every word, so "dog" finds
+"The Lost Dog".
+
+The list is built when the worker starts and rebuilt every
+SUGGEST_REBUILD_INTERVAL seconds. In between, stories changed in this worker
+(story_cards listener) and cards whose updated_at moved are patched in place
+every SUGGEST_REFRESH_INTERVAL seconds. All of that runs in a background thread
+per worker (start()); lookups never query MySQL.
+"""
+
+import time
+import bisect
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from background import BackgroundRefresher
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+KIND_TITLE = 'title'
+KIND_AUTHOR = 'author'
+KIND_TAG = 'tag'
+
+# Matching entries examined per lookup; the best-weighted of these are returned
+MAX_SCAN = 500
+
+MAX_PREFIX_LENGTH = 50
+
+# The catch-up re-reads cards changed this long before the last one it saw:
+# updated_at has one-second precision and a slow transaction can commit an
+# older timestamp after a later one was read
+POLL_OVERLAP = timedelta(seconds=60)
+
+# Entry: (key, kind, label, ref, weight); sorted by key first
+Entry = Tuple[str, str, str, int, int]
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace; keys and typed prefixes both go through this"""
+    return ' '.join((text or '').casefold().split())
+
+
+def _title_keys(title: str) -> List[str]:
+    words = normalize(title).split(' ')
+    return list(dict.fromkeys(' '.join(words[i:]) for i in range(len(words)) if words[i]))
+
+
+class SuggestIndex:
+    """Per-process prefix index of titles, authors and story types"""
+
+    def __init__(self, refresh_interval: int = 30, rebuild_interval: int = 600):
+        """
+        Initialize an empty suggestion index
+
+        Args:
+            refresh_interval (int): Seconds between incremental catch-ups
+            rebuild_interval (int): Seconds between full rebuilds
+        """
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._entries: List[Entry] = []
+        self._story_entries: Dict[int, List[Entry]] = {}
+        self._story_updated: Dict[int, Optional[datetime]] = {}
+        self._author_stories: Counter = Counter()
+        self._tags_etag = None
+        self._dirty: Set[int] = set()
+        self._synced_until = None
+        self._built_at = None
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._connection_factory: Optional[Callable] = None
+        self._catalog_factory: Optional[Callable] = None
+        self._refresher = BackgroundRefresher('suggest-refresh', self._refresh_from_pool, interval=refresh_interval)
+        self._stats = {'lookups': 0, 'builds': 0, 'refreshes': 0}
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _insert(self, entry: Entry):
+        bisect.insort(self._entries, entry)
+
+    def _delete(self, entry: Entry):
+        position = bisect.bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def _author_entry(self, author: str) -> Entry:
+        return (normalize(author), KIND_AUTHOR, author, 0, 0)
+
+    def _remove_story(self, story_id: int):
+        """Drop a story's title and author entries; caller holds self._lock"""
+        self._story_updated.pop(story_id, None)
+        entries = self._story_entries.pop(story_id, None)
+        if not entries:
+            return
+        for entry in entries:
+            if entry[1] == KIND_AUTHOR:
+                self._author_stories[entry[2]] -= 1
+                if self._author_stories[entry[2]] <= 0:
+                    del self._author_stories[entry[2]]
+                    self._delete(self._author_entry(entry[2]))
+            else:
+                self._delete(entry)
+
+    def _add_story(self, story_id: int, title: str, author: Optional[str], view_count: int,
+                   updated_at: Optional[datetime] = None):
+        """Index one published story; caller holds self._lock"""
+        self._remove_story(story_id)
+        self._story_updated[story_id] = updated_at
+        entries = [(key, KIND_TITLE, title, story_id, view_count) for key in _title_keys(title)]
+        for entry in entries:
+            self._insert(entry)
+        if author:
+            if not self._author_stories[author]:
+                self._insert(self._author_entry(author))
+            self._author_stories[author] += 1
+            entries.append((normalize(author), KIND_AUTHOR, author, story_id, 0))
+        self._story_entries[story_id] = entries
+
+    def _set_tags(self, story_types: List[Dict]):
+        """Replace the story type entries; caller holds self._lock"""
+        self._entries = [entry for entry in self._entries if entry[1] != KIND_TAG]
+        for story_type in story_types:
+            self._insert((normalize(story_type['name']), KIND_TAG, story_type['name'],
+                          story_type['id'], story_type.get('usage_count') or 0))
+
+    @staticmethod
+    def _fetch_stories(cursor, where: str = '', params=()) -> List[tuple]:
+        cursor.execute(f"""
+            SELECT story_id, title, author, view_count, updated_at
+            FROM story_cards
+            WHERE status = 'published' AND deleted_at IS NULL {where}
+        """, params)
+        return list(cursor.fetchall())
+
+    def build(self, cursor, story_types: List[Dict], tags_etag: Optional[str] = None):
+        """
+        Rebuild every entry
+
+        Args:
+            cursor: Tuple cursor
+            story_types (list): Story type dicts (id, name, usage_count) from the tag catalog
+            tags_etag (str): Version of story_types, to notice catalog changes later
+        """
+        rows = self._fetch_stories(cursor)
+        entries, story_entries, story_updated, authors = [], {}, {}, Counter()
+        synced_until = None
+        for story_id, title, author, view_count, updated_at in rows:
+            story_updated[story_id] = updated_at
+            story_entries[story_id] = [(key, KIND_TITLE, title, story_id, view_count) for key in _title_keys(title)]
+            entries.extend(story_entries[story_id])
+            if author:
+                authors[author] += 1
+                story_entries[story_id].append((normalize(author), KIND_AUTHOR, author, story_id, 0))
+            if updated_at and (synced_until is None or updated_at > synced_until):
+                synced_until = updated_at
+        entries.extend(self._author_entry(author) for author in authors)
+        entries.extend((normalize(story_type['name']), KIND_TAG, story_type['name'],
+                        story_type['id'], story_type.get('usage_count') or 0) for story_type in story_types)
+        entries.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._story_entries = story_entries
+            self._story_updated = story_updated
+            self._author_stories = authors
+            self._tags_etag = tags_etag
+            self._synced_until = synced_until
+            self._built_at = time.monotonic()
+            self._refreshed_at = self._built_at
+        self._stats['builds'] += 1
+        logger.info(f"Built suggestion index: {len(entries)} entries from {len(rows)} stories")
+
+    def mark_dirty(self, story_ids: Optional[List[int]]):
+        """story_cards change listener: patch these stories in from the background thread"""
+        if story_ids is None:
+            self._built_at = None
+        else:
+            self._dirty.update(story_ids)
+        self._refreshed_at = 0.0
+        if self._connection_factory is not None:
+            self._refresher.trigger()
+
+    def start(self, connection_factory: Callable, catalog_factory: Callable):
+        """
+        Build the index and keep it current in a background thread
+
+        Args:
+            connection_factory (callable): Returns a pooled connection (closed after use)
+            catalog_factory (callable): Called with that connection; returns the current TagCatalogSnapshot
+        """
+        self._connection_factory = connection_factory
+        self._catalog_factory = catalog_factory
+        self._refresher.trigger()
+
+    def _refresh_from_pool(self):
+        connection = self._connection_factory()
+        try:
+            self.refresh(connection.cursor, lambda: self._catalog_factory(connection))
+        finally:
+            connection.close()
+
+    def refresh(self, cursor_factory: Callable, catalog_factory: Callable):
+        """
+        Rebuild or catch up if due; concurrent callers skip it rather than wait
+
+        Runs in the background thread started by start(), every refresh_interval
+        seconds and after mark_dirty().
+
+        Args:
+            cursor_factory (callable): Returns a tuple cursor; only called when a refresh is due
+            catalog_factory (callable): Returns the current TagCatalogSnapshot
+        """
+        now = time.monotonic()
+        if now - self._refreshed_at < self.refresh_interval and self._built_at is not None:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            catalog = catalog_factory()
+            if self._built_at is None or now - self._built_at >= self.rebuild_interval:
+                self.build(cursor_factory(), catalog.types, catalog.etag)
+                return
+
+            cursor = cursor_factory()
+            dirty, self._dirty = self._dirty, set()
+            synced_until = self._synced_until
+            if synced_until is not None:
+                cursor.execute("""
+                    SELECT story_id, updated_at, status = 'published' AND deleted_at IS NULL
+                    FROM story_cards WHERE updated_at >= %s
+                """, (synced_until - POLL_OVERLAP,))
+                for story_id, updated_at, published in cursor.fetchall():
+                    if published:
+                        changed = story_id not in self._story_updated or self._story_updated[story_id] != updated_at
+                    else:
+                        changed = story_id in self._story_entries
+                    if changed:
+                        dirty.add(story_id)
+                    # Unpublished cards move the watermark too, or every catch-up would re-read them
+                    if updated_at and updated_at > synced_until:
+                        synced_until = updated_at
+
+            rows = []
+            if dirty:
+                ids = sorted(dirty)
+                placeholders = ','.join(['%s'] * len(ids))
+                rows = self._fetch_stories(cursor, f"AND story_id IN ({placeholders})", ids)
+
+            with self._lock:
+                found = set()
+                for story_id, title, author, view_count, updated_at in rows:
+                    found.add(story_id)
+                    self._add_story(story_id, title, author, view_count, updated_at)
+                    if updated_at and (synced_until is None or updated_at > synced_until):
+                        synced_until = updated_at
+                self._synced_until = synced_until
+                for story_id in dirty - found:
+                    self._remove_story(story_id)
+                if catalog.etag != self._tags_etag:
+                    self._set_tags(catalog.types)
+                    self._tags_etag = catalog.etag
+                self._refreshed_at = now
+            self._stats['refreshes'] += 1
+        finally:
+            self._refresh_lock.release()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def suggest(self, prefix: str, limit: int = 5) -> Dict[str, List[Dict]]:
+        """
+        Completions for a typed prefix
+
+        Args:
+            prefix (str): What the user has typed so far
+            limit (int): Maximum suggestions per kind
+
+        Returns:
+            dict: {'titles': [...], 'authors': [...], 'tags': [...]}, most viewed / used first
+        """
+        self._stats['lookups'] += 1
+        prefix = normalize(prefix)[:MAX_PREFIX_LENGTH]
+        matches = {KIND_TITLE: {}, KIND_AUTHOR: {}, KIND_TAG: {}}
+        if prefix:
+            entries = self._entries
+            position = bisect.bisect_left(entries, (prefix,))
+            for key, kind, label, ref, weight in entries[position:position + MAX_SCAN]:
+                if not key.startswith(prefix):
+                    break
+                # A title is indexed once per word; keep one hit per story
+                matches[kind].setdefault(ref if kind != KIND_AUTHOR else label, (weight, label, ref))
+
+        def best(kind):
+            return sorted(matches[kind].values(), key=lambda match: (-match[0], match[1]))[:limit]
+
+        return {
+            'titles': [{'id': ref, 'title': label} for _, label, ref in best(KIND_TITLE)],
+            'authors': [{'username': label} for _, label, _ in best(KIND_AUTHOR)],
+            'tags': [{'id': ref, 'name': label} for _, label, ref in best(KIND_TAG)],
+        }
+
+    def get_stats(self) -> Dict:
+        """Get index size and activity counters"""
+        stats = dict(self._stats)
+        stats['errors'] = self._refresher.errors
+        stats['entries'] = len(self._entries)
+        stats['stories'] = len(self._story_entries)
+        stats['age_seconds'] = round(time.monotonic() - self._built_at, 1) if self._built_at else None
+        stats['pending_refresh'] = len(self._dirty)
+        return stats
+
+
+# Global instance
+suggest_index = SuggestIndex(refresh_interval=Config.SUGGEST_REFRESH_INTERVAL,
+                             rebuild_interval=Config.SUGGEST_REBUILD_INTERVAL)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Story Type Catalog Cache for AI Storytelling Platform
+Keeps the story-type tags (tags WHERE category_id = 1) in process memory with a TTL,
+so the publish and edit pages and story_type validation do not query the tags table
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Any, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+STORY_TYPE_CATEGORY_ID = 1
+
+# Minimum catalog age before an unknown story_type forces a reload
+RELOAD_ON_MISS_INTERVAL = 10
+
+
+class TagCatalogSnapshot:
+    """Immutable view of the story types loaded at one point in time"""
+
+    def __init__(self, types: List[Dict[str, Any]]):
+        self.types = types
+        self.by_id = {row['id']: row for row in types}
+        self.by_name = {row['name']: row['id'] for row in types}
+        payload = json.dumps(types, sort_keys=True, default=str).encode('utf-8')
+        self.etag = hashlib.sha1(payload).hexdigest()
+        self.loaded_at = time.monotonic()
+
+    def resolve(self, value) -> Optional[int]:
+        """
+        Map a submitted story_type (tag id or tag name) to a tag id
+
+        Args:
+            value: Form value, e.g. '3' or 'Family'
+
+        Returns:
+            int or None: Tag id, or None when the value is not a known story type
+        """
+        if value is None:
+            return None
+        value = str(value).strip()
+        if value.isdigit():
+            return int(value) if int(value) in self.by_id else None
+        return self.by_name.get(value)
+
+
+class TagCatalog:
+    """Per-process cache of the story-type catalog"""
+
+    def __init__(self, ttl: int = 300):
+        """
+        Initialize the catalog cache
+
+        Args:
+            ttl (int): Seconds a loaded catalog is served before it is reloaded
+        """
+        self.ttl = ttl
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'loads': 0, 'invalidations': 0}
+
+    @staticmethod
+    def _load(cursor) -> List[Dict[str, Any]]:
+        cursor.execute("""
+            SELECT id, name, description, usage_count
+            FROM tags
+            WHERE category_id = %s
+            ORDER BY id
+        """, (STORY_TYPE_CATEGORY_ID,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def _fresh(self, snapshot: Optional[TagCatalogSnapshot]) -> bool:
+        return snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl
+
+    def get(self, cursor_factory: Callable) -> TagCatalogSnapshot:
+        """
+        Get the current catalog, loading it if missing or expired
+
+        Args:
+            cursor_factory (callable): Returns a dict cursor; only called on a cache miss
+
+        Returns:
+            TagCatalogSnapshot: Current story types
+        """
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            self._stats['hits'] += 1
+            return snapshot
+
+        # One loader per process; concurrent callers wait and reuse its result
+        with self._lock:
+            snapshot = self._snapshot
+            if self._fresh(snapshot):
+                self._stats['hits'] += 1
+                return snapshot
+            snapshot = TagCatalogSnapshot(self._load(cursor_factory()))
+            self._snapshot = snapshot
+            self._stats['loads'] += 1
+            logger.info(f"Loaded {len(snapshot.types)} story types into the tag catalog cache")
+            return snapshot
+
+    def resolve(self, value, cursor_factory: Callable) -> Optional[int]:
+        """
+        Validate a submitted story_type against the cached catalog
+
+        An unknown value triggers one reload (at most every RELOAD_ON_MISS_INTERVAL
+        seconds), so tags added since the last load are accepted without waiting
+        for the TTL while bogus values cannot force a query per request.
+
+        Args:
+            value: Form value (tag id or tag name)
+            cursor_factory (callable): Returns a dict cursor; only called on a cache miss
+
+        Returns:
+            int or None: Tag id, or None when the value is not a known story type
+        """
+        snapshot = self.get(cursor_factory)
+        tag_id = snapshot.resolve(value)
+        if tag_id is None and value and time.monotonic() - snapshot.loaded_at > RELOAD_ON_MISS_INTERVAL:
+            self.invalidate()
+            tag_id = self.get(cursor_factory).resolve(value)
+        return tag_id
+
+    def invalidate(self):
+        """Drop the cached catalog; the next get() reloads it"""
+        self._snapshot = None
+        self._stats['invalidations'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/load counters"""
+        stats = dict(self._stats)
+        snapshot = self._snapshot
+        stats['cached_types'] = len(snapshot.types) if snapshot else 0
+        stats['age_seconds'] = round(time.monotonic() - snapshot.loaded_at, 1) if snapshot else None
+        stats['etag'] = snapshot.etag if snapshot else None
+        return stats
+
+
+# Global instance
+tag_catalog = TagCatalog(ttl=Config.TAG_CATALOG_TTL)
@@ -0,0 +1,75 @@
+import pytest
+
+from anonymous_likes import AnonymousLikes, PackedIdSet
+
+
+def test_encode_decode_round_trip_keeps_order():
+    ids = [500, 3, 70000, 4, 2 ** 31 - 1, 1]
+    packed = PackedIdSet(ids)
+    decoded = PackedIdSet.decode(packed.encode())
+    assert list(decoded) == ids
+    assert all(story_id in decoded for story_id in ids)
+    assert 2 not in decoded
+
+
+def test_nearby_ids_pack_small():
+    packed = PackedIdSet(range(1000, 1200))
+    assert len(packed.encode()) < 300
+
+
+def test_empty_set_encodes_to_empty_string():
+    assert PackedIdSet().encode() == ''
+    assert list(PackedIdSet.decode('')) == []
+
+
+@pytest.mark.parametrize('data', ['!!!', '/w', 'gA'])
+def test_decode_rejects_malformed_input(data):
+    with pytest.raises(ValueError):
+        PackedIdSet.decode(data)
+
+
+def test_add_and_discard():
+    packed = PackedIdSet([5, 9])
+    assert packed.add(7)
+    assert not packed.add(7)
+    assert packed.discard(5)
+    assert not packed.discard(5)
+    assert list(packed) == [9, 7]
+    assert packed.intersection([1, 7, 9]) == {7, 9}
+
+
+def test_trim_drops_least_recently_added():
+    packed = PackedIdSet([50, 10, 30])
+    assert packed.trim(2) == 1
+    assert list(packed) == [10, 30]
+    assert 50 not in packed
+
+
+def test_full_set_keeps_the_id_just_liked():
+    store = AnonymousLikes(max_ids=3)
+    session = {}
+    store.save(session, PackedIdSet([100, 200, 300]))
+
+    liked = store.load(session)
+    liked.add(1)  # below every stored id
+    store.save(session, liked)
+
+    liked = store.load(session)
+    assert 1 in liked
+    assert 100 not in liked
+    assert list(liked) == [200, 300, 1]
+
+
+def test_unreadable_session_value_is_discarded():
+    store = AnonymousLikes(max_ids=3)
+    session = {AnonymousLikes.SESSION_KEY: '!!!'}
+    assert len(store.load(session)) == 0
+    assert AnonymousLikes.SESSION_KEY not in session
+
+
+def test_legacy_list_is_converted():
+    store = AnonymousLikes(max_ids=3)
+    session = {AnonymousLikes.LEGACY_SESSION_KEY: [4, 2, 'x', 8]}
+    assert list(store.load(session)) == [4, 2, 8]
+    assert AnonymousLikes.LEGACY_SESSION_KEY not in session
+    assert list(store.load(session)) == [4, 2, 8]
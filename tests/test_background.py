@@ -0,0 +1,48 @@
+import threading
+import time
+
+from background import BackgroundRefresher
+
+
+def test_trigger_runs_work_in_background():
+    ran = threading.Event()
+    refresher = BackgroundRefresher('test-refresher', ran.set)
+    refresher.trigger()
+    assert refresher.wait(2)
+    assert ran.is_set()
+
+
+def test_trigger_during_run_queues_one_more_run():
+    release = threading.Event()
+    runs = []
+
+    def work():
+        runs.append(1)
+        release.wait(2)
+
+    refresher = BackgroundRefresher('test-refresher', work)
+    refresher.trigger()
+    while not refresher.running:
+        time.sleep(0.01)
+    refresher.trigger(after_running=False)
+    refresher.trigger()
+    refresher.trigger()
+    release.set()
+    time.sleep(0.2)
+    assert len(runs) == 2
+
+
+def test_failing_work_is_counted_and_retried():
+    calls = []
+
+    def work():
+        calls.append(1)
+        if len(calls) <= 2:
+            raise RuntimeError('boom')
+
+    refresher = BackgroundRefresher('test-refresher', work, interval=0.05)
+    refresher.trigger()
+    assert refresher.wait(2)
+    time.sleep(0.2)
+    assert refresher.errors == 2
+    assert len(calls) > 2
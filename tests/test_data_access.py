@@ -0,0 +1,24 @@
+from datetime import datetime
+
+import pytest
+
+from data_access import decode_page_token, encode_page_token
+
+
+def test_page_token_round_trip():
+    created_at = datetime(2025, 3, 4, 5, 6, 7, 890123)
+    token = encode_page_token(created_at, 1234)
+    assert '=' not in token and '/' not in token and '+' not in token
+    assert decode_page_token(token) == (created_at, 1234)
+
+
+def test_page_token_without_microseconds():
+    created_at = datetime(2025, 1, 1)
+    assert decode_page_token(encode_page_token(created_at, 1)) == (created_at, 1)
+
+
+@pytest.mark.parametrize('token', ['', 'not a token', '!!!!', encode_page_token(datetime(2025, 1, 1), 1)[:-3],
+                                   'MjAyNS0wMS0wMQ', 'MjAyNS0wMS0wMXx4'])
+def test_invalid_page_token(token):
+    with pytest.raises(ValueError):
+        decode_page_token(token)
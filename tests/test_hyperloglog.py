@@ -0,0 +1,70 @@
+import pytest
+
+from hyperloglog import HyperLogLog
+
+
+def sketch(values, precision=12):
+    hll = HyperLogLog(precision)
+    for value in values:
+        hll.add(value)
+    return hll
+
+
+def viewers(start, stop):
+    return [f"viewer-{n}" for n in range(start, stop)]
+
+
+def test_empty():
+    hll = HyperLogLog()
+    assert hll.is_empty()
+    assert hll.count() == 0
+
+
+@pytest.mark.parametrize('n', [1, 10, 100])
+def test_small_counts_are_close_to_exact(n):
+    assert abs(sketch(viewers(0, n)).count() - n) <= max(1, n // 50)
+
+
+@pytest.mark.parametrize('n', [10000, 100000])
+def test_large_counts_within_error(n):
+    # Standard error at precision 12 is about 1.6%; allow three of them
+    assert abs(sketch(viewers(0, n)).count() - n) <= 0.05 * n
+
+
+def test_repeated_values_count_once():
+    hll = sketch(viewers(0, 500) * 5)
+    assert hll.count() == sketch(viewers(0, 500)).count()
+
+
+def test_merge_counts_the_union():
+    a = sketch(viewers(0, 6000))
+    b = sketch(viewers(4000, 10000))
+    a.merge(b)
+    assert a.registers == sketch(viewers(0, 10000)).registers
+    assert abs(a.count() - 10000) <= 500
+
+
+def test_merge_is_idempotent():
+    a = sketch(viewers(0, 1000))
+    before = a.count()
+    a.merge(sketch(viewers(0, 1000)))
+    assert a.count() == before
+
+
+def test_merge_rejects_other_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(12).merge(HyperLogLog(10))
+
+
+def test_bytes_round_trip():
+    hll = sketch(viewers(0, 2000))
+    loaded = HyperLogLog.from_bytes(hll.to_bytes())
+    assert loaded.precision == hll.precision
+    assert loaded.registers == hll.registers
+    assert HyperLogLog.from_bytes(None).is_empty()
+
+
+def test_corrupt_bytes():
+    data = sketch(viewers(0, 10)).to_bytes()
+    with pytest.raises(ValueError):
+        HyperLogLog.from_bytes(bytes([10]) + data[1:])
@@ -0,0 +1,107 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from search import query_terms
+from search_index import SKIP_INTERVAL, PostingCursor, PostingList, SearchIndex
+
+WORDS = ['dragon', 'castle', 'river', 'moon', 'forest', 'robot', 'garden', 'winter']
+
+
+def _row(story_id, title, content='', language_group='en', tags=''):
+    return (story_id, title, '', content, language_group, datetime(2024, 1, 1), tags)
+
+
+def _random_index(count, seed=7):
+    rng = random.Random(seed)
+    index = SearchIndex()
+    texts = {}
+    rows = []
+    for story_id in range(1, count + 1):
+        words = rng.sample(WORDS, rng.randint(1, 4))
+        texts[story_id] = set(words)
+        rows.append(_row(story_id, f'story {story_id}', ' '.join(words), tags=str(story_id % 3 + 1)))
+    index._apply(rows)
+    return index, texts
+
+
+def test_query_terms_split_required_and_optional():
+    assert query_terms('Dragon  castle dragon') == (['dragon', 'castle'], [])
+    assert query_terms('') == ([], [])
+
+
+def test_posting_cursor_seeks_across_skip_blocks_and_buffers():
+    postings = PostingList()
+    docnos = list(range(0, SKIP_INTERVAL * 5, 3))
+    for docno in docnos[:len(docnos) // 2]:
+        postings.append(docno, docno % 7 + 1)
+    # Later appends land in tail after the skip table was built
+    postings.skip_to(0)
+    for docno in docnos[len(docnos) // 2:]:
+        postings.append(docno, docno % 7 + 1)
+
+    assert list(postings) == [(docno, docno % 7 + 1) for docno in docnos]
+    for target in (0, 1, 64, 200, docnos[-1]):
+        cursor = PostingCursor(postings)
+        expected = next(docno for docno in docnos if docno >= target)
+        assert cursor.seek(target) == expected
+        assert cursor.tf == expected % 7 + 1
+    assert PostingCursor(postings).seek(docnos[-1] + 1) is None
+
+
+@pytest.mark.parametrize('query', ['dragon', 'dragon castle', 'moon robot winter', 'castle garden'])
+def test_required_terms_match_every_story_containing_them(query):
+    index, texts = _random_index(SKIP_INTERVAL * 8)
+    expected = {story_id for story_id, words in texts.items() if set(query.split()) <= words}
+    with index._lock:
+        matched = {index._story_ids[docno] for docno in index._match(query)}
+    assert matched == expected
+
+
+def test_unknown_term_matches_nothing():
+    index, _ = _random_index(50)
+    assert index.search('dragon unicorn') == []
+
+
+def test_title_match_ranks_first_and_edits_replace_old_versions():
+    index = SearchIndex()
+    index._apply([
+        _row(1, 'A quiet evening', 'the dragon slept by the river'),
+        _row(2, 'The dragon', 'a story about a lake'),
+        _row(3, 'Garden', 'nothing to see'),
+    ])
+    assert index.search('dragon') == [2, 1]
+
+    index._apply([_row(2, 'The lake', 'a story about a lake')])
+    assert index.search('dragon') == [1]
+    assert index.search('lake') == [2]
+
+
+def test_tag_and_language_filters_and_facets():
+    index = SearchIndex()
+    index._apply([
+        _row(1, 'Dragon one', language_group='en', tags='1'),
+        _row(2, 'Dragon two', language_group='zh', tags='1,2'),
+        _row(3, 'Dragon three', language_group='en', tags='2'),
+    ])
+    assert sorted(index.search('dragon', tag_id=2)) == [2, 3]
+    assert index.search('dragon', tag_id=2, language_group='en') == [3]
+    facets = index.facets('dragon', language_group='en')
+    assert facets['tags'] == {1: 1, 2: 1}
+    assert facets['languages'] == {'en': 2, 'zh': 1}
+
+
+def test_snapshot_round_trip(tmp_path):
+    index, texts = _random_index(SKIP_INTERVAL * 3)
+    path = str(tmp_path / 'index.snapshot')
+    index.write_snapshot(path)
+
+    loaded = SearchIndex()
+    assert loaded.load_snapshot(path)
+    assert loaded.search('dragon castle', limit=1000) == index.search('dragon castle', limit=1000)
+
+    # New postings go to the tail after the mapped base
+    loaded._apply([_row(10000, 'Dragon castle finale')])
+    assert loaded.search('dragon castle finale') == [10000]
+    assert 10000 in loaded.search('dragon castle', limit=1000)
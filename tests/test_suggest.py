@@ -0,0 +1,88 @@
+from datetime import datetime
+
+from suggest import SuggestIndex, normalize
+
+STORY_TYPES = [{'id': 1, 'name': 'Fairy Tale', 'usage_count': 4}, {'id': 2, 'name': 'Fable', 'usage_count': 9}]
+
+
+class FakeCursor:
+    """Answers the suggestion index's two queries from in-memory rows"""
+
+    def __init__(self, stories, changes=()):
+        self.stories = stories
+        self.changes = list(changes)
+        self.queries = []
+
+    def execute(self, query, params=()):
+        self.queries.append((query, params))
+        if 'SELECT story_id, title' in query:
+            ids = set(params) if params else None
+            self._rows = [row for row in self.stories if ids is None or row[0] in ids]
+        else:
+            self._rows = self.changes
+
+    def fetchall(self):
+        return self._rows
+
+
+class Catalog:
+    types = STORY_TYPES
+    etag = 'v1'
+
+
+def _index(stories):
+    index = SuggestIndex()
+    index.build(FakeCursor(stories), STORY_TYPES, 'v1')
+    return index
+
+
+def test_normalize_folds_case_and_whitespace():
+    assert normalize('  The   Lost DOG ') == 'the lost dog'
+
+
+def test_prefix_matches_any_word_of_a_title_most_viewed_first():
+    index = _index([
+        (1, 'The Lost Dog', 'alice', 5, datetime(2024, 1, 1)),
+        (2, 'Dogs of Winter', 'bob', 50, datetime(2024, 1, 2)),
+        (3, 'Moon Garden', 'alice', 1, datetime(2024, 1, 3)),
+    ])
+    result = index.suggest('DOG')
+    assert [title['id'] for title in result['titles']] == [2, 1]
+    assert index.suggest('lost d')['titles'] == [{'id': 1, 'title': 'The Lost Dog'}]
+    assert index.suggest('al')['authors'] == [{'username': 'alice'}]
+    assert [tag['name'] for tag in index.suggest('fa')['tags']] == ['Fable', 'Fairy Tale']
+    assert index.suggest('') == {'titles': [], 'authors': [], 'tags': []}
+
+
+def test_limit_and_one_hit_per_story():
+    index = _index([(story_id, f'Dog dog tale {story_id}', None, story_id, None) for story_id in range(1, 9)])
+    titles = index.suggest('dog', limit=3)['titles']
+    assert [title['id'] for title in titles] == [8, 7, 6]
+
+
+def test_catch_up_patches_changed_and_unpublished_stories():
+    stories = [
+        (1, 'The Lost Dog', 'alice', 5, datetime(2024, 1, 1)),
+        (2, 'Moon Garden', 'bob', 1, datetime(2024, 1, 2)),
+    ]
+    index = _index(stories)
+
+    # Story 1 was unpublished, story 2 renamed, story 3 rejected before it was ever indexed
+    edited = [(2, 'Sun Garden', 'bob', 1, datetime(2024, 1, 5))]
+    changes = [
+        (1, datetime(2024, 1, 4), 0),
+        (2, datetime(2024, 1, 5), 1),
+        (3, datetime(2024, 1, 6), 0),
+    ]
+    cursor = FakeCursor(edited, changes)
+    index._refreshed_at = 0.0
+    index.refresh(lambda: cursor, lambda: Catalog)
+
+    assert index.suggest('dog')['titles'] == []
+    assert index.suggest('alice')['authors'] == []
+    assert index.suggest('moon')['titles'] == []
+    assert index.suggest('sun')['titles'] == [{'id': 2, 'title': 'Sun Garden'}]
+    # The rejected card still moves the watermark
+    assert index._synced_until == datetime(2024, 1, 6)
+    fetch_params = [params for query, params in cursor.queries if 'SELECT story_id, title' in query][0]
+    assert sorted(fetch_params) == [1, 2]
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Top Stories by Views for AI Storytelling Platform
+Tracks the K most viewed published stories in process memory, so the home page,
+the related stories on story_detail and the admin dashboard get "top N by views"
+without sorting story_cards. The set is seeded from MySQL, updated as this
+worker counts views, and re-seeded periodically to pick up other workers' views.
+"""
+
+import time
+import heapq
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import Config
+from data_access import StoryCard, STORY_CARD_COLUMNS, fetch_all
+
+logger = logging.getLogger(__name__)
+
+# Extra IDs fetched per call, so stories unpublished since the last seed do not shorten the list
+FETCH_SLACK = 3
+
+_NO_DATE = datetime.min
+
+
+class TopStoriesTracker:
+    """Per-process top-K of published stories ordered by (view_count, published_at)"""
+
+    def __init__(self, k: int = 50, reseed_interval: int = 60):
+        """
+        Initialize an empty tracker
+
+        Args:
+            k (int): Number of stories tracked; callers can ask for up to k - FETCH_SLACK
+            reseed_interval (int): Seconds between re-seeds from MySQL
+        """
+        self.k = k
+        self.reseed_interval = reseed_interval
+        self._views: Dict[int, Tuple[int, datetime]] = {}
+        self._seeded_at = None
+        self._lock = threading.Lock()
+        self._seed_lock = threading.Lock()
+        self._stats = {'lookups': 0, 'seeds': 0, 'views_recorded': 0, 'promotions': 0}
+
+    def _seed(self, cursor):
+        cursor.execute("""
+            SELECT story_id, view_count, published_at
+            FROM story_cards
+            WHERE status = 'published' AND deleted_at IS NULL
+            ORDER BY view_count DESC, published_at DESC
+            LIMIT %s
+        """, (self.k,))
+        views = {row[0]: (row[1], row[2] or _NO_DATE) for row in cursor.fetchall()}
+        with self._lock:
+            self._views = views
+            self._seeded_at = time.monotonic()
+        self._stats['seeds'] += 1
+
+    def _ensure_seeded(self, cursor):
+        if self._seeded_at is not None and time.monotonic() - self._seeded_at < self.reseed_interval:
+            return
+        # Only the first seed makes callers wait; later re-seeds are skipped while one runs
+        if not self._seed_lock.acquire(blocking=self._seeded_at is None):
+            return
+        try:
+            if self._seeded_at is None or time.monotonic() - self._seeded_at >= self.reseed_interval:
+                self._seed(cursor)
+        finally:
+            self._seed_lock.release()
+
+    def record_view(self, story_id: int, view_count: int, published_at: Optional[datetime]):
+        """
+        Account for a view counted by this worker
+
+        Args:
+            story_id (int): Viewed (published) story
+            view_count (int): Its view count after the increment
+            published_at (datetime): Its publish time (tie-breaker)
+        """
+        self._stats['views_recorded'] += 1
+        key = (view_count, published_at or _NO_DATE)
+        with self._lock:
+            if story_id in self._views:
+                self._views[story_id] = max(self._views[story_id], key)
+                return
+            if len(self._views) < self.k:
+                self._views[story_id] = key
+                return
+            lowest = min(self._views, key=self._views.__getitem__)
+            if key > self._views[lowest]:
+                del self._views[lowest]
+                self._views[story_id] = key
+                self._stats['promotions'] += 1
+
+    def discard(self, story_ids: Optional[List[int]] = None):
+        """story_cards change listener: forget changed stories and re-seed on the next lookup"""
+        with self._lock:
+            for story_id in story_ids or ():
+                self._views.pop(story_id, None)
+            self._seeded_at = None if story_ids is None or not self._views else 0.0
+
+    def top_ids(self, cursor, n: int, exclude: Iterable[int] = ()) -> List[int]:
+        """
+        IDs of the n most viewed published stories (cost depends on k, not catalog size)
+
+        Args:
+            cursor: Tuple cursor; only used to seed
+            n (int): Number of IDs
+            exclude (iterable): Story IDs to leave out (e.g. the story being viewed)
+        """
+        self._ensure_seeded(cursor)
+        exclude = set(exclude)
+        with self._lock:
+            ranked = heapq.nlargest(n + len(exclude), self._views, key=self._views.__getitem__)
+        return [story_id for story_id in ranked if story_id not in exclude][:n]
+
+    def top(self, cursor, n: int, exclude: Iterable[int] = ()) -> List[StoryCard]:
+        """
+        The n most viewed published stories as cards, most viewed first
+
+        Args:
+            cursor: Tuple cursor
+            n (int): Number of stories
+            exclude (iterable): Story IDs to leave out
+
+        Returns:
+            list: StoryCard rows
+        """
+        self._stats['lookups'] += 1
+        story_ids = self.top_ids(cursor, n + FETCH_SLACK, exclude)
+        if not story_ids:
+            return []
+        placeholders = ','.join(['%s'] * len(story_ids))
+        cursor.execute(f"""
+            SELECT {STORY_CARD_COLUMNS}
+            FROM story_cards
+            WHERE story_id IN ({placeholders}) AND status = 'published' AND deleted_at IS NULL
+        """, story_ids)
+        cards = {card.id: card for card in fetch_all(cursor, StoryCard)}
+        if len(cards) < len(story_ids):
+            self.discard([story_id for story_id in story_ids if story_id not in cards])
+        return [cards[story_id] for story_id in story_ids if story_id in cards][:n]
+
+    def get_stats(self) -> Dict:
+        """Get tracker size and activity counters"""
+        stats = dict(self._stats)
+        stats['tracked'] = len(self._views)
+        stats['seed_age_seconds'] = round(time.monotonic() - self._seeded_at, 1) if self._seeded_at else None
+        return stats
+
+
+# Global instance
+top_stories = TopStoriesTracker(k=Config.TOP_STORIES_K, reseed_interval=Config.TOP_STORIES_RESEED_INTERVAL)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Buffered Story View Counter for AI Storytelling Platform
+story_detail adds each view to an in-memory counter instead of updating the
+stories row. A background thread writes the accumulated counts to story_stats
+every VIEW_FLUSH_INTERVAL seconds as multi-row upserts, and copies them to
+story_cards in the same transaction. The buffer is also flushed at interpreter
+exit, so a graceful worker shutdown (gunicorn SIGTERM, Ctrl+C) loses no views.
+
+Unique viewers are counted alongside with HyperLogLog sketches (hyperloglog.py):
+one per story per day in story_daily_viewers and one all-time sketch per story in
+story_stats. A flush merges this worker's sketches into the stored ones under
+row locks, so every worker's viewers end up in the same sketch.
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import Config
+from hyperloglog import HyperLogLog
+from story_cards import story_cards
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Per-process write-behind buffer of story views"""
+
+    def __init__(self, flush_interval: float = 5, batch_size: int = 500):
+        """
+        Initialize an empty buffer
+
+        Args:
+            flush_interval (float): Seconds between background flushes
+            batch_size (int): Stories per upsert statement
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: Counter = Counter()
+        self._viewers: Dict[Tuple[int, date], HyperLogLog] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._connection_factory: Optional[Callable] = None
+        self._thread_pid = None
+        self._stats = {'views': 0, 'flushes': 0, 'rows_written': 0, 'sketches_written': 0, 'errors': 0}
+
+    def start(self, connection_factory: Callable):
+        """
+        Set where flushes write and flush once more at exit
+
+        The flush thread itself starts with the first view, in the process that
+        serves it (so a forked worker gets its own thread).
+
+        Args:
+            connection_factory (callable): Returns a pooled primary connection (closed after use)
+        """
+        if self._connection_factory is None:
+            atexit.register(self.flush)
+        self._connection_factory = connection_factory
+
+    def add(self, story_id: int, viewer: Optional[str] = None) -> int:
+        """
+        Count one view of a story
+
+        Args:
+            story_id (int): Viewed story
+            viewer (str): Stable viewer key (user ID, or a hash of the anonymous
+                visitor's IP and user agent); counted once per story per day
+
+        Returns:
+            int: Views of this story buffered in this worker and not yet flushed
+        """
+        with self._lock:
+            self._pending[story_id] += 1
+            count = self._pending[story_id]
+            if viewer:
+                key = (story_id, date.today())
+                if key not in self._viewers:
+                    self._viewers[key] = HyperLogLog()
+                self._viewers[key].add(viewer)
+        self._stats['views'] += 1
+        if self._thread_pid != os.getpid():
+            self._start_thread()
+        return count
+
+    def _start_thread(self):
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name='view-counter-flush', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write the buffered views to story_stats and story_cards
+
+        On failure the counts go back into the buffer and are retried on the
+        next flush.
+
+        Returns:
+            int: Number of stories written
+        """
+        if self._connection_factory is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, Counter()
+                viewers, self._viewers = self._viewers, {}
+            if not batch:
+                return 0
+
+            # Ascending story_id, so concurrent flushes from other workers lock rows in the same order
+            items = sorted(batch.items())
+            connection = None
+            try:
+                connection = self._connection_factory()
+                # Connections autocommit; the sketch merges need their row locks held until commit
+                connection.begin()
+                cursor = connection.cursor()
+                for start in range(0, len(items), self.batch_size):
+                    chunk = items[start:start + self.batch_size]
+                    cursor.execute(
+                        "INSERT INTO story_stats (story_id, view_count) VALUES "
+                        + ','.join(['(%s, %s)'] * len(chunk))
+                        + " ON DUPLICATE KEY UPDATE view_count = view_count + VALUES(view_count)",
+                        [value for item in chunk for value in item])
+                    story_cards.sync_counters(cursor, [story_id for story_id, _ in chunk])
+                if viewers:
+                    self._merge_viewers(cursor, viewers)
+                connection.commit()
+            except Exception as e:
+                with self._lock:
+                    self._pending.update(batch)
+                    for key, sketch in viewers.items():
+                        if key in self._viewers:
+                            sketch.merge(self._viewers[key])
+                        self._viewers[key] = sketch
+                self._stats['errors'] += 1
+                logger.error(f"Failed to flush {len(items)} story view counts: {e}")
+                return 0
+            finally:
+                if connection is not None:
+                    connection.close()
+
+            self._stats['flushes'] += 1
+            self._stats['rows_written'] += len(items)
+            return len(items)
+
+    def _merge_viewers(self, cursor, viewers: Dict[Tuple[int, date], HyperLogLog]):
+        """Merge buffered sketches into story_daily_viewers and story_stats (caller commits)"""
+        keys = sorted(viewers)
+        for start in range(0, len(keys), self.batch_size):
+            chunk = keys[start:start + self.batch_size]
+            params = [value for key in chunk for value in key]
+            # Create missing rows first, so the locking read below never races an insert
+            cursor.execute(
+                "INSERT IGNORE INTO story_daily_viewers (story_id, day, viewers, sketch) VALUES "
+                + ','.join(["(%s, %s, 0, '')"] * len(chunk)), params)
+            cursor.execute(
+                "SELECT story_id, day, sketch FROM story_daily_viewers WHERE (story_id, day) IN ("
+                + ','.join(['(%s, %s)'] * len(chunk)) + ") FOR UPDATE", params)
+            stored = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+            rows = []
+            for key in chunk:
+                sketch = HyperLogLog.from_bytes(stored.get(key))
+                sketch.merge(viewers[key])
+                rows.extend([key[0], key[1], sketch.count(), sketch.to_bytes()])
+            cursor.execute(
+                "INSERT INTO story_daily_viewers (story_id, day, viewers, sketch) VALUES "
+                + ','.join(['(%s, %s, %s, %s)'] * len(chunk))
+                + " ON DUPLICATE KEY UPDATE viewers = VALUES(viewers), sketch = VALUES(sketch)", rows)
+
+        # All-time sketch per story (its story_stats row was written by the view upsert)
+        totals: Dict[int, HyperLogLog] = {}
+        for (story_id, _), sketch in viewers.items():
+            if story_id in totals:
+                totals[story_id].merge(sketch)
+            else:
+                totals[story_id] = HyperLogLog(sketch.precision, bytearray(sketch.registers))
+        story_ids = sorted(totals)
+        for start in range(0, len(story_ids), self.batch_size):
+            chunk = story_ids[start:start + self.batch_size]
+            cursor.execute(
+                f"SELECT story_id, viewer_sketch FROM story_stats WHERE story_id IN ({','.join(['%s'] * len(chunk))}) FOR UPDATE",
+                chunk)
+            stored = {row[0]: row[1] for row in cursor.fetchall()}
+            rows = []
+            for story_id in chunk:
+                sketch = HyperLogLog.from_bytes(stored.get(story_id))
+                sketch.merge(totals[story_id])
+                rows.extend([story_id, sketch.count(), sketch.to_bytes()])
+            cursor.execute(
+                "INSERT INTO story_stats (story_id, unique_viewers, viewer_sketch) VALUES "
+                + ','.join(['(%s, %s, %s)'] * len(chunk))
+                + " ON DUPLICATE KEY UPDATE unique_viewers = VALUES(unique_viewers), viewer_sketch = VALUES(viewer_sketch)",
+                rows)
+        self._stats['sketches_written'] += len(viewers)
+
+    @staticmethod
+    def unique_viewers(cursor, story_ids: Iterable[int], days: int = 7) -> Dict[int, int]:
+        """
+        Estimated distinct viewers per story over the last N days (today included)
+
+        Daily sketches are merged rather than their counts summed, so a reader who
+        came back on several days is counted once.
+
+        Args:
+            cursor: Tuple cursor
+            story_ids (iterable): Stories to count
+            days (int): Window length in days
+
+        Returns:
+            dict: story_id -> estimated unique viewers (stories without views are left out)
+        """
+        story_ids = sorted(set(story_ids))
+        if not story_ids:
+            return {}
+        cursor.execute(f"""
+            SELECT story_id, sketch
+            FROM story_daily_viewers
+            WHERE story_id IN ({','.join(['%s'] * len(story_ids))}) AND day >= %s
+        """, story_ids + [date.today() - timedelta(days=days - 1)])
+        merged: Dict[int, HyperLogLog] = {}
+        for story_id, data in cursor.fetchall():
+            sketch = HyperLogLog.from_bytes(data)
+            if story_id in merged:
+                merged[story_id].merge(sketch)
+            else:
+                merged[story_id] = sketch
+        return {story_id: sketch.count() for story_id, sketch in merged.items()}
+
+    @staticmethod
+    def daily_unique_viewers(cursor, story_id: int, days: int = 30) -> List[Dict]:
+        """
+        Per-day estimated distinct viewers of one story, oldest first
+
+        Args:
+            cursor: Tuple cursor
+            story_id (int): Story
+            days (int): Window length in days
+
+        Returns:
+            list: {'day': 'YYYY-MM-DD', 'viewers': int} for days with views
+        """
+        cursor.execute("""
+            SELECT day, viewers
+            FROM story_daily_viewers
+            WHERE story_id = %s AND day >= %s
+            ORDER BY day
+        """, (story_id, date.today() - timedelta(days=days - 1)))
+        return [{'day': day.isoformat(), 'viewers': viewers} for day, viewers in cursor.fetchall()]
+
+    def get_stats(self) -> Dict:
+        """Get buffer size and flush counters"""
+        stats = dict(self._stats)
+        stats['pending_stories'] = len(self._pending)
+        stats['pending_views'] = sum(self._pending.values())
+        stats['pending_sketches'] = len(self._viewers)
+        return stats
+
+
+# Global instance
+view_counter = ViewCounter(flush_interval=Config.VIEW_FLUSH_INTERVAL, batch_size=Config.VIEW_FLUSH_BATCH_SIZE)